@@ -0,0 +1,59 @@
+"""Answer a JSONL file of questions with any week and mode, without the UI.
+
+Usage:
+    python batch.py --week 2 --mode part2 --input questions.jsonl --output answers.jsonl [--concurrency 8]
+
+Run the same command again to resume an interrupted run: questions that
+already have an answer in the output file are skipped.
+"""
+
+import os
+import sys
+import json
+import argparse
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(project_root)
+
+# Parse command line arguments
+parser = argparse.ArgumentParser(description='Run questions through Perplexia AI in batch')
+parser.add_argument('--week', type=int, choices=[1, 2, 3], default=1,
+                    help='Which week to run (1, 2, or 3)')
+parser.add_argument('--mode', type=str, choices=['part1', 'part2', 'part3'],
+                    default='part1', help='Which part of the selected week to run')
+parser.add_argument('--input', type=str, required=True,
+                    help='JSONL file with a "question" and optional "id" and "chat_history" per line')
+parser.add_argument('--output', type=str, required=True,
+                    help='JSONL file answers are appended to; existing answers are skipped')
+parser.add_argument('--concurrency', type=int, default=8,
+                    help='Maximum number of questions in flight')
+parser.add_argument('--timeout', type=float, default=None,
+                    help='Time limit per question in seconds')
+parser.add_argument('--no-retry-errors', action='store_true',
+                    help='When resuming, skip questions that failed before instead of running them again')
+parser.add_argument('--initialize-kwargs', type=json.loads, default={},
+                    help='JSON object of keyword arguments for initialize(), e.g. \'{"docs_path": "docs/"}\'')
+parser.add_argument('--report', type=str, default=None,
+                    help='Also write the aggregate report as JSON to this file')
+args = parser.parse_args()
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    from perplexia_ai.batch import run_batch
+    from perplexia_ai.core.registry import create_chat_implementation
+
+    load_dotenv()
+    chat = create_chat_implementation(args.week, args.mode)
+    chat.initialize(**args.initialize_kwargs)
+    report = run_batch(chat, args.input, args.output, concurrency=args.concurrency,
+                       timeout=args.timeout, retry_errors=not args.no_retry_errors)
+
+    summary = report.summary()
+    print(json.dumps(summary, indent=2))
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(summary, f, indent=2)
+    if hasattr(chat, 'stop_watching'):
+        chat.stop_watching()
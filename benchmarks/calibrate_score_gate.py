@@ -0,0 +1,116 @@
+"""Fit the retrieval score gate of DocumentRAGChat from labeled questions.
+
+Every question is retrieved against the document index and paired with its
+label: GOOD if the retrieved context can answer it, BAD if not. Questions
+without a label are labeled by the evaluation call the gate stands in for.
+The thresholds are fitted on a share of the questions and checked on the
+rest, reporting how many evaluation calls the gate saves and how often it
+disagrees with the labels.
+
+The questions file is JSONL with a "question" and an optional "label" per line:
+
+    {"question": "What strategic goals did OPM outline in 2022?", "label": "GOOD"}
+
+Usage:
+    python benchmarks/calibrate_score_gate.py [--questions labeled.jsonl] [--max-error 0.02]
+                                              [--output .cache/score_gate.json] [--offline]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+from typing import List, Tuple
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from dotenv import load_dotenv
+from langchain_core.output_parsers import StrOutputParser
+
+from perplexia_ai.core.context_packing import pack_context
+from perplexia_ai.core.registry import OPM_EXAMPLES, WEB_SEARCH_EXAMPLES
+from perplexia_ai.week2.part2 import EVALUATION_PROMPT, RETRIEVAL_MODES, DocumentRAGChat
+from perplexia_ai.week2.score_gate import ScoreGate
+
+
+def load_questions(path: str) -> List[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def collect_samples(chat: DocumentRAGChat, questions: List[dict]) -> List[Tuple[float, bool]]:
+    """Retrieve every question and pair its top score with its label."""
+    chain = EVALUATION_PROMPT | chat.llm | StrOutputParser()
+    samples = []
+    for row in questions:
+        docs, scores = chat.retrieve(row["question"])
+        label = row.get("label")
+        if label is None:
+            context = pack_context(docs, chat.context_token_budget, chat.max_passage_tokens).text
+            label = chain.invoke({"context": context, "question": row["question"]})
+        samples.append((max(scores, default=0.0), "GOOD" in str(label).upper()))
+    return samples
+
+
+def print_report(name: str, gate: ScoreGate, samples: List[Tuple[float, bool]]) -> dict:
+    report = gate.evaluate(samples)
+    print(f"  {name:<10}{report['samples']:>8}{report['llm_calls_saved']:>8}{report['saved_share']:>9.0%}"
+          f"{report['judged_good']:>7}{report['judged_bad']:>6}{report['errors']:>8}{report['error_rate']:>9.1%}")
+    return report
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Fit the retrieval score gate from labeled questions")
+    parser.add_argument("--questions", help="Labeled questions as JSONL (default: the example questions, labeled by the LLM)")
+    parser.add_argument("--docs", default=os.path.join(project_root, "test_docs"), help="PDF directory to index")
+    parser.add_argument("--index-dir", default=".cache/index", help="Directory of the document index")
+    parser.add_argument("--retrieval-mode", default="vector", choices=RETRIEVAL_MODES)
+    parser.add_argument("--max-error", type=float, default=0.02, help="Largest share of gated decisions that may be wrong")
+    parser.add_argument("--holdout", type=float, default=0.3, help="Share of questions kept out of fitting to check the gate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=".cache/score_gate.json", help="Where to save the fitted gate")
+    parser.add_argument("--offline", action="store_true", help="Use the fake chat model and embeddings from benchmarks/fakes.py")
+    args = parser.parse_args()
+
+    if args.questions:
+        questions = load_questions(args.questions)
+    else:
+        questions = [{"question": question} for question, in OPM_EXAMPLES + WEB_SEARCH_EXAMPLES]
+
+    chat = DocumentRAGChat()
+    if args.offline:
+        from benchmarks.fakes import FakeChatModel, FakeEmbeddings, FakeSearchTool
+        chat.initialize(args.docs, cache_dir=None, index_dir=tempfile.mkdtemp(prefix="gate-index-"),
+                        retrieval_mode=args.retrieval_mode, llm=FakeChatModel(bad_rate=0.5),
+                        embeddings=FakeEmbeddings(), search_tool=FakeSearchTool())
+    else:
+        chat.initialize(args.docs, index_dir=args.index_dir, retrieval_mode=args.retrieval_mode)
+    samples = collect_samples(chat, questions)
+
+    shuffled = list(samples)
+    random.Random(args.seed).shuffle(shuffled)
+    split = int(len(shuffled) * (1 - args.holdout)) if len(shuffled) > 1 else len(shuffled)
+    fit_samples, holdout_samples = shuffled[:split], shuffled[split:]
+    gate = ScoreGate.fit(fit_samples, max_error=args.max_error, retrieval_mode=args.retrieval_mode)
+
+    good = sum(label for _, label in samples)
+    print(f"{len(samples)} questions ({good} GOOD, {len(samples) - good} BAD), "
+          f"fitted on {len(fit_samples)}, held out {len(holdout_samples)}")
+    print(f"Thresholds: BAD below {gate.low:.4f}, GOOD from {gate.high:.4f}, LLM in between")
+    print(f"  {'':<10}{'samples':>8}{'saved':>8}{'share':>9}{'good':>7}{'bad':>6}{'errors':>8}{'err rate':>9}")
+    print_report("fit", gate, fit_samples)
+    if holdout_samples:
+        print_report("holdout", gate, holdout_samples)
+    print_report("all", gate, samples)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    gate.save(args.output)
+    print(f"Saved gate to {args.output}; use it with DocumentRAGChat.initialize(score_gate={args.output!r})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Per-request overhead of QueryUnderstandingChat with a zero-latency fake model.
+
+Compares the precompiled chains built in initialize() against the previous
+approach, which rebuilt every prompt, chain and tool binding on each request.
+
+Usage:
+    python benchmarks/chain_overhead.py [--requests 200]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from functools import partial
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from langchain_core.messages import ToolMessage
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableLambda
+
+from benchmarks.fakes import FakeChatModel
+from perplexia_ai.week1.part1 import GENERAL_PROMPT, MATHS_PROMPT, TOOL_MAP, QueryUnderstandingChat, calculate, messages_from_dict
+
+
+def legacy_process_message(chat: QueryUnderstandingChat, message: str, chat_history=None) -> str:
+    """The per-request chain construction used before chains were precompiled."""
+    def calculator_loop(info, history):
+        question = info["question"]
+        messages: list = [("placeholder", "{history}"), ("user", MATHS_PROMPT)]
+        while True:
+            chain = ChatPromptTemplate.from_messages(messages) | chat.llm.bind_tools([calculate])
+            response = chain.invoke({"question": question, "history": history})
+            messages.append(response)
+            if not response.tool_calls:
+                break
+            for tool_call in response.tool_calls:
+                tool_result = TOOL_MAP[tool_call["name"]].invoke(tool_call["args"])
+                messages.append(ToolMessage(content=str(tool_result), tool_call_id=tool_call["id"]))
+        return StrOutputParser().invoke(response)
+
+    def route_question(info, history):
+        match info["category"]:
+            case "maths":
+                return RunnableLambda(partial(calculator_loop, history=history))
+            case _ as category:
+                messages: list = [("placeholder", "{history}"), ("user", chat.response_prompts.get(category, GENERAL_PROMPT))]
+                return ChatPromptTemplate.from_messages(messages) | chat.llm | StrOutputParser()
+
+    history = messages_from_dict(chat_history) if chat_history else []
+    full_chain = {"category": chat.routing_chain, "question": lambda x: x["question"], "history": lambda x: x["history"]} | RunnableLambda(partial(route_question, history=history))
+    return full_chain.invoke({"question": message, "history": history})
+
+
+def measure(fn, message: str, requests: int) -> float:
+    """Return the median per-request time in seconds."""
+    fn(message)  # warm up
+    durations = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        fn(message)
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-request chain construction overhead")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    args = parser.parse_args()
+
+    chat = QueryUnderstandingChat()
+    # Route with the (fake) LLM so both variants make the same model calls
+    chat.initialize(local_routing=False, llm=FakeChatModel())
+
+    scenarios = {
+        "factual": "Who wrote Hamlet?",
+        "maths": "What is 145323.122 * 1234389.12?",
+    }
+    print(f"{'scenario':<10}{'before us':>12}{'after us':>12}{'speedup':>10}")
+    for name, message in scenarios.items():
+        before = measure(partial(legacy_process_message, chat), message, args.requests)
+        after = measure(chat.process_message, message, args.requests)
+        print(f"{name:<10}{before * 1e6:>12.0f}{after * 1e6:>12.0f}{before / after:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
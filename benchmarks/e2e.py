@@ -0,0 +1,235 @@
+"""Offline end-to-end benchmark of the chat implementations.
+
+Drives QueryUnderstandingChat, WebSearchChat and DocumentRAGChat through
+process_message with fake chat models, embeddings and search (see
+benchmarks/fakes.py), so the numbers measure our own overhead (graph
+execution, chunking, retrieval, context building, prompt assembly) plus
+whatever backend latency is configured, and nothing else.
+
+Per-node timings come from LangChain callbacks: every direct child run of a
+request's outermost run is timed, which for a LangGraph graph is one run per
+node, reported under its graph node name (plain function nodes included),
+and for an LCEL chain one run per step. Reported per mode: setup time (initialize, including PDF ingest),
+end-to-end and per-node latency percentiles, throughput and peak traced
+memory.
+
+Usage:
+    python benchmarks/e2e.py [--requests 50] [--llm-latency 0.2 --latency-sigma 0.5]
+                             [--modes week1/part1 week2/part2] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import threading
+import tracemalloc
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+from uuid import UUID
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+
+from benchmarks.fakes import FakeChatModel, FakeEmbeddings, FakeSearchTool, Latency
+from perplexia_ai.core.registry import OPM_EXAMPLES, WEB_SEARCH_EXAMPLES
+
+QUERY_UNDERSTANDING_QUESTIONS = [
+    "Who wrote Pride and Prejudice?",
+    "Explain how vaccines train the immune system",
+    "Compare electric cars and petrol cars",
+    "Define entropy",
+    "What is 145323.122 * 1234389.12?",
+    "What is the best way to learn guitar?",
+]
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """Summarise durations in seconds as milliseconds."""
+    ordered = sorted(values)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1e3
+
+    return {
+        "mean_ms": statistics.fmean(ordered) * 1e3,
+        "p50_ms": pick(0.5),
+        "p90_ms": pick(0.9),
+        "p99_ms": pick(0.99),
+        "max_ms": ordered[-1] * 1e3,
+    }
+
+
+class NodeTimer(BaseCallbackHandler):
+    """Callback handler timing the direct child runs of every outermost run.
+
+    In a LangGraph graph those are the node runs, named after the graph node
+    in their langgraph_node metadata; in an LCEL chain they are its steps.
+    """
+
+    def __init__(self):
+        self.durations: Dict[str, List[float]] = {}
+        self._roots = set()
+        self._started: Dict[UUID, tuple] = {}
+        self._lock = threading.Lock()
+
+    def on_chain_start(self, serialized: Optional[dict], inputs: Any, *, run_id: UUID,
+                       parent_run_id: Optional[UUID] = None, metadata: Optional[dict] = None, **kwargs: Any) -> None:
+        with self._lock:
+            if parent_run_id is None:
+                self._roots.add(run_id)
+            elif parent_run_id in self._roots:
+                name = (metadata or {}).get("langgraph_node") or kwargs.get("name") or "chain"
+                self._started[run_id] = (name, time.perf_counter())
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def _end(self, run_id: UUID) -> None:
+        end = time.perf_counter()
+        with self._lock:
+            self._roots.discard(run_id)
+            started = self._started.pop(run_id, None)
+            if started is not None:
+                name, start = started
+                self.durations.setdefault(name, []).append(end - start)
+
+
+# Adds the active NodeTimer to the callbacks of every run, like collect_runs does for its collector
+_node_timer: ContextVar[Optional[NodeTimer]] = ContextVar("e2e_node_timer", default=None)
+register_configure_hook(_node_timer, inheritable=True)
+
+
+def build_modes(args: argparse.Namespace) -> Dict[str, Callable[[], tuple]]:
+    """Return setup functions creating each chat with fake backends, plus its questions."""
+    def llm() -> FakeChatModel:
+        return FakeChatModel(
+            latency=args.llm_latency, latency_sigma=args.latency_sigma, seed=args.seed,
+            answer_words=args.answer_words, bad_rate=args.bad_rate,
+        )
+
+    def search_tool() -> FakeSearchTool:
+        return FakeSearchTool(latency=Latency(args.search_latency, args.latency_sigma, args.seed))
+
+    def query_understanding() -> tuple:
+        from perplexia_ai.week1.part1 import QueryUnderstandingChat
+        chat = QueryUnderstandingChat()
+        chat.initialize(llm=llm())
+        return chat, QUERY_UNDERSTANDING_QUESTIONS
+
+    def web_search() -> tuple:
+        from perplexia_ai.week2.part1 import WebSearchChat
+        chat = WebSearchChat()
+        chat.initialize(llm=llm(), search_tool=search_tool())
+        return chat, [question for question, in WEB_SEARCH_EXAMPLES]
+
+    def document_rag() -> tuple:
+        from perplexia_ai.week2.part2 import DocumentRAGChat
+        chat = DocumentRAGChat()
+        chat.initialize(
+            args.docs,
+            cache_dir=None,
+            index_dir=tempfile.mkdtemp(prefix="e2e-index-"),
+            retrieval_mode=args.retrieval_mode,
+            llm=llm(),
+            embeddings=FakeEmbeddings(latency=Latency(args.embedding_latency, args.latency_sigma, args.seed)),
+            search_tool=search_tool(),
+        )
+        return chat, [question for question, in OPM_EXAMPLES]
+
+    return {"week1/part1": query_understanding, "week2/part1": web_search, "week2/part2": document_rag}
+
+
+def run_mode(setup: Callable[[], tuple], requests: int, trace_memory: bool) -> dict:
+    """Set up one chat implementation and send it requests, recording timings."""
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    chat, questions = setup()
+    setup_time = time.perf_counter() - start
+
+    chat.process_message(questions[0])  # warm up
+    latencies: List[float] = []
+    timer = NodeTimer()
+    token = _node_timer.set(timer)
+    run_start = time.perf_counter()
+    try:
+        for i in range(requests):
+            # Number the questions so repeated ones miss the search cache like new questions would
+            question = f"{questions[i % len(questions)]} ({i})"
+            start = time.perf_counter()
+            chat.process_message(question)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        _node_timer.reset(token)
+    elapsed = time.perf_counter() - run_start
+
+    result = {
+        "setup_s": setup_time,
+        "requests": requests,
+        "throughput_rps": requests / elapsed,
+        "end_to_end": percentiles(latencies),
+        "nodes": {name: {"calls": len(values), **percentiles(values)} for name, values in timer.durations.items()},
+    }
+    if trace_memory:
+        result["peak_traced_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark with fake backends")
+    parser.add_argument("--modes", nargs="+", help="Modes to run, e.g. week1/part1 week2/part2 (default: all)")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per mode")
+    parser.add_argument("--docs", default=os.path.join(project_root, "test_docs"), help="PDF directory for document RAG")
+    parser.add_argument("--retrieval-mode", default="vector", choices=["vector", "bm25", "hybrid"])
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Median chat model latency in seconds")
+    parser.add_argument("--embedding-latency", type=float, default=0.0, help="Median embedding request latency in seconds")
+    parser.add_argument("--search-latency", type=float, default=0.0, help="Median search latency in seconds")
+    parser.add_argument("--latency-sigma", type=float, default=0.0, help="Log-normal spread of all latencies, 0 for fixed")
+    parser.add_argument("--answer-words", type=int, default=50, help="Words in every fake answer")
+    parser.add_argument("--bad-rate", type=float, default=0.0, help="Share of document contexts judged BAD")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-tracemalloc", action="store_true", help="Skip memory tracing, which slows Python down")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    modes = build_modes(args)
+    selected = args.modes or list(modes)
+    unknown = set(selected) - set(modes)
+    if unknown:
+        parser.error(f"Unknown modes: {sorted(unknown)}. Choose from: {list(modes)}")
+
+    results = {
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "modes")},
+        "python": platform.python_version(),
+        "modes": {},
+    }
+    for name in selected:
+        result = run_mode(modes[name], args.requests, not args.no_tracemalloc)
+        results["modes"][name] = result
+        e2e = result["end_to_end"]
+        peak = f", peak {result['peak_traced_bytes'] / 2 ** 20:.1f} MiB" if "peak_traced_bytes" in result else ""
+        print(f"\n{name}: setup {result['setup_s']:.2f}s, {result['throughput_rps']:.1f} req/s{peak}")
+        print(f"  {'':<28}{'calls':>7}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}")
+        print(f"  {'end to end':<28}{result['requests']:>7}{e2e['p50_ms']:>10.2f}{e2e['p90_ms']:>10.2f}{e2e['p99_ms']:>10.2f}")
+        for node, stats in result["nodes"].items():
+            print(f"  {node:<28}{stats['calls']:>7}{stats['p50_ms']:>10.2f}{stats['p90_ms']:>10.2f}{stats['p99_ms']:>10.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""Deterministic stand-ins for the LLM, embedding and search backends used in offline benchmarks.
+
+Every fake can simulate network latency drawn from a seeded log-normal
+distribution with a given median, so runs are reproducible while still
+having a realistic tail.
+"""
+
+import asyncio
+import hashlib
+import math
+import random
+import re
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+_EXPRESSION = re.compile(r"[\d.]+(?:\s*[-+*/]\s*[\d.]+)+")
+_WORD = re.compile(r"\w+")
+
+
+class Latency:
+    """Seeded log-normal latency distribution.
+
+    Args:
+        median: Median latency in seconds, 0 for none
+        sigma: Spread of the underlying normal distribution, 0 for a fixed latency
+        seed: Random seed
+    """
+
+    def __init__(self, median: float = 0.0, sigma: float = 0.0, seed: int = 0):
+        self.median = median
+        self.sigma = sigma
+        self._random = random.Random(seed)
+
+    def sample(self) -> float:
+        if not self.median:
+            return 0.0
+        if not self.sigma:
+            return self.median
+        return self._random.lognormvariate(math.log(self.median), self.sigma)
+
+    def sleep(self) -> None:
+        delay = self.sample()
+        if delay:
+            time.sleep(delay)
+
+    async def asleep(self) -> None:
+        delay = self.sample()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class FakeChatModel(BaseChatModel):
+    """Scripted chat model that answers the prompts used in this repo.
+
+    - The routing prompt gets a category word
+    - The GOOD/BAD evaluation prompt gets GOOD, or BAD for a bad_rate share
+      of questions chosen by a hash of the prompt
+    - With tools bound, the first maths turn requests a calculate call
+    - Anything else gets a fixed answer of answer_words words
+    """
+
+    latency: float = 0.0
+    latency_sigma: float = 0.0
+    seed: int = 0
+    answer_words: int = 50
+    bad_rate: float = 0.0
+    _latency: Latency
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._latency = Latency(self.latency, self.latency_sigma, self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    def bind_tools(self, tools: List[Any], *, tool_choice: Optional[str] = None, **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], tool_choice=tool_choice, **kwargs)
+
+    def _respond(self, messages: List[BaseMessage], **kwargs: Any) -> AIMessage:
+        if isinstance(messages[-1], ToolMessage):
+            return AIMessage(content=f"The answer is {messages[-1].content}.")
+        prompt = messages[-1].content if isinstance(messages[-1].content, str) else ""
+        if "query classifier" in prompt:
+            question = prompt.rsplit("Question:", 1)[-1]
+            return AIMessage(content="maths" if _EXPRESSION.search(question) else "factual")
+        if "Output a single word: GOOD or BAD" in prompt:
+            bad = _fraction(prompt) < self.bad_rate
+            return AIMessage(content="BAD" if bad else "GOOD")
+        if kwargs.get("tools") and kwargs.get("tool_choice") != "none":
+            match = _EXPRESSION.search(prompt)
+            if match and not any(isinstance(m, ToolMessage) for m in messages):
+                return AIMessage(content="", tool_calls=[
+                    {"name": "calculate", "args": {"expression": match.group(0)}, "id": "call_0", "type": "tool_call"}
+                ])
+        return AIMessage(content=" ".join(["answer"] * self.answer_words))
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        self._latency.sleep()
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages, **kwargs))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        await self._latency.asleep()
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages, **kwargs))])
+
+    def _stream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        self._latency.sleep()
+        message = self._respond(messages, **kwargs)
+        if message.tool_calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[
+                {"name": c["name"], "args": str(c["args"]).replace("'", '"'), "id": c["id"], "index": 0}
+                for c in message.tool_calls
+            ]))
+            return
+        for i, word in enumerate(message.content.split(" ")):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else " " + word))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+def _fraction(text: str) -> float:
+    """Map text to a stable number in [0, 1)."""
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "big") / 2 ** 64
+
+
+class FakeEmbeddings(Embeddings):
+    """Hashed bag-of-words embeddings, so texts sharing words are similar.
+
+    Args:
+        size: Vector dimension
+        latency: Latency per embedding request
+    """
+
+    def __init__(self, size: int = 256, latency: Optional[Latency] = None):
+        self.size = size
+        self.latency = latency or Latency()
+        self.model = f"fake-embeddings-{size}"
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.size
+        for word in _WORD.findall(text.lower()):
+            vector[int(_fraction(word) * self.size)] += 1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.latency.sleep()
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.latency.sleep()
+        return self._embed(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        await self.latency.asleep()
+        return [self._embed(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        await self.latency.asleep()
+        return self._embed(text)
+
+
+class FakeSearchTool(Runnable):
+    """Search tool returning Tavily-shaped results derived from the query.
+
+    Args:
+        max_results: Number of results per query
+        content_words: Words of content per result
+        latency: Latency per search
+        raw_content_words: Words of raw page content per result, 0 for none,
+                           like Tavily with include_raw_content
+        duplicate_results: Number of results repeating an earlier result's URL
+    """
+
+    def __init__(
+        self,
+        max_results: int = 5,
+        content_words: int = 120,
+        latency: Optional[Latency] = None,
+        raw_content_words: int = 0,
+        duplicate_results: int = 0,
+    ):
+        self.max_results = max_results
+        self.content_words = content_words
+        self.latency = latency or Latency()
+        self.raw_content_words = raw_content_words
+        self.duplicate_results = duplicate_results
+
+    def _results(self, input: Any) -> List[Dict[str, str]]:
+        query = input if isinstance(input, str) else input["query"]
+        key = hashlib.sha256(query.encode()).hexdigest()[:12]
+        results = []
+        for i in range(self.max_results):
+            page = i if i < self.max_results - self.duplicate_results else i % max(1, self.max_results - self.duplicate_results)
+            result = {
+                "title": f"Result {page} for {query}",
+                "url": f"https://example.com/{key}/{page}" + ("/" if page != i else ""),
+                "content": " ".join([query] + ["content"] * self.content_words),
+                "score": 1.0 - i / self.max_results,
+            }
+            if self.raw_content_words:
+                result["raw_content"] = " ".join([query] + ["page"] * self.raw_content_words)
+            results.append(result)
+        return results
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> List[Dict[str, str]]:
+        self.latency.sleep()
+        return self._results(input)
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> List[Dict[str, str]]:
+        await self.latency.asleep()
+        return self._results(input)
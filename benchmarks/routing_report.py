@@ -0,0 +1,85 @@
+"""Accuracy and latency report for the local query classifier.
+
+Runs the held-out labeled examples, which the classifier is not trained on,
+and the routing cases from tests/test_query_understanding.py through the
+local classifier and, optionally, through the LLM routing chain. Without
+--threshold the threshold calibrated on the held-out examples is used.
+
+Usage:
+    python benchmarks/routing_report.py [--threshold 0.95] [--llm]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from perplexia_ai.week1.classifier import HELD_OUT_EXAMPLES, LocalQueryClassifier
+from tests.test_query_understanding import ROUTING_CASES, TRICKY_ROUTING_CASES
+
+
+def time_call(fn, repeat: int) -> float:
+    """Return the median duration of fn() in seconds."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report local classifier accuracy and latency")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="Confidence threshold for the local classifier, calibrated when omitted")
+    parser.add_argument("--repeat", type=int, default=1000, help="Timing repetitions per question")
+    parser.add_argument("--llm", action="store_true", help="Also time the LLM routing chain (needs OPENAI_API_KEY)")
+    args = parser.parse_args()
+
+    classifier = LocalQueryClassifier.default(args.threshold)
+    routing_chain = None
+    if args.llm:
+        from perplexia_ai.week1.part1 import QueryUnderstandingChat
+        chat = QueryUnderstandingChat()
+        chat.initialize()
+        routing_chain = chat.routing_chain
+
+    cases = HELD_OUT_EXAMPLES + ROUTING_CASES + TRICKY_ROUTING_CASES
+    local_hits = local_correct = 0
+    local_latencies, llm_latencies = [], []
+
+    print(f"{'expected':<12}{'local':<12}{'conf':>6}  {'used':<6}{'local us':>10}{'llm ms':>9}  question")
+    for question, expected in cases:
+        label, confidence = classifier.predict(question)
+        confident = classifier.classify(question) is not None
+        latency = time_call(lambda: classifier.predict(question), args.repeat)
+        local_latencies.append(latency)
+        local_hits += confident
+        local_correct += confident and label == expected
+
+        llm_ms = ""
+        if routing_chain is not None:
+            llm_latency = time_call(lambda: routing_chain.invoke({"question": question}), 1)
+            llm_latencies.append(llm_latency)
+            llm_ms = f"{llm_latency * 1000:.0f}"
+        used = "local" if confident else "llm"
+        print(f"{expected:<12}{label:<12}{confidence:>6.2f}  {used:<6}{latency * 1e6:>10.1f}{llm_ms:>9}  {question}")
+
+    print()
+    print(f"Threshold: {classifier.threshold:.3f}")
+    held_out = classifier.evaluate(HELD_OUT_EXAMPLES)
+    print(f"Held-out examples: {held_out['coverage']:.0%} answered locally, {held_out['precision']:.0%} of those correct")
+    print(f"Coverage: {local_hits}/{len(cases)} questions answered locally")
+    if local_hits:
+        print(f"Accuracy when confident: {local_correct}/{local_hits} ({local_correct / local_hits:.0%})")
+    print(f"Local classifier median latency: {statistics.median(local_latencies) * 1e6:.1f} us")
+    if llm_latencies:
+        print(f"LLM routing median latency: {statistics.median(llm_latencies) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Per-request memory of web search results with and without lean normalization.
+
+Runs WebSearchChat over fake search results with repeated URLs, once as
+before, with the raw page content Tavily returns for include_raw_content,
+and once in lean mode, without raw content and through the normalizer.
+Reported per mode: the JSON size of the search results held in graph state,
+the peak memory traced while a request runs, and the bytes held by the
+search cache.
+
+Usage:
+    python benchmarks/search_payload.py [--requests 50] [--raw-content-words 3000] [--payload-bytes 16384]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tracemalloc
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from benchmarks.fakes import FakeChatModel, FakeSearchTool
+from perplexia_ai.core.search_results import payload_bytes
+from perplexia_ai.week2.part1 import WebSearchChat
+
+
+def run_mode(args: argparse.Namespace, lean: bool) -> dict:
+    """Send requests through WebSearchChat, measuring the search payload of each."""
+    chat = WebSearchChat()
+    chat.initialize(
+        llm=FakeChatModel(answer_words=50),
+        search_tool=FakeSearchTool(
+            max_results=args.max_results,
+            content_words=args.content_words,
+            # Lean mode asks Tavily not to send raw page content
+            raw_content_words=0 if lean else args.raw_content_words,
+            duplicate_results=args.duplicates,
+        ),
+        lean_search=lean,
+        search_payload_bytes=args.payload_bytes,
+    )
+    state_bytes, peaks = [], []
+    tracemalloc.start()
+    for i in range(args.requests):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        state = chat.graph.invoke({"query": f"What happened in the news today? ({i})"})
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+        state_bytes.append(payload_bytes(state["search_results"]))
+        results = len(state["search_results"])
+        del state
+    tracemalloc.stop()
+    return {
+        "results_per_request": results,
+        "state_bytes": statistics.fmean(state_bytes),
+        "peak_bytes": statistics.fmean(peaks),
+        "cache_bytes": chat.search_tool.cache.stats["bytes"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare search result memory with and without lean normalization")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per mode, each a distinct query")
+    parser.add_argument("--max-results", type=int, default=5, help="Results returned per search")
+    parser.add_argument("--content-words", type=int, default=120, help="Words of content per result")
+    parser.add_argument("--raw-content-words", type=int, default=3000, help="Words of raw page content per result")
+    parser.add_argument("--duplicates", type=int, default=1, help="Results per search repeating an earlier URL")
+    parser.add_argument("--payload-bytes", type=int, default=16384, help="Lean payload budget per request")
+    args = parser.parse_args()
+
+    raw, lean = run_mode(args, lean=False), run_mode(args, lean=True)
+    print(f"{'':<28}{'raw':>12}{'lean':>12}{'saved':>9}")
+    for label, key in (("search results in state", "state_bytes"), ("peak traced per request", "peak_bytes"),
+                       ("search cache", "cache_bytes")):
+        saved = 1 - lean[key] / raw[key] if raw[key] else 0.0
+        print(f"{label:<28}{raw[key] / 1024:>10.1f}Ki{lean[key] / 1024:>10.1f}Ki{saved:>9.0%}")
+    print(f"{'results per request':<28}{raw['results_per_request']:>12}{lean['results_per_request']:>12}")
+
+
+if __name__ == "__main__":
+    main()
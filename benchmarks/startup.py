@@ -0,0 +1,97 @@
+"""Startup cost of every mode in run.py.
+
+Each mode is measured in a fresh interpreter, since import costs are only
+paid once per process:
+
+- import: importing perplexia_ai.app plus the selected mode's implementation
+- ready: import plus initialize(), i.e. the time until the first request
+  could be served (needs API keys, and network for the document modes)
+
+The number of loaded modules and whether the heavy dependencies were pulled
+in are reported alongside, so an eager import creeping back shows up.
+
+Usage:
+    python benchmarks/startup.py [--repeat 3] [--ready] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from perplexia_ai.core.registry import MODES
+
+HEAVY_MODULES = ["langchain_community", "langchain_openai", "langgraph", "langchain_text_splitters", "pypdf"]
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import perplexia_ai.app
+from perplexia_ai.core.registry import create_chat_implementation
+chat = create_chat_implementation({week}, {mode!r})
+imported = time.perf_counter() - start
+ready, error = None, None
+if {ready}:
+    try:
+        chat.initialize()
+        ready = time.perf_counter() - start
+    except Exception as e:
+        error = f"{{type(e).__name__}}: {{e}}"[:120]
+print(json.dumps({{
+    "import": imported,
+    "ready": ready,
+    "error": error,
+    "modules": len(sys.modules),
+    "heavy": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+def measure(week: int, mode: str, ready: bool) -> dict:
+    """Run one cold start of a mode in a subprocess and return its timings."""
+    code = CHILD.format(week=week, mode=mode, ready=ready, heavy=HEAVY_MODULES)
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=project_root, capture_output=True, text=True, check=True,
+        env={**os.environ, "PYTHONPATH": project_root},
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time and time-to-ready of each mode")
+    parser.add_argument("--repeat", type=int, default=3, help="Cold starts per mode")
+    parser.add_argument("--ready", action="store_true", help="Also run initialize() and report time-to-ready")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    for week, mode in MODES:
+        runs = [measure(week, mode, args.ready) for _ in range(args.repeat)]
+        ready = [run["ready"] for run in runs if run["ready"] is not None]
+        results[f"week{week}/{mode}"] = {
+            "import_s": statistics.median(run["import"] for run in runs),
+            "ready_s": statistics.median(ready) if ready else None,
+            "error": next((run["error"] for run in runs if run["error"]), None),
+            "modules": runs[-1]["modules"],
+            "heavy": runs[-1]["heavy"],
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'mode':<14}{'import ms':>11}{'ready ms':>10}{'modules':>9}  heavy dependencies")
+    for name, result in results.items():
+        ready = f"{result['ready_s'] * 1e3:.0f}" if result["ready_s"] is not None else "-"
+        print(f"{name:<14}{result['import_s'] * 1e3:>11.0f}{ready:>10}{result['modules']:>9}  {', '.join(result['heavy']) or '-'}")
+        if result["error"]:
+            print(f"{'':<14}initialize failed: {result['error']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""Batch question answering over JSONL files.
+
+Runs every question of a JSONL file through a ChatInterface implementation
+with a bounded number of requests in flight, and appends one result line
+per question to an output JSONL file as soon as it is answered. Questions
+whose id already has a successful result in the output are skipped, so an
+interrupted run picks up where it stopped when started again.
+
+Input lines need a "question" and may have an "id" (the line number is used
+otherwise) and a "chat_history" in the Gradio message format. Ids must be
+unique, since results are matched to questions by id. Output lines
+hold the id, question, answer, sources, latency and, for failures, the error.
+"""
+
+import asyncio
+import json
+import os
+import re
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from perplexia_ai.core.chat_interface import ChatInterface
+
+_SOURCES = re.compile(r"\n\s*SOURCES:\s*\n")
+_NUMBERING = re.compile(r"^\d+\.\s*")
+
+
+def split_sources(response: str) -> Tuple[str, List[str]]:
+    """Split a response into the answer and the sources listed after "SOURCES:"."""
+    parts = _SOURCES.split(response, maxsplit=1)
+    if len(parts) == 1:
+        return response, []
+    sources = [_NUMBERING.sub("", line.strip()) for line in parts[1].splitlines()]
+    return parts[0].rstrip(), [source for source in sources if source]
+
+
+def read_questions(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the questions of a JSONL file, giving lines without an id their line number.
+
+    Raises:
+        ValueError: If a line has no question, or an id that an earlier line already has
+    """
+    seen: Dict[str, int] = {}
+    with open(path) as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if "question" not in row:
+                raise ValueError(f"{path}:{line_number}: missing 'question'")
+            row.setdefault("id", line_number)
+            # Ids are compared as strings, the way results are matched on resume
+            if str(row["id"]) in seen:
+                raise ValueError(f"{path}:{line_number}: duplicate id {row['id']!r}, first used on line {seen[str(row['id'])]}")
+            seen[str(row["id"])] = line_number
+            yield row
+
+
+def completed_ids(path: str, retry_errors: bool = True) -> Set[str]:
+    """Ids that already have a result in an output file.
+
+    Args:
+        path: Output JSONL file of an earlier run, which may not exist
+        retry_errors: Leave failed questions out so they are run again
+
+    Returns:
+        Set[str]: The completed ids, as strings
+    """
+    done: Set[str] = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by an interrupted run
+                continue
+            if not (retry_errors and row.get("error")):
+                done.add(str(row["id"]))
+    return done
+
+
+@dataclass
+class BatchReport:
+    """Outcome of a batch run."""
+
+    total: int = 0
+    skipped: int = 0
+    answered: int = 0
+    failed: int = 0
+    elapsed_s: float = 0.0
+    latencies: List[float] = field(default_factory=list, repr=False)
+
+    @property
+    def throughput(self) -> float:
+        """Questions run per second, answered or failed."""
+        return (self.answered + self.failed) / self.elapsed_s if self.elapsed_s else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+        summary = {
+            "total": self.total,
+            "skipped": self.skipped,
+            "answered": self.answered,
+            "failed": self.failed,
+            "elapsed_s": round(self.elapsed_s, 3),
+            "throughput_qps": round(self.throughput, 3),
+        }
+        if ordered:
+            summary.update({
+                "latency_mean_s": round(statistics.fmean(ordered), 3),
+                **{f"latency_p{q}_s": round(ordered[min(len(ordered) - 1, len(ordered) * q // 100)], 3)
+                   for q in (50, 90, 99)},
+            })
+        return summary
+
+
+async def _answer(chat: ChatInterface, row: Dict[str, Any], timeout: Optional[float]) -> Dict[str, Any]:
+    """Answer one question, turning failures into an error result."""
+    result = {"id": row["id"], "question": row["question"]}
+    start = time.perf_counter()
+    try:
+        response = await asyncio.wait_for(chat.aprocess_message(row["question"], row.get("chat_history"), str(row["id"])), timeout)
+        result["answer"], result["sources"] = split_sources(response)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["latency_s"] = round(time.perf_counter() - start, 4)
+    return result
+
+
+async def arun_batch(
+    chat: ChatInterface,
+    input_path: str,
+    output_path: str,
+    concurrency: int = 8,
+    timeout: Optional[float] = None,
+    retry_errors: bool = True,
+    progress_every: int = 100,
+) -> BatchReport:
+    """Answer the questions of a JSONL file with a bounded number in flight.
+
+    Implementations without a native async path run process_message in the
+    running loop's default executor, which run_batch sizes to concurrency.
+
+    Args:
+        chat: An initialized chat implementation
+        input_path: JSONL file of questions
+        output_path: JSONL file results are appended to
+        concurrency: Maximum number of questions in flight
+        timeout: Optional time limit per question in seconds
+        retry_errors: Run questions again whose earlier result was an error
+        progress_every: Print progress after this many results, 0 for never
+
+    Returns:
+        BatchReport: Counts, wall time and per-question latencies
+
+    Raises:
+        ValueError: If the input has a line without a question or a duplicate id
+    """
+    done = completed_ids(output_path, retry_errors)
+    report = BatchReport()
+    pending = []
+    for row in read_questions(input_path):
+        report.total += 1
+        if str(row["id"]) in done:
+            report.skipped += 1
+        else:
+            pending.append(row)
+
+    rows = iter(pending)
+    start = time.perf_counter()
+    with open(output_path, "a") as output:
+        async def worker() -> None:
+            for row in rows:
+                result = await _answer(chat, row, timeout)
+                output.write(json.dumps(result) + "\n")
+                output.flush()
+                if "error" in result:
+                    report.failed += 1
+                else:
+                    report.answered += 1
+                    report.latencies.append(result["latency_s"])
+                finished = report.answered + report.failed
+                if progress_every and finished % progress_every == 0:
+                    elapsed = time.perf_counter() - start
+                    print(f"{finished}/{len(pending)} done, {report.failed} failed, {finished / elapsed:.2f} q/s")
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    report.elapsed_s = time.perf_counter() - start
+    return report
+
+
+def run_batch(chat: ChatInterface, input_path: str, output_path: str, concurrency: int = 8, **kwargs: Any) -> BatchReport:
+    """Synchronous wrapper around arun_batch, in an event loop of its own.
+
+    The loop's default executor, used by implementations without a native
+    async path, gets one thread per question in flight; asyncio.run shuts it
+    down when the batch is done.
+    """
+    async def main() -> BatchReport:
+        executor = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="batch")
+        asyncio.get_running_loop().set_default_executor(executor)
+        return await arun_batch(chat, input_path, output_path, concurrency=concurrency, **kwargs)
+
+    return asyncio.run(main())
@@ -0,0 +1,178 @@
+"""BM25 lexical retrieval over a precomputed inverted index.
+
+Embedding similarity needs a network call per query and tends to miss exact
+terms such as fiscal years, program names and metric ids. The inverted index
+built here is scored entirely locally: postings are stored in compact CSR
+arrays (term -> chunk positions) with the BM25 weight of every posting
+precomputed at ingest time, so a query is a handful of vectorised adds.
+"""
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+_TOKEN = re.compile(r"\w+(?:[.\-]\w+)*")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase and split text into terms, keeping ids like 'fy2022' or '1.2a' intact."""
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """Inverted index with precomputed BM25 posting weights.
+
+    Args:
+        k1: Term frequency saturation
+        b: Document length normalisation
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.vocabulary: Dict[str, int] = {}
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.postings = np.zeros(0, dtype=np.int32)
+        self.weights = np.zeros(0, dtype=np.float32)
+        self.ids: List[str] = []
+        self.documents: List[Document] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_documents(cls, documents: Sequence[Document], k1: float = 1.5, b: float = 0.75) -> "BM25Index":
+        """Tokenize the documents and build the index.
+
+        Args:
+            documents: Chunks to index, each with an id
+            k1: Term frequency saturation
+            b: Document length normalisation
+
+        Returns:
+            BM25Index: The built index
+        """
+        index = cls(k1=k1, b=b)
+        index.documents = list(documents)
+        index.ids = [doc.id for doc in index.documents]
+
+        term_docs: Dict[str, List[Tuple[int, int]]] = {}
+        lengths = np.zeros(len(index.documents), dtype=np.float32)
+        for position, doc in enumerate(index.documents):
+            terms = tokenize(doc.page_content)
+            lengths[position] = len(terms)
+            counts: Dict[str, int] = {}
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+            for term, count in counts.items():
+                term_docs.setdefault(term, []).append((position, count))
+
+        n_docs = max(len(index.documents), 1)
+        average_length = float(lengths.mean()) if len(lengths) else 0.0
+        norms = index.k1 * (1 - index.b + index.b * lengths / (average_length or 1.0))
+
+        indptr = [0]
+        postings, weights = [], []
+        for term_id, (term, docs) in enumerate(sorted(term_docs.items())):
+            index.vocabulary[term] = term_id
+            positions = np.fromiter((p for p, _ in docs), dtype=np.int32, count=len(docs))
+            tf = np.fromiter((c for _, c in docs), dtype=np.float32, count=len(docs))
+            idf = np.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            postings.append(positions)
+            weights.append((idf * tf * (index.k1 + 1) / (tf + norms[positions])).astype(np.float32))
+            indptr.append(indptr[-1] + len(docs))
+
+        index.indptr = np.asarray(indptr, dtype=np.int64)
+        index.postings = np.concatenate(postings) if postings else np.zeros(0, dtype=np.int32)
+        index.weights = np.concatenate(weights) if weights else np.zeros(0, dtype=np.float32)
+        return index
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[Document, float]]:
+        """Return the k best-scoring documents for a query.
+
+        Args:
+            query: The search query
+            k: Number of documents to return
+
+        Returns:
+            List[Tuple[Document, float]]: Documents with a positive score and their BM25 score
+        """
+        if not self.ids:
+            return []
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for term in set(tokenize(query)):
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            # A term has at most one posting per document, so plain fancy-index adds are safe
+            scores[self.postings[start:end]] += self.weights[start:end]
+        k = min(k, int(np.count_nonzero(scores)))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.documents[i], float(scores[i])) for i in top]
+
+    def save(self, path: str) -> None:
+        """Persist the index arrays and vocabulary next to the chunks in an index directory."""
+        directory = Path(path)
+        directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = directory / ".bm25.npz.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, indptr=self.indptr, postings=self.postings, weights=self.weights)
+        os.replace(tmp_path, directory / "bm25.npz")
+        tmp_path = directory / ".bm25.json.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"k1": self.k1, "b": self.b, "ids": self.ids, "vocabulary": self.vocabulary}, f)
+        os.replace(tmp_path, directory / "bm25.json")
+
+    @classmethod
+    def load(cls, path: str, documents: Sequence[Document]) -> Optional["BM25Index"]:
+        """Load a saved index for the given chunks.
+
+        Args:
+            path: Index directory
+            documents: The chunks the index was built from, in index order
+
+        Returns:
+            Optional[BM25Index]: The index, or None if it is missing or was built
+                                 from different chunks
+        """
+        directory = Path(path)
+        if not (directory / "bm25.json").exists():
+            return None
+        with open(directory / "bm25.json") as f:
+            meta = json.load(f)
+        if meta["ids"] != [doc.id for doc in documents]:
+            return None
+        index = cls(k1=meta["k1"], b=meta["b"])
+        index.vocabulary = meta["vocabulary"]
+        index.ids = meta["ids"]
+        index.documents = list(documents)
+        with np.load(directory / "bm25.npz") as arrays:
+            index.indptr = arrays["indptr"]
+            index.postings = arrays["postings"]
+            index.weights = arrays["weights"]
+        return index
+
+
+class BM25Retriever(BaseRetriever):
+    """Retriever over a BM25Index, needing no network calls."""
+
+    index: Any
+    k: int = 5
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return [doc for doc, _ in self.index.search(query, self.k)]
@@ -1,5 +1,6 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, Iterator, List, Optional
 
 class ChatInterface(ABC):
     """Abstract base class defining the core chat interface functionality.
@@ -20,7 +21,7 @@ class ChatInterface(ABC):
         pass
     
     @abstractmethod
-    def process_message(self, message: str, chat_history: List[Dict[str, str]]) -> str:
+    def process_message(self, message: str, chat_history: List[Dict[str, str]], session_id: Optional[str] = None) -> str:
         """Process a message and return a response.
         
         This is the core method that all implementations must define. Different
@@ -33,8 +34,60 @@ class ChatInterface(ABC):
             message: The user's input message
             chat_history: Optional list of previous chat messages, where each message
                          is a dict with 'role' (user/assistant) and 'content' keys
+            session_id: Optional id of the conversation, such as Gradio's session
+                        hash, for implementations that keep per-session state
             
         Returns:
             str: The assistant's response
         """
-        pass 
\ No newline at end of file
+        pass
+    
+    async def aprocess_message(self, message: str, chat_history: Optional[List[Dict[str, str]]] = None, session_id: Optional[str] = None) -> str:
+        """Asynchronously process a message and return a response.
+        
+        Implementations should override this with a native async path so that
+        a single server process can hold many conversations concurrently. The
+        default runs process_message in a worker thread.
+        
+        Args:
+            message: The user's input message
+            chat_history: Optional list of previous chat messages, where each message
+                         is a dict with 'role' (user/assistant) and 'content' keys
+            session_id: Optional id of the conversation, such as Gradio's session
+                        hash, for implementations that keep per-session state
+            
+        Returns:
+            str: The assistant's response
+        """
+        return await asyncio.to_thread(self.process_message, message, chat_history, session_id)
+    
+    def stream_message(self, message: str, chat_history: Optional[List[Dict[str, str]]] = None, session_id: Optional[str] = None) -> Iterator[str]:
+        """Process a message and yield the response as it is generated.
+        
+        Implementations that can stream LLM tokens should override this so the
+        UI can render the answer incrementally. Joining all yielded chunks
+        gives the same text as process_message. The default yields the whole
+        response at once.
+        
+        Args:
+            message: The user's input message
+            chat_history: Optional list of previous chat messages
+            session_id: Optional id of the conversation
+            
+        Yields:
+            str: Successive chunks of the response
+        """
+        yield self.process_message(message, chat_history, session_id)
+    
+    async def astream_message(self, message: str, chat_history: Optional[List[Dict[str, str]]] = None, session_id: Optional[str] = None) -> AsyncIterator[str]:
+        """Async version of stream_message.
+        
+        Args:
+            message: The user's input message
+            chat_history: Optional list of previous chat messages
+            session_id: Optional id of the conversation
+            
+        Yields:
+            str: Successive chunks of the response
+        """
+        yield await self.aprocess_message(message, chat_history, session_id)
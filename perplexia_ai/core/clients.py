@@ -0,0 +1,246 @@
+"""Process-wide registry of pooled model, embedding and search clients.
+
+Every chat implementation used to build its own ChatOpenAI, OpenAIEmbeddings
+and TavilySearchResults, each with its own HTTP connections; the Tavily
+wrapper even opens a new connection per search. With several modes in one
+process that means extra TCP and TLS handshakes in the tail latency.
+
+``ClientRegistry`` hands out shared clients that all go through one
+keep-alive connection pool per API host, configured once with pool limits
+and timeouts. Every request is counted, together with the new connections
+and TLS handshakes it needed and the time it took to get a connection, and
+``stats`` reports how busy each pool is.
+
+Async httpx connections belong to the event loop that opened them, so each
+event loop gets its own async connection pool behind the shared async
+clients, and ``asyncio.run`` may be called any number of times.
+
+httpx, langchain_openai and the Tavily wrapper are imported on first use, so
+importing this module stays cheap for modes that bring their own models.
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from perplexia_ai.core.tracing import Metrics
+
+
+@dataclass(frozen=True)
+class ClientConfig:
+    """Connection pool and timeout settings shared by all clients.
+
+    Args:
+        max_connections: Most connections open per API host
+        max_keepalive_connections: Most idle connections kept open per API host
+        keepalive_expiry: Seconds an idle connection is kept open
+        connect_timeout: Seconds to establish a connection
+        read_timeout: Seconds to wait for response data
+        pool_timeout: Seconds to wait for a free connection from the pool
+        max_retries: Retries of failed OpenAI requests
+    """
+
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    connect_timeout: float = 5.0
+    read_timeout: float = 60.0
+    pool_timeout: float = 10.0
+    max_retries: int = 2
+
+    @property
+    def limits(self) -> "httpx.Limits":
+        import httpx
+
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    @property
+    def timeout(self) -> "httpx.Timeout":
+        import httpx
+
+        return httpx.Timeout(
+            connect=self.connect_timeout,
+            read=self.read_timeout,
+            write=self.read_timeout,
+            pool=self.pool_timeout,
+        )
+
+
+def _key(kind: str, kwargs: Dict[str, Any]) -> Tuple:
+    return (kind, tuple(sorted((name, repr(value)) for name, value in kwargs.items())))
+
+
+class ClientRegistry:
+    """Shared LLM, embedding and search clients on pooled keep-alive connections.
+
+    Clients are created on first use and cached by their arguments, so every
+    implementation asking for the same model gets the same instance.
+
+    Args:
+        config: Pool limits and timeouts for all clients
+        metrics: Metrics to count requests in, e.g. a Tracer's, defaults to new ones
+    """
+
+    def __init__(self, config: Optional[ClientConfig] = None, metrics: Optional[Metrics] = None):
+        self.config = config or ClientConfig()
+        self.metrics = metrics or Metrics()
+        self._pools: Dict[str, Tuple["httpx.Client", "LoopLocalAsyncClient"]] = {}
+        # Per pool and kind, the request stats and a function listing the live transports
+        self._transports: Dict[str, Dict[str, Tuple["PoolStats", Callable[[], List[Any]]]]] = {}
+        self._clients: Dict[Tuple, Any] = {}
+        self._lock = threading.RLock()
+
+    def _pool(self, name: str) -> Tuple["httpx.Client", "LoopLocalAsyncClient"]:
+        """Return the sync and async httpx clients of a pool, creating them on first use.
+
+        Sync requests and the async requests of every event loop use separate
+        transports, each with the configured limits.
+        """
+        with self._lock:
+            if name not in self._pools:
+                import httpx
+                from perplexia_ai.core.pooling import (
+                    AsyncInstrumentedTransport, InstrumentedTransport, LoopLocalAsyncClient, PoolStats,
+                )
+
+                limits, timeout = self.config.limits, self.config.timeout
+                sync_stats, async_stats = PoolStats(name, self.metrics), PoolStats(name, self.metrics)
+                sync_transport = InstrumentedTransport(sync_stats, limits=limits)
+                async_client = LoopLocalAsyncClient(
+                    lambda: httpx.AsyncClient(transport=AsyncInstrumentedTransport(async_stats, limits=limits),
+                                              timeout=timeout),
+                    timeout=timeout,
+                )
+                self._pools[name] = (httpx.Client(transport=sync_transport, timeout=timeout), async_client)
+                self._transports[name] = {
+                    "sync": (sync_stats, lambda: [sync_transport]),
+                    # httpx keeps the transport of a client in _transport
+                    "async": (async_stats, lambda: [client._transport for client in async_client.clients()]),
+                }
+            return self._pools[name]
+
+    def http_client(self, name: str) -> "httpx.Client":
+        """The shared synchronous httpx client of a named pool."""
+        return self._pool(name)[0]
+
+    def async_http_client(self, name: str) -> "LoopLocalAsyncClient":
+        """The shared asynchronous httpx client of a named pool, usable from any event loop."""
+        return self._pool(name)[1]
+
+    def _cached(self, kind: str, kwargs: Dict[str, Any], create: Callable[[], Any]) -> Any:
+        key = _key(kind, kwargs)
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = create()
+            return self._clients[key]
+
+    def chat_model(self, model: str = "gpt-4o-mini", **kwargs: Any) -> "ChatOpenAI":
+        """A shared OpenAI chat model, e.g. chat_model("gpt-4o-mini", temperature=0.1)."""
+        from langchain_openai import ChatOpenAI
+
+        client, async_client = self._pool("openai")
+        return self._cached("chat_model", {"model": model, **kwargs}, lambda: ChatOpenAI(
+            model=model,
+            http_client=client,
+            http_async_client=async_client,
+            timeout=self.config.timeout,
+            max_retries=self.config.max_retries,
+            **kwargs,
+        ))
+
+    def embeddings(self, **kwargs: Any) -> "OpenAIEmbeddings":
+        """Shared OpenAI embeddings, using the same connection pool as the chat models."""
+        from langchain_openai import OpenAIEmbeddings
+
+        client, async_client = self._pool("openai")
+        return self._cached("embeddings", kwargs, lambda: OpenAIEmbeddings(
+            http_client=client,
+            http_async_client=async_client,
+            timeout=self.config.timeout,
+            max_retries=self.config.max_retries,
+            **kwargs,
+        ))
+
+    def search_tool(self, **kwargs: Any) -> "TavilySearchResults":
+        """A shared Tavily search tool, e.g. search_tool(max_results=5, search_depth="advanced")."""
+        # Imported here so modes without web search do not load langchain_community
+        from langchain_community.tools import TavilySearchResults
+        from perplexia_ai.tools.tavily import PooledTavilySearchAPIWrapper
+
+        client, async_client = self._pool("tavily")
+        return self._cached("search_tool", kwargs, lambda: TavilySearchResults(
+            api_wrapper=PooledTavilySearchAPIWrapper(client, async_client),
+            **kwargs,
+        ))
+
+    def stats(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Utilization of every pool's sync and async transports.
+
+        Connections of the async transports are summed over the event loops
+        that are still open.
+
+        Returns:
+            Dict: For each pool, sync and async, the requests in flight and their
+                  peak, the open, busy and idle connections, and the peak share
+                  of max_connections in use
+        """
+        with self._lock:
+            transports = {name: dict(by_kind) for name, by_kind in self._transports.items()}
+        stats = {}
+        for name, by_kind in transports.items():
+            stats[name] = {}
+            for kind, (pool_stats, live_transports) in by_kind.items():
+                # httpx keeps the httpcore connection pool of a transport in _pool
+                connections = [connection for transport in live_transports()
+                               for connection in getattr(getattr(transport, "_pool", None), "connections", [])]
+                busy = sum(not connection.is_idle() for connection in connections)
+                stats[name][kind] = {
+                    "in_flight": pool_stats.in_flight,
+                    "peak_in_flight": pool_stats.peak_in_flight,
+                    "open_connections": len(connections),
+                    "busy_connections": busy,
+                    "idle_connections": len(connections) - busy,
+                    "peak_utilization": min(1.0, pool_stats.peak_in_flight / self.config.max_connections),
+                }
+        return stats
+
+    def close(self) -> None:
+        """Close the synchronous connections and forget all clients.
+
+        Async clients are left to be closed by their event loop, or the process exit.
+        """
+        with self._lock:
+            for client, _ in self._pools.values():
+                client.close()
+            self._pools.clear()
+            self._transports.clear()
+            self._clients.clear()
+
+
+_registry: Optional[ClientRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_clients() -> ClientRegistry:
+    """Return the process-wide client registry, creating it with default settings on first use."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ClientRegistry()
+        return _registry
+
+
+def configure_clients(config: Optional[ClientConfig] = None, metrics: Optional[Metrics] = None) -> ClientRegistry:
+    """Replace the process-wide client registry, e.g. with other pool limits.
+
+    Call it before creating any chat implementation: clients already handed
+    out keep using the previous registry's pools.
+    """
+    global _registry
+    with _registry_lock:
+        _registry = ClientRegistry(config, metrics)
+        return _registry
@@ -0,0 +1,162 @@
+"""Token-budgeted context packing for RAG prompts.
+
+Retrieved chunks overlap their neighbours by up to 200 characters, carry a
+large PDF metadata dict and web results can be arbitrarily long. Sending all
+of that makes every evaluation and generation call slower and more expensive.
+``pack_context`` turns ranked documents into a compact prompt context:
+
+- chunks from the same source and page whose text overlaps are merged
+- passages that are near-duplicates of a better-ranked one are dropped
+- every passage gets a short citation label such as "[1] report.pdf p. 3"
+- passages are added best first until the token budget is used up
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Set
+from urllib.parse import urlparse
+
+from langchain_core.documents import Document
+
+from perplexia_ai.core.embedding_pipeline import estimate_tokens
+
+# Longest overlap looked for between neighbouring chunks, a little over the splitter's chunk_overlap
+MAX_MERGE_OVERLAP = 400
+# Passages that would have to be cut shorter than this are left out instead
+MIN_PASSAGE_CHARS = 200
+# Overlap probe length: the start of the next chunk looked up in the tail of the previous one
+_PROBE = 32
+_WORD = re.compile(r"\w+")
+
+
+@dataclass
+class Passage:
+    """A span of text from one source, with its retrieval rank."""
+
+    text: str
+    source: str
+    page: Optional[int]
+    rank: int
+    metadata: dict = field(default_factory=dict)
+
+    @property
+    def label(self) -> str:
+        """Short human-readable citation for the passage."""
+        if self.source.startswith(("http://", "https://")):
+            parsed = urlparse(self.source)
+            return f"{parsed.netloc}{parsed.path}".rstrip("/")
+        name = os.path.basename(self.source) or self.source
+        return f"{name} p. {self.page + 1}" if self.page is not None else name
+
+
+@dataclass
+class PackedContext:
+    """The packed prompt context and the documents it cites, in citation order."""
+
+    text: str
+    docs: List[Document]
+    tokens: int
+
+
+def _overlap(previous: str, following: str) -> int:
+    """Length of the longest suffix of previous that is a prefix of following."""
+    probe = following[:_PROBE]
+    if not probe:
+        return 0
+    window_start = max(0, len(previous) - MAX_MERGE_OVERLAP)
+    position = previous.find(probe, window_start)
+    while position != -1:
+        overlap = len(previous) - position
+        if following.startswith(previous[position:]) and overlap <= len(following):
+            return overlap
+        position = previous.find(probe, position + 1)
+    return 0
+
+
+def _shingles(text: str, size: int = 5) -> Set[int]:
+    words = _WORD.findall(text.lower())
+    if len(words) < size:
+        return {hash(" ".join(words))}
+    return {hash(" ".join(words[i:i + size])) for i in range(len(words) - size + 1)}
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    """Cut text to at most max_chars at a word boundary, marking the cut."""
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars - 4]
+    space = cut.rfind(" ")
+    return (cut[:space] if space > len(cut) // 2 else cut).rstrip() + " ..."
+
+
+def to_passages(docs: Sequence[Document]) -> List[Passage]:
+    """Convert ranked documents into passages, merging overlapping chunks of the same page."""
+    passages: List[Passage] = []
+    for rank, doc in enumerate(docs):
+        source = str(doc.metadata.get("source", ""))
+        page = doc.metadata.get("page")
+        passage = Passage(doc.page_content, source, page, rank, doc.metadata)
+        for other in passages:
+            if other.source != source or other.page != page:
+                continue
+            if (overlap := _overlap(other.text, passage.text)):
+                other.text += passage.text[overlap:]
+            elif (overlap := _overlap(passage.text, other.text)):
+                other.text = passage.text + other.text[overlap:]
+            elif passage.text in other.text:
+                pass
+            else:
+                continue
+            other.rank = min(other.rank, rank)
+            break
+        else:
+            passages.append(passage)
+    return passages
+
+
+def pack_context(
+    docs: Sequence[Document],
+    token_budget: int = 1500,
+    max_passage_tokens: int = 600,
+    duplicate_threshold: float = 0.8,
+) -> PackedContext:
+    """Build a compact, cited prompt context from ranked documents.
+
+    Args:
+        docs: Retrieved documents or web results, best first
+        token_budget: Approximate maximum number of tokens of context
+        max_passage_tokens: Longest a single passage may be before it is trimmed
+        duplicate_threshold: Word 5-gram Jaccard similarity above which a passage
+                             is dropped as a near-duplicate of a better one
+
+    Returns:
+        PackedContext: The context text, the cited documents and its token estimate
+    """
+    passages = sorted(to_passages(docs), key=lambda passage: passage.rank)
+
+    kept: List[Passage] = []
+    kept_shingles: List[Set[int]] = []
+    for passage in passages:
+        shingles = _shingles(passage.text)
+        if any(len(shingles & other) / len(shingles | other) >= duplicate_threshold for other in kept_shingles):
+            continue
+        kept.append(passage)
+        kept_shingles.append(shingles)
+
+    # Budgets are tracked in characters, at the same four characters per token as estimate_tokens
+    blocks: List[str] = []
+    cited: List[Document] = []
+    used = 0
+    for passage in kept:
+        header = f"[{len(blocks) + 1}] {passage.label}\n"
+        separator = 2 if blocks else 0
+        remaining = min(max_passage_tokens * 4, token_budget * 4 - used - separator - len(header))
+        if remaining < MIN_PASSAGE_CHARS:
+            break
+        text = _truncate(passage.text, remaining)
+        blocks.append(header + text)
+        cited.append(Document(page_content=text, metadata=passage.metadata))
+        used += separator + len(blocks[-1])
+    text = "\n\n".join(blocks)
+    return PackedContext(text=text, docs=cited, tokens=estimate_tokens(text))
@@ -0,0 +1,227 @@
+"""Batched, concurrent and rate-limited embedding for index builds.
+
+``BatchedEmbeddings`` wraps any embedding model and controls how documents
+reach the provider: texts are split into batches, a bounded number of
+batches are in flight at once, a token bucket keeps requests and tokens per
+minute under the provider's limits, and batches that failed on a rate
+limit, timeout or connection error are retried with exponential backoff.
+Progress and throughput are reported after every batch.
+
+Query embeddings are only throttled: a chat request waiting on one should
+fail fast, so it is left to the client's own retries.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple, Type
+
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at a constant rate.
+
+    Args:
+        rate: Tokens added per second
+        capacity: Maximum number of tokens the bucket holds
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until the requested tokens are available.
+
+        Requests larger than the capacity are allowed once the bucket is full,
+        so an oversized batch slows the pipeline down rather than deadlocking it.
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        tokens = min(tokens, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+@dataclass
+class EmbeddingProgress:
+    """Progress of an embed_documents call, passed to the progress callback."""
+    batches_done: int
+    batches_total: int
+    texts_done: int
+    texts_total: int
+    retries: int
+    elapsed: float
+
+    @property
+    def texts_per_second(self) -> float:
+        return self.texts_done / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def transient_errors() -> Tuple[Type[BaseException], ...]:
+    """Errors worth retrying: rate limits, timeouts and broken connections.
+
+    Anything else, such as an authentication failure or a bad request, would
+    fail again the same way.
+    """
+    # Imported here so importing the pipeline stays cheap
+    import httpx
+    import openai
+
+    return (
+        openai.RateLimitError,
+        openai.APIConnectionError,  # includes openai.APITimeoutError
+        httpx.TimeoutException,
+        httpx.NetworkError,
+        TimeoutError,
+        ConnectionError,
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for rate limiting, about four characters per token."""
+    return max(1, len(text) // 4)
+
+
+class BatchedEmbeddings(Embeddings):
+    """Embedding wrapper with batching, bounded concurrency, rate limits and retries.
+
+    Args:
+        embeddings: The underlying embedding model
+        batch_size: Number of texts sent per request
+        max_concurrency: Maximum number of batches in flight at once
+        requests_per_minute: Request rate limit, or None for no limit
+        tokens_per_minute: Token rate limit, or None for no limit
+        max_retries: Attempts per batch after the first failure
+        initial_backoff: Delay before the first retry, in seconds
+        max_backoff: Upper bound for the retry delay, in seconds
+        retry_on: Exception types that trigger a retry, defaults to transient_errors()
+        progress: Callback invoked after each completed batch
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        batch_size: int = 256,
+        max_concurrency: int = 4,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_retries: int = 5,
+        initial_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        retry_on: Optional[Tuple[Type[BaseException], ...]] = None,
+        progress: Optional[Callable[[EmbeddingProgress], None]] = None,
+    ):
+        if batch_size < 1 or max_concurrency < 1:
+            raise ValueError("batch_size and max_concurrency must be at least 1")
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.retry_on = retry_on or transient_errors()
+        self.progress = progress or self._log_progress
+        self.request_bucket = TokenBucket(requests_per_minute / 60, max(1.0, requests_per_minute / 60)) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute / 60, tokens_per_minute) if tokens_per_minute else None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self) -> Optional[str]:
+        """Model name of the underlying embeddings, used for cache namespacing."""
+        return getattr(self.embeddings, "model", None)
+
+    @staticmethod
+    def _log_progress(progress: EmbeddingProgress) -> None:
+        logger.info(
+            "Embedded %d/%d texts (%d/%d batches, %d retries) at %.1f texts/s",
+            progress.texts_done, progress.texts_total, progress.batches_done,
+            progress.batches_total, progress.retries, progress.texts_per_second,
+        )
+
+    def _with_retries(self, fn: Callable, retries: List[int]):
+        """Call fn, retrying transient errors with backoff and counting retries in retries[0]."""
+        attempt = 0
+        while True:
+            try:
+                return fn()
+            except self.retry_on as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = min(self.max_backoff, self.initial_backoff * 2 ** attempt)
+                delay *= random.uniform(0.5, 1.0)
+                attempt += 1
+                with self._lock:
+                    retries[0] += 1
+                logger.warning("Embedding request failed (%s), retry %d in %.1fs", e, attempt, delay)
+                time.sleep(delay)
+
+    def _throttle(self, texts: List[str]) -> None:
+        if self.request_bucket:
+            self.request_bucket.acquire(1)
+        if self.token_bucket:
+            self.token_bucket.acquire(sum(estimate_tokens(text) for text in texts))
+
+    def _embed_batch(self, batch: List[str], retries: List[int]) -> List[List[float]]:
+        def call():
+            self._throttle(batch)
+            return self.embeddings.embed_documents(batch)
+        return self._with_retries(call, retries)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in batches, preserving input order."""
+        if not texts:
+            return []
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        results: List[Optional[List[List[float]]]] = [None] * len(batches)
+        # Retries of this call only, shared by its batches
+        retries = [0]
+        start = time.perf_counter()
+        done = texts_done = 0
+
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batches))) as executor:
+            futures = {executor.submit(self._embed_batch, batch, retries): i for i, batch in enumerate(batches)}
+            for future in as_completed(futures):
+                i = futures[future]
+                results[i] = future.result()
+                done += 1
+                texts_done += len(batches[i])
+                self.progress(EmbeddingProgress(
+                    batches_done=done,
+                    batches_total=len(batches),
+                    texts_done=texts_done,
+                    texts_total=len(texts),
+                    retries=retries[0],
+                    elapsed=time.perf_counter() - start,
+                ))
+        return [vector for batch in results for vector in batch]
+
+    def embed_query(self, text: str) -> List[float]:
+        self._throttle([text])
+        return self.embeddings.embed_query(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        if self.request_bucket or self.token_bucket:
+            await asyncio.to_thread(self._throttle, [text])
+        return await self.embeddings.aembed_query(text)
@@ -0,0 +1,33 @@
+"""Embedding helpers shared by the RAG implementations."""
+
+from typing import Optional
+
+from langchain.embeddings import CacheBackedEmbeddings
+from langchain.storage import LocalFileStore
+from langchain_core.embeddings import Embeddings
+
+
+def create_cached_embeddings(embeddings: Embeddings, cache_dir: str, namespace: Optional[str] = None) -> Embeddings:
+    """Wrap an embedding model with a persistent, content-addressed cache.
+
+    Vectors are stored on disk under a key derived from a hash of the text and
+    the namespace, so restarting the process only embeds text that has never
+    been seen before by the same model.
+
+    Args:
+        embeddings: The underlying embedding model
+        cache_dir: Directory where cached vectors are stored
+        namespace: Cache namespace, defaults to the model name of the embeddings
+
+    Returns:
+        Embeddings: An embedding model that reads from and writes to the cache
+    """
+    if namespace is None:
+        namespace = getattr(embeddings, "model", None) or type(embeddings).__name__
+    store = LocalFileStore(cache_dir)
+    return CacheBackedEmbeddings.from_bytes_store(
+        embeddings,
+        store,
+        namespace=f"{namespace}/",
+        query_embedding_cache=True,
+    )
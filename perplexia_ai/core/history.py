@@ -0,0 +1,178 @@
+"""Bounded chat history with cached conversion and a running summary.
+
+Gradio sends the whole conversation with every turn. Converting all of it to
+LangChain messages and putting all of it in the prompt makes every turn
+slower and more expensive than the last. ``HistoryManager`` keeps the
+converted messages per session, keyed by a session id such as Gradio's
+session hash, and only converts turns it has not seen yet. Older turns are
+folded into a running summary that is refreshed in the background, and the
+prompt gets that summary and the most recent messages that fit in a token
+budget together with it, so long conversations have a constant prompt
+overhead. Turns waiting for the summary stay in the prompt until it is ready.
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import PromptTemplate
+
+from perplexia_ai.core.embedding_pipeline import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = PromptTemplate.from_template("""
+You maintain a running summary of a conversation between a user and an assistant.
+Update the summary with the new turns below. Keep names, numbers, results and open
+questions that later turns may refer to. Answer with the updated summary only, in
+at most {max_words} words.
+
+Current summary:
+{summary}
+
+New turns:
+{turns}
+
+Updated summary:""")
+
+
+def message_from_dict(message: Dict[str, str]) -> BaseMessage:
+    """Convert a Gradio message dict to a LangChain message."""
+    match message:
+        case {"role": "user", "content": content}:
+            return HumanMessage(content=content)
+        case {"role": "assistant", "content": content}:
+            return AIMessage(content=content)
+        case _:
+            return HumanMessage(content="")
+
+
+@dataclass
+class _Session:
+    messages: List[BaseMessage] = field(default_factory=list)
+    tokens: List[int] = field(default_factory=list)
+    # The Gradio message dicts the messages were converted from
+    history: List[Dict[str, str]] = field(default_factory=list)
+    summary: str = ""
+    summarized: int = 0
+    pending: Optional[Future] = None
+
+
+class HistoryManager:
+    """Per-session cache of converted chat history with a token window and summary.
+
+    Args:
+        llm: Chat model used to summarize turns that leave the window, or None
+             to simply drop them
+        max_tokens: Approximate token budget for the history in the prompt, the
+                    running summary included
+        summary_words: Target length of the running summary
+        max_sessions: Number of sessions kept, least recently used ones are dropped
+    """
+
+    def __init__(
+        self,
+        llm: Optional[BaseChatModel] = None,
+        max_tokens: int = 2000,
+        summary_words: int = 150,
+        max_sessions: int = 256,
+    ):
+        self.max_tokens = max_tokens
+        self.summary_words = summary_words
+        self.max_sessions = max_sessions
+        self.summary_chain = SUMMARY_PROMPT | llm | StrOutputParser() if llm else None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-summary") if llm else None
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def session_key(chat_history: List[Dict[str, str]]) -> str:
+        """Identify a conversation by its first message, for callers without a session id.
+
+        Conversations opening with the same message share this key; they get
+        correct prompts, since each turn's history is checked against the
+        cached one, but keep replacing each other's cached session.
+        """
+        first = chat_history[0]
+        return hashlib.sha256(f"{first.get('role')}\0{first.get('content')}".encode()).hexdigest()
+
+    def get(self, chat_history: Optional[List[Dict[str, str]]], session_id: Optional[str] = None) -> List[BaseMessage]:
+        """Return the prompt history for a conversation.
+
+        Args:
+            chat_history: The full conversation so far, as Gradio message dicts
+            session_id: Stable id of the conversation, such as Gradio's session
+                        hash, defaults to a key derived from the first message
+
+        Returns:
+            List[BaseMessage]: The running summary, if any, followed by the most
+                               recent messages that fit in the token budget
+                               along with it, and any older ones still waiting
+                               to be summarized
+        """
+        if not chat_history:
+            return []
+        key = session_id or self.session_key(chat_history)
+        with self._lock:
+            session = self._session(key, chat_history)
+            summary = session.summary
+            prefix = [SystemMessage(content=f"Summary of the earlier conversation: {summary}")] if summary else []
+            start = len(session.messages)
+            used = sum(estimate_tokens(message.content) for message in prefix)
+            while start > session.summarized and used + session.tokens[start - 1] <= self.max_tokens:
+                start -= 1
+                used += session.tokens[start]
+            if self.summary_chain:
+                if start > session.summarized and session.pending is None:
+                    session.pending = self._executor.submit(self._summarize, session, start)
+                # Turns not yet in the summary stay in the prompt, even over the budget
+                start = session.summarized
+            window = session.messages[start:]
+        return prefix + window
+
+    def _session(self, key: str, chat_history: List[Dict[str, str]]) -> _Session:
+        """Return the session for a history, converting only the turns it has not seen."""
+        session = self._sessions.get(key)
+        known = len(session.messages) if session else 0
+        if session is None or known > len(chat_history) or chat_history[:known] != session.history:
+            # New conversation, another one under the same key, or an edited history: start over
+            session = _Session()
+            known = 0
+        for message in chat_history[known:]:
+            converted = message_from_dict(message)
+            session.messages.append(converted)
+            session.tokens.append(estimate_tokens(str(converted.content)))
+            session.history.append(dict(message))
+        self._sessions[key] = session
+        self._sessions.move_to_end(key)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return session
+
+    def _summarize(self, session: _Session, upto: int) -> None:
+        """Fold the messages before upto into the session's running summary."""
+        try:
+            turns = "\n".join(
+                f"{'User' if isinstance(message, HumanMessage) else 'Assistant'}: {message.content}"
+                for message in session.messages[session.summarized:upto]
+            )
+            summary = self.summary_chain.invoke({
+                "summary": session.summary or "(none)",
+                "turns": turns,
+                "max_words": self.summary_words,
+            })
+            with self._lock:
+                session.summary = summary.strip()
+                session.summarized = upto
+        except Exception:
+            logger.warning("History summary failed, keeping the turns in the prompt", exc_info=True)
+        finally:
+            with self._lock:
+                session.pending = None
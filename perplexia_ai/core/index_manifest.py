@@ -0,0 +1,133 @@
+"""Manifest of the files indexed into a vector store.
+
+The manifest records, for every indexed file, its size, modification time,
+content hash and the ids of the chunks it produced. Comparing it with the
+files currently on disk tells a re-index which files need to be extracted,
+chunked and embedded again and which chunks must be dropped.
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+
+def file_sha256(path: Path) -> str:
+    """Return the hex SHA-256 digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_ids(path: Path, sha256: str, count: int) -> List[str]:
+    """Ids for the chunks of a file, derived from both its content and its path.
+
+    Identical files at different paths get different ids, so deleting or
+    changing one of them never drops the chunks of the other.
+    """
+    path_hash = hashlib.sha256(str(path).encode()).hexdigest()[:8]
+    return [f"{sha256[:16]}-{path_hash}-{i}" for i in range(count)]
+
+
+@dataclass
+class ManifestEntry:
+    """Indexing record for a single file."""
+    path: str
+    size: int
+    mtime: float
+    sha256: str
+    chunk_ids: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ManifestDiff:
+    """Files that changed since the manifest was written."""
+    added: List[Path] = field(default_factory=list)
+    changed: List[Path] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    # Files whose content is unchanged but whose size/mtime moved
+    touched: Dict[str, Tuple[int, float]] = field(default_factory=dict)
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.changed or self.removed)
+
+
+class IndexManifest:
+    """The set of files that make up an index, keyed by path."""
+
+    FILENAME = "manifest.json"
+
+    def __init__(self, entries: Dict[str, ManifestEntry] = None):
+        self.entries = entries or {}
+
+    @classmethod
+    def load(cls, directory: str) -> "IndexManifest":
+        """Load the manifest from an index directory, or return an empty one."""
+        path = Path(directory) / cls.FILENAME
+        if not path.exists():
+            return cls()
+        with open(path) as f:
+            data = json.load(f)
+        return cls({entry["path"]: ManifestEntry(**entry) for entry in data["files"]})
+
+    def copy(self) -> "IndexManifest":
+        """Return a copy that can be changed without affecting this manifest."""
+        return IndexManifest({key: replace(entry, chunk_ids=list(entry.chunk_ids)) for key, entry in self.entries.items()})
+
+    @classmethod
+    def exists(cls, directory: str) -> bool:
+        """Check whether a manifest has been written to an index directory."""
+        return (Path(directory) / cls.FILENAME).exists()
+
+    def save(self, directory: str) -> None:
+        """Write the manifest into an index directory."""
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        tmp_path = Path(directory) / f".{self.FILENAME}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"files": [asdict(entry) for entry in self.entries.values()]}, f, indent=2)
+        os.replace(tmp_path, Path(directory) / self.FILENAME)
+
+    def diff(self, paths: Sequence[Path]) -> ManifestDiff:
+        """Compare the manifest against the given files.
+
+        Size and mtime are checked first; the content hash is only computed
+        when they differ, so an unchanged directory costs one stat per file.
+
+        Args:
+            paths: Files that should be in the index
+
+        Returns:
+            ManifestDiff: Added, changed and removed files
+        """
+        diff = ManifestDiff()
+        current = {str(path): Path(path) for path in paths}
+        for key, path in current.items():
+            entry = self.entries.get(key)
+            stat = path.stat()
+            if entry is None:
+                diff.added.append(path)
+            elif (entry.size, entry.mtime) != (stat.st_size, stat.st_mtime):
+                if file_sha256(path) == entry.sha256:
+                    diff.touched[key] = (stat.st_size, stat.st_mtime)
+                else:
+                    diff.changed.append(path)
+        diff.removed = [key for key in self.entries if key not in current]
+        return diff
+
+    def record(self, path: Path, chunk_ids: List[str], sha256: str = None) -> ManifestEntry:
+        """Record a freshly indexed file."""
+        stat = path.stat()
+        entry = ManifestEntry(
+            path=str(path),
+            size=stat.st_size,
+            mtime=stat.st_mtime,
+            sha256=sha256 or file_sha256(path),
+            chunk_ids=chunk_ids,
+        )
+        self.entries[str(path)] = entry
+        return entry
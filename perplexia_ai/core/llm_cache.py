@@ -0,0 +1,187 @@
+"""Persistent exact-match cache for deterministic LLM calls.
+
+Classification-style calls, such as query routing and the GOOD/BAD context
+evaluation, run at low temperature and are repeated verbatim for repeated
+questions and contexts. ``SQLiteLLMCache`` stores their responses in SQLite,
+keyed by a hash of the model configuration (model name and parameters, as
+serialized by LangChain) and the fully rendered prompt, so a repeat costs a
+local lookup instead of an API call.
+
+Caching is opt-in per chain: ``with_cache`` returns a copy of a chat model
+that uses the cache, and only chains built from that copy are cached. The
+database runs in WAL mode with a busy timeout, so several threads and worker
+processes can share one file.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+from perplexia_ai.core.tracing import record
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    generations TEXT NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed);
+"""
+
+
+def _dump_generations(generations: RETURN_VAL_TYPE) -> str:
+    return json.dumps([
+        {
+            "text": generation.text,
+            "generation_info": generation.generation_info,
+            "message": message_to_dict(generation.message) if isinstance(generation, ChatGeneration) else None,
+        }
+        for generation in generations
+    ])
+
+
+def _load_generations(data: str) -> List[Generation]:
+    generations: List[Generation] = []
+    for item in json.loads(data):
+        if item["message"] is not None:
+            [message] = messages_from_dict([item["message"]])
+            generations.append(ChatGeneration(message=message, generation_info=item["generation_info"]))
+        else:
+            generations.append(Generation(text=item["text"], generation_info=item["generation_info"]))
+    return generations
+
+
+class SQLiteLLMCache(BaseCache):
+    """LangChain LLM cache in a SQLite file with a TTL and an entry limit.
+
+    Args:
+        path: Database file, created with its directory if missing
+        ttl: Seconds an entry stays valid, None to keep entries until evicted
+        max_entries: Most entries kept; the least recently used are evicted
+        busy_timeout: Seconds to wait for another writer before giving up
+    """
+
+    def __init__(
+        self,
+        path: str = ".cache/llm_cache.sqlite",
+        ttl: Optional[float] = 7 * 24 * 3600.0,
+        max_entries: int = 100_000,
+        busy_timeout: float = 30.0,
+    ):
+        self.path = str(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.busy_timeout = busy_timeout
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        with self._connection() as connection:
+            connection.executescript(_SCHEMA)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Hit and miss counters of this process plus the entries in the database."""
+        (entries,) = self._connection().execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def _connection(self) -> sqlite3.Connection:
+        """The calling thread's connection, opened on first use (connections are per thread and per process)."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection, self._local.pid = connection, os.getpid()
+        return connection
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\0{prompt}".encode()).hexdigest()
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        record(llm_cache_hits=int(hit), llm_cache_misses=int(not hit))
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        connection = self._connection()
+        row = connection.execute("SELECT generations, created FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+            connection.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            row = None
+        if row is None:
+            self._count(False)
+            return None
+        connection.execute("UPDATE llm_cache SET accessed = ? WHERE key = ?", (now, key))
+        self._count(True)
+        return _load_generations(row[0])
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        now = time.time()
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, generations, created, accessed) VALUES (?, ?, ?, ?)",
+                (self._key(prompt, llm_string), _dump_generations(return_val), now, now),
+            )
+            connection.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY accessed LIMIT MAX(0, (SELECT COUNT(*) FROM llm_cache) - ?))",
+                (self.max_entries,),
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        # A worker thread, so waiting for another process's write never blocks the event loop
+        return await asyncio.to_thread(self.lookup, prompt, llm_string)
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        await asyncio.to_thread(self.update, prompt, llm_string, return_val)
+
+    def clear(self, **kwargs: Any) -> None:
+        self._connection().execute("DELETE FROM llm_cache")
+
+    def expire(self) -> int:
+        """Delete entries older than the TTL, returning how many were removed."""
+        if self.ttl is None:
+            return 0
+        cursor = self._connection().execute("DELETE FROM llm_cache WHERE created < ?", (time.time() - self.ttl,))
+        return cursor.rowcount
+
+
+def with_cache(llm: BaseChatModel, cache: Optional[Union[BaseCache, str]]) -> BaseChatModel:
+    """Return a copy of a chat model that uses a cache, or the model itself when cache is None.
+
+    Args:
+        llm: The chat model
+        cache: A LangChain cache, or the path of a SQLiteLLMCache database
+    """
+    if cache is None:
+        return llm
+    if isinstance(cache, str):
+        cache = SQLiteLLMCache(cache)
+    return llm.model_copy(update={"cache": cache})
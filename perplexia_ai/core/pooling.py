@@ -0,0 +1,162 @@
+"""Instrumented httpx transports for the shared client pools.
+
+Kept apart from ``perplexia_ai.core.clients`` so that httpx is only imported
+once a pool is created.
+
+httpx async connections belong to the event loop that opened them and fail
+when used from another one, e.g. after a second ``asyncio.run``. A client
+built once and handed to long-lived objects such as ChatOpenAI therefore
+cannot own the connections itself: ``LoopLocalAsyncClient`` sends every
+request through a client of the running loop, created on first use there.
+"""
+
+import asyncio
+import threading
+import time
+import weakref
+from typing import Any, Callable, List, Optional, Tuple
+
+import httpx
+
+from perplexia_ai.core.tracing import Metrics
+
+
+class PoolStats:
+    """Requests in flight on the connection pools of one client."""
+
+    def __init__(self, name: str, metrics: Metrics):
+        self.name = name
+        self.metrics = metrics
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+
+    def start(self) -> Tuple[float, Callable[[str, dict], None]]:
+        """Count a request as started and return its start time and trace callback."""
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        self.metrics.inc("http_requests_total", help="HTTP requests sent by shared clients", client=self.name)
+        start = time.perf_counter()
+        acquired = []
+
+        def trace(event: str, info: dict) -> None:
+            if event == "connection.connect_tcp.complete":
+                self.metrics.inc("http_connections_opened_total", help="New TCP connections", client=self.name)
+            elif event == "connection.start_tls.complete":
+                self.metrics.inc("http_tls_handshakes_total", help="TLS handshakes", client=self.name)
+            elif event.endswith("send_request_headers.started") and not acquired:
+                # Time spent waiting for a pooled connection or opening a new one
+                acquired.append(time.perf_counter())
+                self.metrics.observe("http_connection_acquire_seconds", acquired[0] - start,
+                                     help="Time to get a connection for a request", client=self.name)
+
+        return start, trace
+
+    def finish(self, start: float, error: Optional[BaseException]) -> None:
+        with self._lock:
+            self.in_flight -= 1
+        if error is not None:
+            self.metrics.inc("http_errors_total", help="HTTP requests that failed without a response",
+                             client=self.name, error=type(error).__name__)
+        self.metrics.observe("http_request_duration_seconds", time.perf_counter() - start,
+                             help="Time until the response headers arrived", client=self.name)
+
+
+class InstrumentedTransport(httpx.HTTPTransport):
+    """HTTP transport counting its requests, connections and TLS handshakes in a PoolStats."""
+
+    def __init__(self, stats: PoolStats, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.stats = stats
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        start, trace = self.stats.start()
+        previous = request.extensions.get("trace")
+
+        def chained(event: str, info: dict) -> None:
+            trace(event, info)
+            if previous is not None:
+                previous(event, info)
+
+        request.extensions = {**request.extensions, "trace": chained}
+        error = None
+        try:
+            return super().handle_request(request)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self.stats.finish(start, error)
+
+
+class AsyncInstrumentedTransport(httpx.AsyncHTTPTransport):
+    """Async version of InstrumentedTransport."""
+
+    def __init__(self, stats: PoolStats, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        start, trace = self.stats.start()
+        previous = request.extensions.get("trace")
+
+        # httpcore awaits the trace callback of async requests
+        async def atrace(event: str, info: dict) -> None:
+            trace(event, info)
+            if previous is not None:
+                await previous(event, info)
+
+        request.extensions = {**request.extensions, "trace": atrace}
+        error = None
+        try:
+            return await super().handle_async_request(request)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self.stats.finish(start, error)
+
+
+class LoopLocalAsyncClient(httpx.AsyncClient):
+    """httpx.AsyncClient sending each request through a client of the running event loop.
+
+    Args:
+        create: Builds the client used by one event loop
+        **kwargs: Settings of this client, used to build requests, such as timeout
+    """
+
+    def __init__(self, create: Callable[[], httpx.AsyncClient], **kwargs: Any):
+        super().__init__(**kwargs)
+        self._create = create
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+    def current(self) -> httpx.AsyncClient:
+        """The client of the running event loop, created on first use."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.get(loop)
+            if client is None:
+                # Connections of finished loops can no longer be used or closed cleanly
+                for finished in [other for other in self._clients if other.is_closed()]:
+                    del self._clients[finished]
+                client = self._clients[loop] = self._create()
+            return client
+
+    def clients(self) -> List[httpx.AsyncClient]:
+        """The clients of the event loops that are still open."""
+        with self._lock:
+            return [client for loop, client in self._clients.items() if not loop.is_closed()]
+
+    async def send(self, request: httpx.Request, **kwargs: Any) -> httpx.Response:
+        return await self.current().send(request, **kwargs)
+
+    async def aclose(self) -> None:
+        """Close the connections of the running event loop; other loops keep theirs."""
+        with self._lock:
+            client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
@@ -0,0 +1,129 @@
+"""Lazy registry of ChatInterface implementations.
+
+Every mode is registered by a "module:Class" string, so looking up a mode or
+listing the available ones imports nothing. Only the selected mode's module,
+and the LangChain, LangGraph and PDF dependencies it pulls in, are imported
+when its implementation is first created.
+"""
+
+import importlib
+from dataclasses import dataclass
+from typing import Dict, List, Tuple, Type
+
+from perplexia_ai.core.chat_interface import ChatInterface
+
+DEFAULT_EXAMPLES = [
+    ["What is machine learning?"],
+    ["Compare SQL and NoSQL databases"],
+    ["If I have a dinner bill of $120, what would be a 15% tip?"],
+    ["What about 20%?"],
+]
+
+WEB_SEARCH_EXAMPLES = [
+    ["What are the latest developments in quantum computing?"],
+    ["Who is the current CEO of SpaceX?"],
+    ["What were the major headlines in tech news this week?"],
+    ["Compare React and Angular frameworks"],
+]
+
+OPM_EXAMPLES = [
+    ["What new customer experience improvements did OPM implement for retirement services in FY 2022?"],
+    ["How did OPM's approach to improving the federal hiring process evolve from FY 2019 through FY 2022?"],
+    ["What were the performance metrics for OPM in 2020? Compare them with 2019."],
+    ["What strategic goals did OPM outline in the 2022 report?"],
+]
+
+
+def _examples(examples: List[List[str]]) -> Tuple[Tuple[str, ...], ...]:
+    return tuple(tuple(example) for example in examples)
+
+
+@dataclass(frozen=True)
+class ModeSpec:
+    """A registered chat mode.
+
+    Args:
+        target: Implementation class as "package.module:ClassName"
+        title: Title shown in the chat UI
+        description: Description shown in the chat UI
+        examples: Example questions shown in the chat UI
+    """
+
+    target: str
+    title: str
+    description: str
+    examples: Tuple[Tuple[str, ...], ...] = _examples(DEFAULT_EXAMPLES)
+
+
+MODES: Dict[Tuple[int, str], ModeSpec] = {
+    (1, "part1"): ModeSpec(
+        "perplexia_ai.week1.part1:QueryUnderstandingChat",
+        "Perplexia AI - Week 1: Query Understanding",
+        "Your intelligent AI assistant that can understand different types of questions and format responses accordingly.",
+    ),
+    (1, "part2"): ModeSpec(
+        "perplexia_ai.week1.part2:BasicToolsChat",
+        "Perplexia AI - Week 1: Basic Tools",
+        "Your intelligent AI assistant that can answer questions, perform calculations, and format responses.",
+    ),
+    (1, "part3"): ModeSpec(
+        "perplexia_ai.week1.part3:MemoryChat",
+        "Perplexia AI - Week 1: Memory",
+        "Your intelligent AI assistant that can answer questions, perform calculations, and maintain conversation context.",
+    ),
+    (2, "part1"): ModeSpec(
+        "perplexia_ai.week2.part1:WebSearchChat",
+        "Perplexia AI - Week 2: Web Search",
+        "Your intelligent AI assistant that can search the web for real-time information.",
+        _examples(WEB_SEARCH_EXAMPLES),
+    ),
+    (2, "part2"): ModeSpec(
+        "perplexia_ai.week2.part2:DocumentRAGChat",
+        "Perplexia AI - Week 2: Document RAG",
+        "Your intelligent AI assistant that can retrieve information from OPM documents.",
+        _examples(OPM_EXAMPLES),
+    ),
+    (2, "part3"): ModeSpec(
+        "perplexia_ai.week2.part3:CorrectiveRAGChat",
+        "Perplexia AI - Week 2: Corrective RAG",
+        "Your intelligent AI assistant that combines web search and document retrieval.",
+        _examples(OPM_EXAMPLES),
+    ),
+}
+
+
+def get_mode(week: int, mode: str) -> ModeSpec:
+    """Return the registered spec for a week and mode without importing it.
+
+    Raises:
+        ValueError: If the week or mode is not registered
+    """
+    weeks = sorted({registered_week for registered_week, _ in MODES})
+    if week not in weeks:
+        raise ValueError(f"Unknown week: {week}. Choose from: {weeks}")
+    if (week, mode) not in MODES:
+        modes = [registered_mode for registered_week, registered_mode in MODES if registered_week == week]
+        raise ValueError(f"Unknown mode: {mode}. Choose from: {modes}")
+    return MODES[(week, mode)]
+
+
+def load_implementation(week: int, mode: str) -> Type[ChatInterface]:
+    """Import and return the implementation class of a mode."""
+    module_name, class_name = get_mode(week, mode).target.split(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def create_chat_implementation(week: int, mode: str) -> ChatInterface:
+    """Create an uninitialized chat implementation for a week and mode.
+
+    Args:
+        week: Which week to run
+        mode: Which part of the week to run, e.g. 'part1'
+
+    Returns:
+        ChatInterface: The implementation, ready for initialize()
+
+    Raises:
+        ValueError: If the week or mode is not registered
+    """
+    return load_implementation(week, mode)()
@@ -0,0 +1,253 @@
+"""TTL + LRU cache for web search results.
+
+Web searches are the slowest and most expensive backend hop, and users often
+repeat a question or reword it trivially. ``CachedSearchTool`` wraps a search
+tool and answers repeated queries from a ``SearchCache`` keyed on a normalized
+form of the query, skipping the network entirely.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from perplexia_ai.core.tracing import record
+
+# Sentence punctuation, dropped at the ends of words; symbols inside or at the
+# end of a word, as in "c++", "c#" or "node.js", are part of the query
+_EDGE_PUNCTUATION = "\"'`.,;:!?()[]{}<>"
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query so trivially different phrasings share a cache entry.
+
+    Case, Unicode compatibility forms, punctuation around words and runs of
+    whitespace are ignored, so "What is the capital of France?" and "what is
+    the capital of france" map to the same key, while "C++ vs C#" and "C vs C"
+    do not.
+    """
+    words = (word.strip(_EDGE_PUNCTUATION) for word in unicodedata.normalize("NFKC", query).lower().split())
+    return " ".join(word for word in words if word)
+
+
+class SearchCache:
+    """Thread-safe LRU cache with a per-entry TTL and an entry and byte budget.
+
+    Args:
+        ttl: Seconds an entry stays valid
+        max_entries: Maximum number of entries kept in memory
+        max_bytes: Maximum total size of the JSON-encoded entries kept in memory
+        cache_dir: Optional directory for an on-disk backend that survives
+                   restarts and is shared between processes
+        max_disk_bytes: Size the on-disk backend is trimmed to, oldest files first
+        sweep_interval: Seconds between sweeps of the on-disk backend, which
+                        delete expired files and trim it to max_disk_bytes
+    """
+
+    def __init__(
+        self,
+        ttl: float = 3600.0,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        cache_dir: Optional[str] = None,
+        max_disk_bytes: int = 256 * 1024 * 1024,
+        sweep_interval: float = 300.0,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_disk_bytes = max_disk_bytes
+        self.sweep_interval = sweep_interval
+        self._next_sweep = 0.0
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._entries: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Hit, miss and eviction counters plus current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def _disk_path(self, key: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for a key, or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, size, value = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._remove(key)
+
+        value = self._read_disk(key, now)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable value under a key."""
+        encoded = json.dumps(value)
+        expires = time.time() + self.ttl
+        with self._lock:
+            self._insert(key, expires, len(encoded), value)
+        if self.cache_dir:
+            tmp_path = self._disk_path(key).with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, "w") as f:
+                f.write(json.dumps({"key": key, "expires": expires, "value": value}))
+            os.replace(tmp_path, self._disk_path(key))
+            if time.time() >= self._next_sweep:
+                self.sweep_disk()
+
+    def sweep_disk(self) -> int:
+        """Delete expired files of the on-disk backend, then the oldest ones over max_disk_bytes.
+
+        A file's age is taken from its modification time, the time it was
+        written, so the directory is swept without reading the files. Other
+        processes may sweep the same directory at the same time.
+
+        Returns:
+            int: Number of files deleted
+        """
+        if not self.cache_dir:
+            return 0
+        now = time.time()
+        self._next_sweep = now + self.sweep_interval
+        files = []
+        for path in self.cache_dir.iterdir():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        deleted = 0
+        for mtime, size, path in files:
+            # Temporary files are only left behind by interrupted writes
+            stale = mtime + self.ttl <= now or (path.suffix == ".tmp" and mtime + self.sweep_interval <= now)
+            if not stale and total <= self.max_disk_bytes:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+            deleted += 1
+        return deleted
+
+    def clear(self) -> None:
+        """Drop all in-memory entries."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _read_disk(self, key: str, now: float) -> Optional[Any]:
+        if not self.cache_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path) as f:
+                record = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if record["key"] != key or record["expires"] <= now:
+            return None
+        with self._lock:
+            self._insert(key, record["expires"], len(json.dumps(record["value"])), record["value"])
+        return record["value"]
+
+    def _insert(self, key: str, expires: float, size: int, value: Any) -> None:
+        if key in self._entries:
+            self._remove(key)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (expires, size, value)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+class CachedSearchTool(Runnable):
+    """Search tool wrapper that answers repeated queries from a SearchCache.
+
+    The cache key combines the normalized query with the wrapped tool's
+    settings (result count, search depth, ...), so tools configured
+    differently never share entries.
+
+    Args:
+        tool: The search tool to wrap, e.g. TavilySearchResults
+        cache: The cache to read from and write to
+        normalize: Optional function applied to fresh results before they are
+                   cached and returned, e.g. a SearchResultNormalizer
+    """
+
+    def __init__(self, tool: Runnable, cache: Optional[SearchCache] = None, normalize: Optional[Callable[[Any], Any]] = None):
+        self.tool = tool
+        self.cache = cache or SearchCache()
+        self.normalize = normalize
+        settings = {
+            name: value for name, value in sorted(vars(tool).items())
+            if isinstance(value, (str, int, float, bool)) and name != "description"
+        }
+        if normalize is not None:
+            settings["normalize"] = repr(normalize)
+        self._namespace = hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:16]
+
+    def _key(self, input: Any) -> Tuple[str, str]:
+        query = input if isinstance(input, str) else input["query"]
+        return query, f"{self._namespace}:{normalize_query(query)}"
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        query, key = self._key(input)
+        results = self.cache.get(key)
+        record(search_cache_hits=int(results is not None), search_cache_misses=int(results is None))
+        if results is None:
+            results = self.tool.invoke(query, config, **kwargs)
+            if self.normalize is not None:
+                results = self.normalize(results)
+            if isinstance(results, list):
+                self.cache.set(key, results)
+        return results
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        query, key = self._key(input)
+        results = self.cache.get(key)
+        record(search_cache_hits=int(results is not None), search_cache_misses=int(results is None))
+        if results is None:
+            results = await self.tool.ainvoke(query, config, **kwargs)
+            if self.normalize is not None:
+                results = self.normalize(results)
+            if isinstance(results, list):
+                self.cache.set(key, results)
+        return results
@@ -0,0 +1,106 @@
+"""Lean normalization of web search results.
+
+With ``include_raw_content`` Tavily returns whole pages, which then sit in
+graph state and the search cache and are copied between nodes, although the
+answer nodes only read each result's title, url and content.
+``SearchResultNormalizer`` shrinks a result list to what they use:
+
+- results whose URL was already seen (ignoring case of the host, fragments
+  and trailing slashes) are dropped
+- only the configured fields are kept
+- each content is trimmed to a byte budget, and results are added best first
+  until the payload budget for the whole list is used up
+
+The text size of the results before and after is recorded on the traced node span.
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+from perplexia_ai.core.tracing import record
+
+LEAN_FIELDS = ("title", "url", "content")
+# Results that would have to be cut to less content than this are left out instead
+MIN_CONTENT_BYTES = 200
+
+
+def canonical_url(url: str) -> str:
+    """Normalize a URL so trivially different spellings of the same page compare equal."""
+    parts = urlsplit(url.strip())
+    path = parts.path.rstrip("/")
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, ""))
+
+
+def payload_bytes(value: Any) -> int:
+    """Size of a value encoded as JSON, as it is held in the search cache."""
+    return len(json.dumps(value).encode())
+
+
+def text_size(results: List[Any]) -> int:
+    """Characters of text in a result list, a cheap estimate of its size that serializes nothing."""
+    return sum(
+        len(key) + (len(value) if isinstance(value, str) else 8)
+        for result in results if isinstance(result, dict)
+        for key, value in result.items()
+    )
+
+
+def truncate_bytes(text: str, max_bytes: int) -> str:
+    """Cut text to at most max_bytes of UTF-8 at a word boundary, marking the cut."""
+    encoded = text.encode()
+    if len(encoded) <= max_bytes:
+        return text
+    cut = encoded[:max(0, max_bytes - 4)].decode(errors="ignore")
+    space = cut.rfind(" ")
+    return (cut[:space] if space > len(cut) // 2 else cut).rstrip() + " ..."
+
+
+@dataclass(frozen=True)
+class SearchResultNormalizer:
+    """Deduplicate, trim and strip a list of search results.
+
+    Args:
+        max_bytes: Budget for the JSON size of the whole result list
+        max_content_bytes: Longest the content of one result may be
+        fields: Fields kept from every result
+    """
+
+    max_bytes: int = 16384
+    max_content_bytes: int = 4096
+    fields: Tuple[str, ...] = LEAN_FIELDS
+
+    def __call__(self, results: Any) -> Any:
+        """Normalize a result list; anything else, such as a tool error message, is returned as-is."""
+        if not isinstance(results, list):
+            return results
+        lean: List[Dict[str, Any]] = []
+        seen = set()
+        used = 2  # the enclosing brackets
+        for result in results:
+            if not isinstance(result, dict):
+                continue
+            url = canonical_url(str(result.get("url", "")))
+            if url in seen:
+                continue
+            seen.add(url)
+            item = {field: result[field] for field in self.fields if field in result}
+            if isinstance(item.get("content"), str):
+                item["content"] = truncate_bytes(item["content"], self.max_content_bytes)
+            separator = 2 if lean else 0
+            size = payload_bytes(item)
+            if used + separator + size > self.max_bytes and isinstance(item.get("content"), str):
+                content_bytes = payload_bytes(item["content"])
+                remaining = self.max_bytes - used - separator - (size - content_bytes)
+                if remaining < MIN_CONTENT_BYTES:
+                    break
+                # Trimming by the raw byte count leaves room for JSON escapes
+                item["content"] = truncate_bytes(item["content"], remaining - (content_bytes - len(item["content"].encode())))
+                size = payload_bytes(item)
+            if used + separator + size > self.max_bytes:
+                break
+            lean.append(item)
+            used += separator + size
+        record(search_raw_chars=text_size(results), search_lean_chars=text_size(lean))
+        return lean
@@ -0,0 +1,42 @@
+"""Helpers for streaming LLM tokens out of LangGraph workflows."""
+
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Union
+
+
+def stream_node_tokens(graph, input: Dict[str, Any], node: str, config: Optional[dict] = None) -> Iterator[Union[str, dict]]:
+    """Run a compiled graph, yielding the LLM tokens produced inside one node.
+
+    Tokens from every other node (routing, evaluation, ...) are dropped. The
+    final graph state is yielded last, as a dict.
+
+    Args:
+        graph: A compiled LangGraph graph
+        input: The initial graph state
+        node: Name of the node whose LLM output should be streamed
+        config: Optional run config, e.g. with tracing callbacks
+
+    Yields:
+        str tokens, followed by the final state dict
+    """
+    final_state = {}
+    for mode, payload in graph.stream(input, config, stream_mode=["messages", "values"]):
+        if mode == "values":
+            final_state = payload
+            continue
+        chunk, metadata = payload
+        if metadata.get("langgraph_node") == node and isinstance(chunk.content, str) and chunk.content:
+            yield chunk.content
+    yield final_state
+
+
+async def astream_node_tokens(graph, input: Dict[str, Any], node: str, config: Optional[dict] = None) -> AsyncIterator[Union[str, dict]]:
+    """Async version of stream_node_tokens."""
+    final_state = {}
+    async for mode, payload in graph.astream(input, config, stream_mode=["messages", "values"]):
+        if mode == "values":
+            final_state = payload
+            continue
+        chunk, metadata = payload
+        if metadata.get("langgraph_node") == node and isinstance(chunk.content, str) and chunk.content:
+            yield chunk.content
+    yield final_state
@@ -0,0 +1,310 @@
+"""Per-node tracing and metrics for LangGraph workflows.
+
+A ``Tracer`` wraps graph nodes and conditional edges and listens to the LLM
+and tool callbacks of a request. Each request becomes one trace, with one
+span per node run holding its wall time, LLM and tool calls, token counts,
+context size and cache hits, plus the branch taken at every conditional edge.
+Finished traces are appended to a JSONL file and aggregated into
+Prometheus-style counters and histograms.
+
+Instrumentation is opt-in per chat implementation: with no tracer, nodes are
+added to the graph unwrapped and no callbacks are attached, so a disabled
+tracer costs nothing.
+"""
+
+import contextlib
+import contextvars
+import json
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import RunnableLambda
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+_current_trace: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("perplexia_trace", default=None)
+_current_span: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar("perplexia_span", default=None)
+
+
+def record(**counts: float) -> None:
+    """Add counts (e.g. search_cache_hits=1) to the node span currently running, if traced."""
+    span = _current_span.get()
+    if span is not None:
+        for key, value in counts.items():
+            span[key] = span.get(key, 0) + value
+
+
+class Trace:
+    """The spans and branches of a single traced request."""
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.attributes = attributes
+        self.start = time.time()
+        self.spans: List[Dict[str, Any]] = []
+        self.branches: Dict[str, str] = {}
+
+    def to_dict(self, duration: float, status: str) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_s": duration,
+            "status": status,
+            "attributes": self.attributes,
+            "branches": self.branches,
+            "spans": self.spans,
+        }
+
+
+class Metrics:
+    """Thread-safe counters and histograms rendered in the Prometheus text format."""
+
+    def __init__(self, prefix: str = "perplexia"):
+        self.prefix = prefix
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self._histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], List[float]] = {}
+        self._buckets: Dict[str, Sequence[float]] = {}
+        self._help: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1.0, help: str = "", **labels: str) -> None:
+        """Increase a counter."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._help.setdefault(name, help)
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, buckets: Sequence[float] = DURATION_BUCKETS, help: str = "", **labels: str) -> None:
+        """Record a value in a histogram."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._help.setdefault(name, help)
+            bucket_bounds = self._buckets.setdefault(name, buckets)
+            # One count per bucket, then the sum and the total count
+            state = self._histograms.setdefault(key, [0.0] * (len(bucket_bounds) + 2))
+            for i, bound in enumerate(bucket_bounds):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+        def format_labels(labels, extra=()) -> str:
+            pairs = [*labels, *extra]
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+        lines = []
+        with self._lock:
+            for name in sorted({name for name, _ in self._counters}):
+                metric = f"{self.prefix}_{name}"
+                lines += [f"# HELP {metric} {self._help[name]}", f"# TYPE {metric} counter"]
+                for (counter, labels), value in sorted(self._counters.items()):
+                    if counter == name:
+                        lines.append(f"{metric}{format_labels(labels)} {value:g}")
+            for name in sorted({name for name, _ in self._histograms}):
+                metric = f"{self.prefix}_{name}"
+                lines += [f"# HELP {metric} {self._help[name]}", f"# TYPE {metric} histogram"]
+                for (histogram, labels), state in sorted(self._histograms.items()):
+                    if histogram != name:
+                        continue
+                    for bound, count in zip(self._buckets[name], state):
+                        lines.append(f"{metric}_bucket{format_labels(labels, [('le', str(bound))])} {count:g}")
+                    lines.append(f"{metric}_bucket{format_labels(labels, [('le', '+Inf')])} {state[-1]:g}")
+                    lines.append(f"{metric}_sum{format_labels(labels)} {state[-2]:g}")
+                    lines.append(f"{metric}_count{format_labels(labels)} {state[-1]:g}")
+        return "\n".join(lines) + "\n"
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Attributes LLM and tool calls, their timings and token usage to the current node span."""
+
+    run_inline = True
+
+    def __init__(self):
+        self._starts: Dict[uuid.UUID, Tuple[float, Optional[Dict[str, Any]]]] = {}
+
+    def _start(self, run_id: uuid.UUID) -> None:
+        self._starts[run_id] = (time.perf_counter(), _current_span.get())
+
+    def _end(self, run_id: uuid.UUID, kind: str) -> Optional[Dict[str, Any]]:
+        start, span = self._starts.pop(run_id, (None, None))
+        if span is None:
+            return None
+        span[f"{kind}_calls"] = span.get(f"{kind}_calls", 0) + 1
+        span[f"{kind}_seconds"] = span.get(f"{kind}_seconds", 0.0) + time.perf_counter() - start
+        return span
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs) -> None:
+        self._start(run_id)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs) -> None:
+        self._start(run_id)
+
+    def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+        span = self._end(run_id, "llm")
+        if span is None:
+            return
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        if not usage and response.generations and response.generations[0]:
+            message = getattr(response.generations[0][0], "message", None)
+            metadata = getattr(message, "usage_metadata", None) or {}
+            usage = {"prompt_tokens": metadata.get("input_tokens", 0), "completion_tokens": metadata.get("output_tokens", 0)}
+        for key in ("prompt_tokens", "completion_tokens"):
+            span[key] = span.get(key, 0) + (usage.get(key) or 0)
+
+    def on_llm_error(self, error, *, run_id, **kwargs) -> None:
+        self._end(run_id, "llm")
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs) -> None:
+        self._start(run_id)
+
+    def on_tool_end(self, output, *, run_id, **kwargs) -> None:
+        self._end(run_id, "tool")
+
+    def on_tool_error(self, error, *, run_id, **kwargs) -> None:
+        self._end(run_id, "tool")
+
+
+class Tracer:
+    """Records traces of graph runs and aggregates them into metrics.
+
+    Args:
+        jsonl_path: Optional file every finished trace is appended to as one JSON line
+        metrics: Metrics to aggregate into, defaults to a new registry
+    """
+
+    def __init__(self, jsonl_path: Optional[str] = None, metrics: Optional[Metrics] = None):
+        self.jsonl_path = jsonl_path
+        self.metrics = metrics or Metrics()
+        self.callback = TracingCallbackHandler()
+        self._write_lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def trace(self, name: str, **attributes: Any) -> Iterator[Dict[str, Any]]:
+        """Trace one request, yielding the run config to pass to the graph."""
+        trace = Trace(name, attributes)
+        token = _current_trace.set(trace)
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield {"callbacks": [self.callback]}
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            _current_trace.reset(token)
+            self._finish(trace, time.perf_counter() - start, status)
+
+    def wrap_node(self, name: str, node: Any) -> RunnableLambda:
+        """Wrap a graph node so every run records a span."""
+        runnable = node if hasattr(node, "invoke") else RunnableLambda(node)
+
+        def traced(state: dict) -> Any:
+            span, token = self._open_span(name)
+            try:
+                output = runnable.invoke(state)
+            except BaseException as e:
+                self._close_span(span, token, None, e)
+                raise
+            self._close_span(span, token, output, None)
+            return output
+
+        async def atraced(state: dict) -> Any:
+            span, token = self._open_span(name)
+            try:
+                output = await runnable.ainvoke(state)
+            except BaseException as e:
+                self._close_span(span, token, None, e)
+                raise
+            self._close_span(span, token, output, None)
+            return output
+
+        return RunnableLambda(traced, afunc=atraced, name=name)
+
+    def wrap_branch(self, name: str, condition: Callable[[dict], str]) -> Callable[[dict], str]:
+        """Wrap a conditional edge function so the branch it takes is recorded."""
+        def traced(state: dict) -> str:
+            branch = condition(state)
+            trace = _current_trace.get()
+            if trace is not None:
+                trace.branches[name] = branch
+            self.metrics.inc("branch_total", help="Conditional edge branches taken", edge=name, branch=branch)
+            return branch
+
+        return traced
+
+    def write_prometheus(self, path: str) -> None:
+        """Write the current metrics to a file, e.g. for the node exporter textfile collector."""
+        with open(path, "w") as f:
+            f.write(self.metrics.render())
+
+    def _open_span(self, name: str) -> Tuple[Dict[str, Any], contextvars.Token]:
+        span = {"node": name, "start": time.time(), "_perf_start": time.perf_counter()}
+        return span, _current_span.set(span)
+
+    def _close_span(self, span: Dict[str, Any], token: contextvars.Token, output: Any, error: Optional[BaseException]) -> None:
+        _current_span.reset(token)
+        span["duration_s"] = time.perf_counter() - span.pop("_perf_start")
+        span["status"] = "error" if error else "ok"
+        if error:
+            span["error"] = f"{type(error).__name__}: {error}"
+        if isinstance(output, dict) and isinstance(output.get("context"), str):
+            span["context_bytes"] = len(output["context"].encode())
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.spans.append(span)
+        self._observe_span(span)
+
+    def _observe_span(self, span: Dict[str, Any]) -> None:
+        node = span["node"]
+        metrics = self.metrics
+        metrics.inc("node_runs_total", help="Graph node runs", node=node, status=span["status"])
+        metrics.observe("node_duration_seconds", span["duration_s"], help="Graph node wall time", node=node)
+        if "llm_calls" in span:
+            metrics.inc("llm_calls_total", span["llm_calls"], help="LLM calls", node=node)
+            metrics.observe("llm_duration_seconds", span["llm_seconds"] / span["llm_calls"], help="Mean LLM call wall time per node run", node=node)
+            metrics.inc("llm_tokens_total", span.get("prompt_tokens", 0), help="LLM tokens", node=node, kind="prompt")
+            metrics.inc("llm_tokens_total", span.get("completion_tokens", 0), help="LLM tokens", node=node, kind="completion")
+        if "tool_calls" in span:
+            metrics.inc("tool_calls_total", span["tool_calls"], help="Tool calls", node=node)
+        if "context_bytes" in span:
+            metrics.observe("context_bytes", span["context_bytes"], BYTES_BUCKETS, help="Bytes of context built", node=node)
+        if "search_raw_chars" in span:
+            metrics.observe("search_raw_chars", span["search_raw_chars"], BYTES_BUCKETS, help="Characters of search result text as returned by the tool", node=node)
+            metrics.observe("search_lean_chars", span["search_lean_chars"], BYTES_BUCKETS, help="Characters of search result text kept after normalization", node=node)
+        for cache, description in (("search_cache", "Search cache"), ("llm_cache", "LLM response cache")):
+            for outcome in ("hits", "misses"):
+                if f"{cache}_{outcome}" in span:
+                    metrics.inc(f"{cache}_{outcome}_total", span[f"{cache}_{outcome}"], help=f"{description} {outcome}", node=node)
+
+    def _finish(self, trace: Trace, duration: float, status: str) -> None:
+        self.metrics.inc("requests_total", help="Traced requests", workflow=trace.name, status=status)
+        self.metrics.observe("request_duration_seconds", duration, help="Request wall time", workflow=trace.name)
+        if self.jsonl_path:
+            line = json.dumps(trace.to_dict(duration, status), default=str)
+            with self._write_lock, open(self.jsonl_path, "a") as f:
+                f.write(line + "\n")
+
+
+def instrument(tracer: Optional[Tracer], name: str, node: Any) -> Any:
+    """Wrap a graph node with the tracer, or return it unchanged when tracing is off."""
+    return tracer.wrap_node(name, node) if tracer else node
+
+
+def instrument_branch(tracer: Optional[Tracer], name: str, condition: Callable[[dict], str]) -> Callable[[dict], str]:
+    """Wrap a conditional edge with the tracer, or return it unchanged when tracing is off."""
+    return tracer.wrap_branch(name, condition) if tracer else condition
+
+
+def trace_request(tracer: Optional[Tracer], name: str, **attributes: Any):
+    """Trace a request with the tracer, yielding the graph run config (empty when tracing is off)."""
+    return tracer.trace(name, **attributes) if tracer else contextlib.nullcontext({})
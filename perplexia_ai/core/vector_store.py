@@ -0,0 +1,376 @@
+"""NumPy-backed vector store with an optional memory-mapped on-disk index.
+
+All chunk embeddings live in a single contiguous matrix of unit vectors, so a
+query is scored with one matrix-vector product and the top k are picked with
+``argpartition``. A saved index is opened with ``mmap_mode="r"``, which lets
+several server processes share the same pages from the OS page cache instead
+of each holding a private copy.
+
+Every save writes a complete new version of the index into its own
+subdirectory and then switches a single pointer file to it, so a concurrent
+``load`` sees either the old version or the new one, never a mix.
+"""
+
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+SUPPORTED_DTYPES = ("float32", "float16", "int8")
+
+# Rows scored per block, bounds the temporary float32 copy made for
+# quantized matrices
+SCORE_BLOCK_ROWS = 65536
+
+# Pointer file naming the current version of a saved index
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+# Files of the flat layout written before indexes were versioned
+_LEGACY_FILES = ("vectors.npy", "scales.npy", "docstore.json")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class NumpyVectorStore(VectorStore):
+    """Vector store keeping every embedding in one contiguous NumPy matrix.
+
+    Vectors are L2-normalised on insert, so the score returned for a document
+    is its cosine similarity with the query. Storage can be quantized to
+    float16, or to int8 with a per-row scale, to cut memory and disk use.
+    """
+
+    def __init__(self, embedding: Embeddings, dtype: str = "float32") -> None:
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unknown dtype: {dtype}. Choose from: {list(SUPPORTED_DTYPES)}")
+        self.embedding = embedding
+        self.dtype = dtype
+        self.ids: List[str] = []
+        self.documents: List[Document] = []
+        self._vectors: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def copy(self) -> "NumpyVectorStore":
+        """Return a copy that can be modified without affecting this store.
+
+        Arrays are shared rather than duplicated; every modification replaces
+        them with new arrays, so readers of the original are never disturbed.
+        """
+        store = type(self)(self.embedding, dtype=self.dtype)
+        store.ids = list(self.ids)
+        store.documents = list(self.documents)
+        store._vectors, store._scales = self._vectors, self._scales
+        return store
+
+    def astype(self, dtype: str) -> "NumpyVectorStore":
+        """Return a copy of the store with its vectors converted to another storage dtype.
+
+        Quantized vectors are converted back from their quantized values, so
+        no embedding calls are needed.
+        """
+        store = type(self)(self.embedding, dtype=dtype)
+        store.ids = list(self.ids)
+        store.documents = list(self.documents)
+        if self._vectors is not None:
+            vectors = np.asarray(self._vectors, dtype=np.float32)
+            if self._scales is not None:
+                vectors = vectors * self._scales[:, None]
+            store._vectors, store._scales = store._quantize(_normalize(vectors))
+        return store
+
+    def _quantize(self, vectors: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Convert unit vectors to the storage dtype."""
+        if self.dtype == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            quantized = np.round(vectors / scales[:, None]).astype(np.int8)
+            return quantized, scales.astype(np.float32)
+        return vectors.astype(self.dtype), None
+
+    def add_vectors(
+        self,
+        vectors: Sequence[Sequence[float]],
+        documents: Sequence[Document],
+        ids: Optional[Sequence[str]] = None,
+    ) -> List[str]:
+        """Add precomputed embeddings together with their documents.
+
+        Args:
+            vectors: One embedding per document
+            documents: The documents the embeddings were computed from
+            ids: Optional ids, generated if not provided
+
+        Returns:
+            List[str]: The ids of the added documents
+        """
+        if ids is None:
+            ids = [doc.id or str(uuid.uuid4()) for doc in documents]
+        ids = list(ids)
+        if not ids:
+            return []
+        matrix = _normalize(np.asarray(vectors, dtype=np.float32))
+        quantized, scales = self._quantize(matrix)
+
+        if self._vectors is None:
+            self._vectors, self._scales = quantized, scales
+        else:
+            self._vectors = np.concatenate([self._vectors, quantized])
+            if scales is not None:
+                self._scales = np.concatenate([self._scales, scales])
+
+        self.ids.extend(ids)
+        self.documents.extend(
+            Document(id=doc_id, page_content=doc.page_content, metadata=dict(doc.metadata))
+            for doc_id, doc in zip(ids, documents)
+        )
+        return ids
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        documents = [Document(page_content=text, metadata=metadata) for text, metadata in zip(texts, metadatas)]
+        vectors = self.embedding.embed_documents(texts)
+        return self.add_vectors(vectors, documents, ids)
+
+    async def aadd_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        documents = [Document(page_content=text, metadata=metadata) for text, metadata in zip(texts, metadatas)]
+        vectors = await self.embedding.aembed_documents(texts)
+        return self.add_vectors(vectors, documents, ids)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids or self._vectors is None:
+            return False
+        to_delete = set(ids)
+        keep = [i for i, doc_id in enumerate(self.ids) if doc_id not in to_delete]
+        if len(keep) == len(self.ids):
+            return False
+        self._vectors = self._vectors[keep]
+        if self._scales is not None:
+            self._scales = self._scales[keep]
+        self.ids = [self.ids[i] for i in keep]
+        self.documents = [self.documents[i] for i in keep]
+        return True
+
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        positions = {doc_id: i for i, doc_id in enumerate(self.ids)}
+        return [self.documents[positions[doc_id]] for doc_id in ids if doc_id in positions]
+
+    def _scores(self, query: np.ndarray) -> np.ndarray:
+        """Cosine similarity of the query against every stored vector."""
+        query = _normalize(query.reshape(1, -1).astype(np.float32))[0]
+        if self.dtype == "float32":
+            return self._vectors @ query
+        scores = np.empty(len(self.ids), dtype=np.float32)
+        for start in range(0, len(self.ids), SCORE_BLOCK_ROWS):
+            block = self._vectors[start:start + SCORE_BLOCK_ROWS].astype(np.float32)
+            scores[start:start + SCORE_BLOCK_ROWS] = block @ query
+        if self._scales is not None:
+            scores *= self._scales
+        return scores
+
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Callable[[Document], bool]] = None,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        """Return the k documents most similar to the embedding, with scores.
+
+        Args:
+            embedding: The query embedding
+            k: Number of documents to return
+            filter: Optional predicate documents must satisfy
+
+        Returns:
+            List[Tuple[Document, float]]: Documents and their cosine similarity
+        """
+        if self._vectors is None or not self.ids:
+            return []
+        scores = self._scores(np.asarray(embedding, dtype=np.float32))
+        if filter is not None:
+            allowed = np.fromiter((filter(doc) for doc in self.documents), dtype=bool, count=len(self.documents))
+            scores = np.where(allowed, scores, -np.inf)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.documents[i], float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        embedding = self.embedding.embed_query(query)
+        return self.similarity_search_with_score_by_vector(embedding, k, **kwargs)
+
+    async def asimilarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        embedding = await self.embedding.aembed_query(query)
+        return self.similarity_search_with_score_by_vector(embedding, k, **kwargs)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, **kwargs)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    async def asimilarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in await self.asimilarity_search_with_score(query, k, **kwargs)]
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        # Scores are already cosine similarities
+        return lambda score: score
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        dtype: str = "float32",
+        **kwargs: Any,
+    ) -> "NumpyVectorStore":
+        store = cls(embedding, dtype=dtype)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
+
+    def save(self, path: str) -> None:
+        """Persist the index to a directory.
+
+        The files are written into a new version subdirectory and the
+        CURRENT pointer file is then replaced atomically. The previous
+        version is kept for processes that are loading it right now, and
+        older ones are deleted; processes that already have one mapped keep
+        a valid view, since the mapping outlives the file's name.
+
+        Args:
+            path: Directory to write the index to
+        """
+        directory = Path(path)
+        version = uuid.uuid4().hex
+        version_dir = directory / VERSIONS_DIR / version
+        version_dir.mkdir(parents=True)
+        dimension = 0 if self._vectors is None else self._vectors.shape[1]
+        vectors = self._vectors if self._vectors is not None else np.empty((0, 0), dtype=self.dtype)
+        # Only int8 indexes have scales, so a version never holds a stale scales file
+        arrays = {"vectors.npy": vectors}
+        if self._scales is not None:
+            arrays["scales.npy"] = self._scales
+        for name, array in arrays.items():
+            with open(version_dir / name, "wb") as f:
+                np.save(f, np.ascontiguousarray(array))
+
+        docstore = {
+            "dtype": self.dtype,
+            "dimension": int(dimension),
+            "documents": [
+                {"id": doc_id, "page_content": doc.page_content, "metadata": doc.metadata}
+                for doc_id, doc in zip(self.ids, self.documents)
+            ],
+        }
+        with open(version_dir / "docstore.json", "w") as f:
+            json.dump(docstore, f)
+
+        previous = self._current_version(directory)
+        tmp_path = directory / f".{CURRENT_FILE}.tmp"
+        tmp_path.write_text(version)
+        os.replace(tmp_path, directory / CURRENT_FILE)
+
+        keep = {version, previous}
+        for old in (directory / VERSIONS_DIR).iterdir():
+            if old.name not in keep:
+                shutil.rmtree(old, ignore_errors=True)
+        for name in _LEGACY_FILES:
+            (directory / name).unlink(missing_ok=True)
+
+    @staticmethod
+    def _current_version(directory: Path) -> Optional[str]:
+        """The version the CURRENT pointer names, or None for an unversioned index."""
+        try:
+            return (directory / CURRENT_FILE).read_text().strip()
+        except FileNotFoundError:
+            return None
+
+    @classmethod
+    def load(cls, path: str, embedding: Embeddings, mmap: bool = True, dtype: Optional[str] = None) -> "NumpyVectorStore":
+        """Load the current version of an index written by ``save``.
+
+        Args:
+            path: Directory the index was saved to
+            embedding: Embedding model used for queries
+            mmap: Map the vector file read-only instead of reading it into memory
+            dtype: Storage dtype the index must have, or None to accept any
+
+        Returns:
+            NumpyVectorStore: The loaded vector store
+
+        Raises:
+            ValueError: If the index was saved with a different dtype than the one requested
+        """
+        directory = Path(path)
+        while True:
+            version = cls._current_version(directory)
+            version_dir = directory / VERSIONS_DIR / version if version else directory
+            try:
+                store = cls._load_version(version_dir, embedding, mmap)
+                break
+            except FileNotFoundError:
+                # A save replaced the version being read and removed it; read the new one
+                if cls._current_version(directory) == version:
+                    raise
+        if dtype is not None and store.dtype != dtype:
+            raise ValueError(f"Index in {path} stores {store.dtype} vectors, not {dtype}")
+        return store
+
+    @classmethod
+    def _load_version(cls, directory: Path, embedding: Embeddings, mmap: bool) -> "NumpyVectorStore":
+        with open(directory / "docstore.json") as f:
+            docstore = json.load(f)
+        store = cls(embedding, dtype=docstore["dtype"])
+        mmap_mode = "r" if mmap else None
+        store.ids = [doc["id"] for doc in docstore["documents"]]
+        store.documents = [
+            Document(id=doc["id"], page_content=doc["page_content"], metadata=doc["metadata"])
+            for doc in docstore["documents"]
+        ]
+        if store.ids:
+            store._vectors = np.load(directory / "vectors.npy", mmap_mode=mmap_mode)
+            if store.dtype == "int8":
+                store._scales = np.load(directory / "scales.npy", mmap_mode=mmap_mode)
+        return store
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        """Check whether a saved index exists at the given directory."""
+        return (Path(path) / CURRENT_FILE).exists() or (Path(path) / "docstore.json").exists()
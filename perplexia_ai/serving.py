@@ -0,0 +1,364 @@
+"""Multi-process serving with a shared read-only document index.
+
+The supervisor process builds the document index once into an index
+directory. It then starts one worker process per core. Each worker opens
+that index read-only and serves the chat UI on its own local port. Only the
+vectors are shared: they are memory-mapped, so every worker reads the same
+pages of the OS page cache instead of holding a private copy. The chunk
+texts and the BM25 index are still read into the memory of every worker.
+
+Clients connect to a single entry point: ``StickyProxy``, an HTTP reverse
+proxy running in the supervisor. Gradio keeps the state of a session, such
+as its queued events and their result streams, in the worker that created
+it, so the proxy sends every request of a session to the same worker,
+chosen by a hash of the session hash Gradio puts in the request. Requests
+without one go by client address. For example::
+
+    python run.py --week 2 --mode part2 --workers 4 --port 7860
+
+serves on http://127.0.0.1:7860 with workers on ports 7861 to 7864.
+
+Workers report on a queue once they are ready to serve. The supervisor then
+starts the proxy, prints a readiness line, touches an optional ready file,
+and periodically prints the memory of every worker. RSS counts shared pages
+once per process; PSS splits them between the processes that share them, so
+it shows what each worker really costs.
+
+A worker that exits is restarted on its port. Until it is ready again the
+proxy sends its sessions to the other workers; those sessions start over,
+since their Gradio state died with the worker.
+"""
+
+import inspect
+import json
+import multiprocessing
+import os
+import queue
+import re
+import signal
+import sys
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from dotenv import load_dotenv
+from starlette.background import BackgroundTask
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, StreamingResponse
+
+from perplexia_ai.core.registry import load_implementation
+
+
+def process_memory(pid: int) -> Dict[str, int]:
+    """Return the RSS, PSS and shared/private memory of a process in bytes.
+
+    Reads /proc/<pid>/smaps_rollup, so it is only available on Linux; returns
+    an empty dict elsewhere or if the process is gone.
+    """
+    fields = {"Rss": "rss", "Pss": "pss", "Shared_Clean": "shared_clean", "Shared_Dirty": "shared_dirty",
+              "Private_Clean": "private_clean", "Private_Dirty": "private_dirty"}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            lines = f.readlines()
+    except OSError:
+        return {}
+    memory = {}
+    for line in lines:
+        name, _, value = line.partition(":")
+        if name in fields:
+            memory[fields[name]] = int(value.split()[0]) * 1024
+    return memory
+
+
+def format_memory(memory: Dict[str, int]) -> str:
+    if not memory:
+        return "memory unavailable"
+    shared = memory.get("shared_clean", 0) + memory.get("shared_dirty", 0)
+    return f"rss {memory['rss'] / 2 ** 20:.0f} MiB, pss {memory['pss'] / 2 ** 20:.0f} MiB, shared {shared / 2 ** 20:.0f} MiB"
+
+
+def uses_index(week: int, mode: str) -> bool:
+    """Whether a mode's implementation keeps a document index that workers can share."""
+    return "index_dir" in inspect.signature(load_implementation(week, mode).initialize).parameters
+
+
+def build_index(week: int, mode: str, index_dir: str) -> None:
+    """Build or update the document index of a mode once, before workers start."""
+    chat = load_implementation(week, mode)()
+    chat.initialize(index_dir=index_dir)
+    if hasattr(chat, "stop_watching"):
+        chat.stop_watching()
+
+
+# Headers that only apply to one connection and must not be forwarded
+_HOP_BY_HOP = {"connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+               "te", "trailer", "transfer-encoding", "upgrade"}
+_SESSION_IN_PATH = re.compile(r"/heartbeat/([^/]+)")
+
+
+def session_of(request: Request, body: bytes) -> Optional[str]:
+    """Return the Gradio session hash of a request, if it carries one.
+
+    Gradio sends it as a query parameter (queue/data), in the path
+    (heartbeat) or in the JSON body (queue/join, cancel).
+    """
+    if "session_hash" in request.query_params:
+        return request.query_params["session_hash"]
+    match = _SESSION_IN_PATH.search(request.url.path)
+    if match:
+        return match.group(1)
+    if body[:1] == b"{":
+        try:
+            session = json.loads(body).get("session_hash")
+        except ValueError:
+            return None
+        return session if isinstance(session, str) else None
+    return None
+
+
+async def _relay(upstream: httpx.Response):
+    """Yield a worker's response body, ending it early if the worker goes away."""
+    try:
+        async for chunk in upstream.aiter_raw():
+            yield chunk
+    except httpx.TransportError:
+        # Event streams such as heartbeats end here; the browser reconnects
+        return
+
+
+class StickyProxy:
+    """ASGI reverse proxy sending every Gradio session to the same worker.
+
+    Workers marked unavailable, e.g. while they restart, get no requests;
+    their sessions are spread over the other workers.
+
+    Args:
+        upstreams: Base URLs of the workers, e.g. http://127.0.0.1:7861
+        client: HTTP client used to reach the workers, defaults to one without read timeout
+    """
+
+    def __init__(self, upstreams: List[str], client: Optional[httpx.AsyncClient] = None):
+        if not upstreams:
+            raise ValueError("At least one upstream is required")
+        self.upstreams = [upstream.rstrip("/") for upstream in upstreams]
+        # Result streams stay open for as long as an answer takes
+        self.client = client or httpx.AsyncClient(timeout=httpx.Timeout(10.0, read=None))
+        # Replaced as a whole, so the proxy's event loop always reads a consistent set
+        self.unavailable = frozenset()
+        self._lock = threading.Lock()
+
+    def set_available(self, upstream: str, available: bool) -> None:
+        """Mark a worker as able to take requests or not; safe to call from any thread."""
+        with self._lock:
+            if available:
+                self.unavailable = self.unavailable - {upstream}
+            else:
+                self.unavailable = self.unavailable | {upstream}
+
+    def route(self, request: Request, body: bytes, exclude: Tuple[str, ...] = ()) -> str:
+        """Pick the worker for a request by its session hash, or else by client address.
+
+        A session keeps its worker while that one is available, and is hashed
+        over the remaining workers otherwise. If no worker is available the
+        session's own worker is returned, to fail there.
+        """
+        key = zlib.crc32((session_of(request, body) or (request.client.host if request.client else "")).encode())
+        upstream = self.upstreams[key % len(self.upstreams)]
+        skip = self.unavailable | set(exclude)
+        if upstream not in skip:
+            return upstream
+        available = [other for other in self.upstreams if other not in skip]
+        return available[key % len(available)] if available else upstream
+
+    async def __call__(self, scope: dict, receive, send) -> None:
+        if scope["type"] != "http":
+            # Gradio's chat UI only uses HTTP; lifespan and websocket scopes are not proxied
+            return
+        request = Request(scope, receive)
+        body = await request.body()
+        headers = [(name, value) for name, value in request.headers.raw if name.decode().lower() not in _HOP_BY_HOP]
+        target = self.route(request, body)
+        try:
+            try:
+                upstream = await self._send(request, target, headers, body)
+            except httpx.ConnectError:
+                # The request never reached the worker, so it is safe to send it to another one
+                retry = self.route(request, body, exclude=(target,))
+                if retry == target:
+                    raise
+                upstream = await self._send(request, retry, headers, body)
+        except httpx.TransportError as e:
+            await PlainTextResponse(f"Worker unavailable: {type(e).__name__}", status_code=502)(scope, receive, send)
+            return
+        response = StreamingResponse(
+            _relay(upstream),
+            status_code=upstream.status_code,
+            headers={name: value for name, value in upstream.headers.multi_items() if name.lower() not in _HOP_BY_HOP},
+            background=BackgroundTask(upstream.aclose),
+        )
+        await response(scope, receive, send)
+
+    async def _send(self, request: Request, upstream: str, headers: list, body: bytes) -> httpx.Response:
+        url = upstream + request.url.path
+        if request.url.query:
+            url += "?" + request.url.query
+        return await self.client.send(
+            self.client.build_request(request.method, url, headers=headers, content=body), stream=True,
+        )
+
+
+def _start_proxy(proxy: StickyProxy, host: str, port: int):
+    """Serve a StickyProxy in a background thread, returning the uvicorn server."""
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(proxy, host=host, port=port, lifespan="off", log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True, name="proxy")
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError(f"Proxy failed to listen on {host}:{port}")
+        time.sleep(0.05)
+    return server
+
+
+def _worker_main(worker: int, week: int, mode: str, host: str, port: int,
+                 initialize_kwargs: Dict[str, Any], ready: multiprocessing.Queue) -> None:
+    """Entry point of a worker process: initialize, start serving, report ready."""
+    load_dotenv()
+    start = time.perf_counter()
+    from perplexia_ai.app import create_demo
+
+    try:
+        demo = create_demo(week=week, mode_str=mode, initialize_kwargs=initialize_kwargs)
+        demo.launch(server_name=host, server_port=port, prevent_thread_lock=True)
+    except Exception as e:
+        ready.put({"worker": worker, "pid": os.getpid(), "error": f"{type(e).__name__}: {e}"})
+        raise
+    ready.put({"worker": worker, "pid": os.getpid(), "port": port, "startup_s": time.perf_counter() - start})
+    demo.block_thread()
+
+
+def serve(
+    week: int,
+    mode: str,
+    workers: int = 2,
+    host: str = "127.0.0.1",
+    port: int = 7860,
+    worker_base_port: Optional[int] = None,
+    index_dir: str = ".cache/index",
+    ready_file: Optional[str] = None,
+    ready_timeout: float = 600.0,
+    report_interval: float = 60.0,
+    restart_delay: float = 5.0,
+) -> None:
+    """Run a mode in several worker processes sharing one read-only index, behind one entry point.
+
+    Args:
+        week: Which week to run
+        mode: Which part of the week to run
+        workers: Number of worker processes, 0 for one per CPU core
+        host: Interface the entry point listens on
+        port: Port of the entry point that clients connect to
+        worker_base_port: Port of the first worker, defaults to port + 1;
+                          worker i listens on worker_base_port + i on 127.0.0.1
+        index_dir: Directory of the shared document index
+        ready_file: Optional path created once every worker is ready
+        ready_timeout: Seconds to wait for the workers to become ready
+        report_interval: Seconds between memory reports, 0 to report only once
+        restart_delay: Least number of seconds between two starts of a worker,
+                       so a worker that keeps failing does not spin
+    """
+    load_dotenv()
+    workers = workers or os.cpu_count() or 1
+    worker_base_port = worker_base_port or port + 1
+    initialize_kwargs: Dict[str, Any] = {}
+    if uses_index(week, mode):
+        start = time.perf_counter()
+        build_index(week, mode, index_dir)
+        print(f"Index ready in {index_dir} after {time.perf_counter() - start:.1f}s")
+        initialize_kwargs = {"index_dir": index_dir, "read_only_index": True}
+
+    # Spawned workers start from a clean interpreter instead of a fork of the supervisor's threads
+    context = multiprocessing.get_context("spawn")
+    ready = context.Queue()
+    upstreams = [f"http://127.0.0.1:{worker_base_port + worker}" for worker in range(workers)]
+    processes: List[multiprocessing.Process] = []
+    started_at: List[float] = []
+
+    def start_worker(worker: int) -> multiprocessing.Process:
+        process = context.Process(
+            target=_worker_main,
+            args=(worker, week, mode, "127.0.0.1", worker_base_port + worker, initialize_kwargs, ready),
+            name=f"perplexia-worker-{worker}",
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    for worker in range(workers):
+        processes.append(start_worker(worker))
+        started_at.append(time.monotonic())
+
+    # Stop the workers on SIGTERM too, not only on Ctrl-C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    proxy = None
+    try:
+        deadline = time.monotonic() + ready_timeout
+        for _ in range(workers):
+            try:
+                status = ready.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                raise RuntimeError(f"Workers not ready after {ready_timeout:.0f}s")
+            if "error" in status:
+                raise RuntimeError(f"Worker {status['worker']} failed to start: {status['error']}")
+            print(f"Worker {status['worker']} (pid {status['pid']}) ready on http://127.0.0.1:{status['port']} "
+                  f"after {status['startup_s']:.1f}s")
+        sticky = StickyProxy(upstreams)
+        proxy = _start_proxy(sticky, host, port)
+        print(f"All {workers} workers ready, serving on http://{host}:{port}")
+        if ready_file:
+            Path(ready_file).touch()
+
+        next_report = time.monotonic()
+        restart_at: Dict[int, float] = {}
+        while True:
+            now = time.monotonic()
+            if now >= next_report:
+                for worker, process in enumerate(processes):
+                    state = format_memory(process_memory(process.pid)) if process.is_alive() else f"exited ({process.exitcode})"
+                    print(f"Worker {worker} (pid {process.pid}): {state}")
+                next_report = now + report_interval if report_interval else float("inf")
+            for worker, process in enumerate(processes):
+                if process.is_alive():
+                    continue
+                if worker not in restart_at:
+                    print(f"Worker {worker} (pid {process.pid}) exited ({process.exitcode}), restarting it")
+                    sticky.set_available(upstreams[worker], False)
+                    restart_at[worker] = max(now, started_at[worker] + restart_delay)
+                if now >= restart_at[worker]:
+                    del restart_at[worker]
+                    processes[worker] = start_worker(worker)
+                    started_at[worker] = now
+            try:
+                status = ready.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            if "error" in status:
+                print(f"Worker {status['worker']} failed to start: {status['error']}")
+            else:
+                sticky.set_available(upstreams[status["worker"]], True)
+                print(f"Worker {status['worker']} (pid {status['pid']}) ready again after {status['startup_s']:.1f}s")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if proxy is not None:
+            proxy.should_exit = True
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join(timeout=10)
+        if ready_file and os.path.exists(ready_file):
+            os.remove(ready_file)
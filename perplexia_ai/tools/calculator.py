@@ -1,25 +1,190 @@
+import ast
+import math
+import operator
 import re
-from typing import Union
+from decimal import MAX_PREC, Context, Decimal, localcontext
+from fractions import Fraction
+from functools import lru_cache
+from typing import Callable, Union
+
+# Limits that keep a single tool call cheap
+MAX_EXPRESSION_LENGTH = 1000
+MAX_NODES = 200
+MAX_EXPONENT = 1000
+# Largest power or exact result, in bits of its numerator or denominator (about
+# 4,200 digits, within Python's default limit for converting ints to str)
+MAX_RESULT_BITS = 14_000
+
+_SAFE_CHARACTERS = re.compile(r'^[\d\s\+\-\*\/\(\)\.]*$')
+
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Pow: operator.pow,
+}
+
+_UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+
+class ExpressionTooLarge(ValueError):
+    """Raised when an expression exceeds the calculator's size limits."""
+
+
+def _bit_size(value: Union[int, float, Fraction]) -> int:
+    """Approximate log2 of a value's magnitude, or of its denominator if that is larger."""
+    if isinstance(value, Fraction):
+        return max(value.numerator.bit_length(), value.denominator.bit_length())
+    if isinstance(value, int):
+        return value.bit_length()
+    if value == 0 or not math.isfinite(value):
+        return 0
+    return abs(math.frexp(value)[1])
+
+
+def _power(base, exponent):
+    if abs(exponent) > MAX_EXPONENT:
+        raise ExpressionTooLarge("Exponent too large")
+    # Checked before computing, since big integer powers cannot be interrupted
+    if abs(exponent) * _bit_size(base) > MAX_RESULT_BITS:
+        raise ExpressionTooLarge("Result too large")
+    return base ** exponent
+
+
+def _compile_node(node: ast.AST, source: str, exact: bool) -> Callable[[], Union[float, Fraction]]:
+    """Turn a validated AST node into a closure that computes its value."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        # Parse the literal from source so exact mode sees 0.1 as 1/10, not the nearest float
+        value = Fraction(ast.get_source_segment(source, node)) if exact else float(node.value)
+        return lambda: value
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        left = _compile_node(node.left, source, exact)
+        right = _compile_node(node.right, source, exact)
+        op = _power if isinstance(node.op, ast.Pow) else _BINARY_OPERATORS[type(node.op)]
+        return lambda: op(left(), right())
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+        operand = _compile_node(node.operand, source, exact)
+        op = _UNARY_OPERATORS[type(node.op)]
+        return lambda: op(operand())
+    raise SyntaxError("Unsupported expression")
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(expression: str, exact: bool = False) -> Callable[[], Union[float, Fraction]]:
+    """Parse an arithmetic expression once into a reusable compiled form.
+
+    Args:
+        expression: A string containing a mathematical expression
+        exact: Compute with Fractions instead of floats
+
+    Returns:
+        Callable: A function of no arguments returning the expression's value
+
+    Raises:
+        SyntaxError: If the expression is not plain arithmetic
+        ExpressionTooLarge: If the expression exceeds the size limits
+    """
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionTooLarge("Expression too long")
+    tree = ast.parse(expression, mode="eval")
+    if sum(1 for _ in ast.walk(tree)) > MAX_NODES:
+        raise ExpressionTooLarge("Expression too complex")
+    return _compile_node(tree.body, expression, exact)
+
+
+def _exact_result(value: Union[float, Fraction]) -> Union[int, Decimal, Fraction, float]:
+    """Present an exact-mode value without losing digits.
+
+    Integers come back as int, rationals with a finite decimal expansion as
+    an exact Decimal and other rationals as a Fraction. Floats, from powers
+    with a fractional exponent, are approximate and stay floats.
+    """
+    if isinstance(value, float):
+        return value
+    value = Fraction(value)
+    if _bit_size(value) > MAX_RESULT_BITS:
+        raise ExpressionTooLarge("Result too large")
+    if value.denominator == 1:
+        return value.numerator
+    # The decimal expansion ends if the denominator only has the prime factors 2 and 5
+    twos = (value.denominator & -value.denominator).bit_length() - 1
+    rest, fives = value.denominator >> twos, 0
+    while rest % 5 == 0:
+        rest, fives = rest // 5, fives + 1
+    if rest != 1:
+        return value
+    places = max(twos, fives)
+    with localcontext(Context(prec=MAX_PREC)):
+        return Decimal(value.numerator * 10 ** places // value.denominator).scaleb(-places)
+
+
+def format_result(result: Union[int, float, Decimal, Fraction, str]) -> str:
+    """Format a result for a reader, such as an LLM, marking approximate values.
+
+    Decimals are written out without exponent notation, fractions as n/d,
+    and floats get an "(approximate)" note, since they are only accurate to
+    float precision.
+    """
+    if isinstance(result, Decimal):
+        return format(result, "f")
+    if isinstance(result, float):
+        return f"{result!r} (approximate)"
+    return str(result)
+
+
+@lru_cache(maxsize=4096)
+def _evaluate(expression: str, exact: bool) -> Union[int, float, Decimal, Fraction, str]:
+    try:
+        # Only allow safe characters (digits, basic operators, parentheses, spaces)
+        if not _SAFE_CHARACTERS.match(expression):
+            return "Error: Invalid characters in expression"
+
+        result = compile_expression(expression, exact)()
+        return _exact_result(result) if exact else float(result)
+
+    except ZeroDivisionError:
+        return "Error: Division by zero"
+    except ExpressionTooLarge as e:
+        return f"Error: {str(e)}"
+    except (SyntaxError, TypeError, NameError):
+        return "Error: Invalid expression"
+    except Exception as e:
+        return f"Error: {str(e)}"
+
 
 class Calculator:
     """A simple calculator tool for evaluating basic arithmetic expressions."""
-    
+
     @staticmethod
-    def evaluate_expression(expression: str) -> Union[float, str]:
+    def evaluate_expression(expression: str, exact: bool = False) -> Union[int, float, Decimal, Fraction, str]:
         """Evaluate a basic arithmetic expression.
-        
-        Supports only basic arithmetic operations (+, -, *, /) and parentheses.
-        Returns an error message if the expression is invalid or cannot be 
+
+        Supports only basic arithmetic operations (+, -, *, /, //, **) and
+        parentheses. Expressions are parsed into an AST, checked against an
+        operator whitelist and size limits, and compiled once; parsed and
+        evaluated expressions are kept in an LRU cache, so repeated
+        sub-expressions within a conversation cost a dictionary lookup.
+        Returns an error message if the expression is invalid or cannot be
         evaluated safely.
-        
+
         Args:
             expression: A string containing a mathematical expression
                        e.g. "5 + 3" or "10 * (2 + 3)"
-            
+            exact: Compute with exact rationals, so decimal inputs do not pick
+                   up binary rounding errors, and return an int, a Decimal
+                   with every digit of a finite decimal expansion, or a
+                   Fraction; results of fractional powers are still floats
+
         Returns:
-            Union[float, str]: The result of the evaluation, or an error message
-                              if the expression is invalid
-        
+            Union[int, float, Decimal, Fraction, str]: The result of the evaluation,
+                                                       or an error message if the
+                                                       expression is invalid
+
         Examples:
             >>> Calculator.evaluate_expression("5 + 3")
             8.0
@@ -27,24 +192,10 @@ class Calculator:
             50.0
             >>> Calculator.evaluate_expression("15 / 3")
             5.0
+            >>> Calculator.evaluate_expression("0.1 + 0.2", exact=True)
+            Decimal('0.3')
+            >>> Calculator.evaluate_expression("1 / 3", exact=True)
+            Fraction(1, 3)
         """
-        try:
-            # Clean up the expression
-            expression = expression.strip()
-            
-            # Only allow safe characters (digits, basic operators, parentheses, spaces)
-            if not re.match(r'^[\d\s\+\-\*\/\(\)\.]*$', expression):
-                return "Error: Invalid characters in expression"
-            
-            # Evaluate the expression
-            result = eval(expression, {"__builtins__": {}})
-            
-            # Convert to float and handle division by zero
-            return float(result)
-            
-        except ZeroDivisionError:
-            return "Error: Division by zero"
-        except (SyntaxError, TypeError, NameError):
-            return "Error: Invalid expression"
-        except Exception as e:
-            return f"Error: {str(e)}"
+        # Clean up the expression
+        return _evaluate(expression.strip(), exact)
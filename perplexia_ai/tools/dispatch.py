@@ -0,0 +1,89 @@
+"""Concurrent execution of the tool calls in one assistant turn."""
+
+import asyncio
+import time
+from concurrent.futures import Executor, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List
+
+from langchain_core.messages import ToolMessage
+from langchain_core.messages.tool import ToolCall
+from langchain_core.tools import BaseTool
+
+
+def _error_message(tool_call: ToolCall, error: str) -> ToolMessage:
+    return ToolMessage(content=f"Error: {error}", tool_call_id=tool_call["id"], name=tool_call["name"], status="error")
+
+
+def _result_message(tool_call: ToolCall, result: Any) -> ToolMessage:
+    return ToolMessage(content=str(result), tool_call_id=tool_call["id"], name=tool_call["name"])
+
+
+def run_tool_calls(
+    tool_calls: List[ToolCall],
+    tool_map: Dict[str, BaseTool],
+    executor: Executor,
+    timeout: float = 30.0,
+) -> List[ToolMessage]:
+    """Run tool calls concurrently on an executor.
+
+    Every call gets its own timeout, measured from when the calls are
+    dispatched. A call that fails, times out or names an unknown tool yields
+    an error ToolMessage instead of stalling or aborting the others.
+
+    Args:
+        tool_calls: Tool calls from one assistant message
+        tool_map: Tools by name
+        executor: Bounded executor the calls are run on
+        timeout: Seconds each call may take
+
+    Returns:
+        List[ToolMessage]: One message per tool call, in the order of tool_calls
+    """
+    deadline = time.monotonic() + timeout
+    futures = [
+        executor.submit(tool_map[call["name"]].invoke, call["args"]) if call["name"] in tool_map else None
+        for call in tool_calls
+    ]
+    messages = []
+    for call, future in zip(tool_calls, futures):
+        if future is None:
+            messages.append(_error_message(call, f"Unknown tool {call['name']}"))
+            continue
+        try:
+            result = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            messages.append(_result_message(call, result))
+        except FutureTimeoutError:
+            future.cancel()
+            messages.append(_error_message(call, f"Tool {call['name']} timed out after {timeout}s"))
+        except Exception as e:
+            messages.append(_error_message(call, str(e)))
+    return messages
+
+
+async def arun_tool_calls(
+    tool_calls: List[ToolCall],
+    tool_map: Dict[str, BaseTool],
+    timeout: float = 30.0,
+) -> List[ToolMessage]:
+    """Async version of run_tool_calls, running the calls as asyncio tasks.
+
+    Args:
+        tool_calls: Tool calls from one assistant message
+        tool_map: Tools by name
+        timeout: Seconds each call may take
+
+    Returns:
+        List[ToolMessage]: One message per tool call, in the order of tool_calls
+    """
+    async def run(call: ToolCall) -> ToolMessage:
+        if call["name"] not in tool_map:
+            return _error_message(call, f"Unknown tool {call['name']}")
+        try:
+            result = await asyncio.wait_for(tool_map[call["name"]].ainvoke(call["args"]), timeout)
+            return _result_message(call, result)
+        except asyncio.TimeoutError:
+            return _error_message(call, f"Tool {call['name']} timed out after {timeout}s")
+        except Exception as e:
+            return _error_message(call, str(e))
+
+    return list(await asyncio.gather(*(run(call) for call in tool_calls)))
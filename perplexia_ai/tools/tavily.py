@@ -0,0 +1,73 @@
+"""Tavily search API wrapper on shared, pooled HTTP connections.
+
+The stock wrapper posts every search with a bare ``requests.post`` and opens
+a new aiohttp session per async search, so no connection is ever reused.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import httpx
+from langchain_community.utilities.tavily_search import TAVILY_API_URL, TavilySearchAPIWrapper
+from pydantic import PrivateAttr
+
+
+class PooledTavilySearchAPIWrapper(TavilySearchAPIWrapper):
+    """Tavily API wrapper sending its requests through shared, pooled httpx clients."""
+
+    _client: Optional[httpx.Client] = PrivateAttr(default=None)
+    _async_client: Optional[httpx.AsyncClient] = PrivateAttr(default=None)
+
+    def __init__(self, client: httpx.Client, async_client: httpx.AsyncClient, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._client = client
+        self._async_client = async_client
+
+    def _search_params(self, query: str, max_results: Optional[int], search_depth: Optional[str],
+                       include_domains: Optional[List[str]], exclude_domains: Optional[List[str]],
+                       include_answer: Optional[bool], include_raw_content: Optional[bool],
+                       include_images: Optional[bool]) -> Dict[str, Any]:
+        return {
+            "api_key": self.tavily_api_key.get_secret_value(),
+            "query": query,
+            "max_results": max_results,
+            "search_depth": search_depth,
+            "include_domains": include_domains or [],
+            "exclude_domains": exclude_domains or [],
+            "include_answer": include_answer,
+            "include_raw_content": include_raw_content,
+            "include_images": include_images,
+        }
+
+    def raw_results(
+        self,
+        query: str,
+        max_results: Optional[int] = 5,
+        search_depth: Optional[str] = "advanced",
+        include_domains: Optional[List[str]] = None,
+        exclude_domains: Optional[List[str]] = None,
+        include_answer: Optional[bool] = False,
+        include_raw_content: Optional[bool] = False,
+        include_images: Optional[bool] = False,
+    ) -> Dict:
+        params = self._search_params(query, max_results, search_depth, include_domains, exclude_domains,
+                                     include_answer, include_raw_content, include_images)
+        response = self._client.post(f"{TAVILY_API_URL}/search", json=params)
+        response.raise_for_status()
+        return response.json()
+
+    async def raw_results_async(
+        self,
+        query: str,
+        max_results: Optional[int] = 5,
+        search_depth: Optional[str] = "advanced",
+        include_domains: Optional[List[str]] = None,
+        exclude_domains: Optional[List[str]] = None,
+        include_answer: Optional[bool] = False,
+        include_raw_content: Optional[bool] = False,
+        include_images: Optional[bool] = False,
+    ) -> Dict:
+        params = self._search_params(query, max_results, search_depth, include_domains, exclude_domains,
+                                     include_answer, include_raw_content, include_images)
+        response = await self._async_client.post(f"{TAVILY_API_URL}/search", json=params)
+        response.raise_for_status()
+        return response.json()
@@ -0,0 +1,311 @@
+"""Local fast-path query classifier.
+
+A multinomial naive Bayes model over word unigrams and bigrams, trained on a
+small set of labeled example questions. It classifies a question in
+microseconds, so QueryUnderstandingChat only needs the LLM routing chain for
+questions the local model is not confident about.
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+CATEGORIES = ["factual", "analytical", "comparison", "definition", "maths", "general"]
+
+LABELED_EXAMPLES: List[Tuple[str, str]] = [
+    ("What is the tallest mountain in the world?", "factual"),
+    ("Who wrote Pride and Prejudice?", "factual"),
+    ("When did the Second World War end?", "factual"),
+    ("How many moons does Jupiter have?", "factual"),
+    ("How many bones are in the human body?", "factual"),
+    ("What year did the Berlin Wall fall?", "factual"),
+    ("Which country has the largest population?", "factual"),
+    ("Where is the Eiffel Tower located?", "factual"),
+    ("What is the boiling point of water at sea level?", "factual"),
+    ("How many legs does a spider have?", "factual"),
+    ("Who was the first person to walk on the moon?", "factual"),
+    ("What is the chemical formula of table salt?", "factual"),
+    ("How does a refrigerator keep food cold?", "analytical"),
+    ("Why is the sky blue?", "analytical"),
+    ("Explain how vaccines train the immune system", "analytical"),
+    ("How do airplanes stay in the air?", "analytical"),
+    ("Why do stock markets crash?", "analytical"),
+    ("Explain the causes of inflation", "analytical"),
+    ("How does the internet route packets between computers?", "analytical"),
+    ("Why did the Roman Empire decline?", "analytical"),
+    ("How does a nuclear reactor generate electricity?", "analytical"),
+    ("Explain why ice floats on water", "analytical"),
+    ("What is the difference between a virus and a bacterium?", "comparison"),
+    ("Compare electric cars and petrol cars", "comparison"),
+    ("What are the differences between TCP and UDP?", "comparison"),
+    ("How does Rust compare to C++?", "comparison"),
+    ("Which is better, renting or buying a house?", "comparison"),
+    ("What's the difference between weather and climate?", "comparison"),
+    ("Contrast capitalism with socialism", "comparison"),
+    ("React vs Vue for a small project", "comparison"),
+    ("Compare the pros and cons of iOS and Android", "comparison"),
+    ("How is a crocodile different from an alligator?", "comparison"),
+    ("Define entropy", "definition"),
+    ("Define a peninsula", "definition"),
+    ("What does the term mitosis mean?", "definition"),
+    ("What is the meaning of democracy?", "definition"),
+    ("What is a black hole?", "definition"),
+    ("What is machine learning?", "definition"),
+    ("What is an algorithm?", "definition"),
+    ("Give me the definition of osmosis", "definition"),
+    ("What is blockchain?", "definition"),
+    ("Define recursion", "definition"),
+    ("What is 12 * 7?", "maths"),
+    ("What is 3 + 5?", "maths"),
+    ("Calculate 15% of 240", "maths"),
+    ("What is 45 divided by 9?", "maths"),
+    ("How much is 123.5 multiplied by 42?", "maths"),
+    ("What is 2 to the power of 10?", "maths"),
+    ("If I buy 3 apples at $2 each, how much do I pay?", "maths"),
+    ("What is 20% of 150?", "maths"),
+    ("Split a $90 bill between 3 people", "maths"),
+    ("What is 1000 - 375?", "maths"),
+    ("If I have two dozen pencils, how many pencils do I have?", "maths"),
+    ("What is the square root of 144?", "maths"),
+    ("What is the best programming language to learn?", "general"),
+    ("Can you recommend a good book?", "general"),
+    ("Tell me a joke", "general"),
+    ("What should I cook for dinner tonight?", "general"),
+    ("What is the best laptop for students?", "general"),
+    ("Help me write a birthday message", "general"),
+    ("Which framework is best for web development?", "general"),
+    ("Give me tips for a job interview", "general"),
+    ("What is the best way to learn guitar?", "general"),
+    ("Suggest a name for my cat", "general"),
+]
+
+# Labeled questions phrased independently of the training examples, used only
+# to measure the classifier and calibrate its confidence threshold
+HELD_OUT_EXAMPLES: List[Tuple[str, str]] = [
+    ("Who painted the Mona Lisa?", "factual"),
+    ("What is the capital city of Australia?", "factual"),
+    ("In which year did Columbus reach the Americas?", "factual"),
+    ("How many players are on a football team?", "factual"),
+    ("What language is spoken in Brazil?", "factual"),
+    ("Who discovered penicillin?", "factual"),
+    ("What is the longest river in Africa?", "factual"),
+    ("How many days are in 3 years?", "maths"),
+    ("Which planet is closest to the sun?", "factual"),
+    ("What currency does Japan use?", "factual"),
+    ("Who is the author of the Harry Potter books?", "factual"),
+    ("Where do penguins live in the wild?", "factual"),
+    ("What is the population of Canada?", "factual"),
+    ("Why do leaves change colour in autumn?", "analytical"),
+    ("How do noise cancelling headphones work?", "analytical"),
+    ("Explain how a bill becomes law in the United States", "analytical"),
+    ("Why are bees important for agriculture?", "analytical"),
+    ("How does compound interest grow savings over time?", "analytical"),
+    ("Why does the moon have phases?", "analytical"),
+    ("Explain the greenhouse effect", "analytical"),
+    ("How do search engines rank web pages?", "analytical"),
+    ("Why did the dinosaurs go extinct?", "analytical"),
+    ("How does caffeine affect the brain?", "analytical"),
+    ("Explain why the economy goes through cycles", "analytical"),
+    ("What is the difference between a lake and a pond?", "comparison"),
+    ("Compare coffee and tea for health", "comparison"),
+    ("Is Linux or Windows better for programming?", "comparison"),
+    ("How do cats differ from dogs as pets?", "comparison"),
+    ("Python vs JavaScript for beginners", "comparison"),
+    ("What are the differences between stocks and bonds?", "comparison"),
+    ("Compare solar power with wind power", "comparison"),
+    ("Which is healthier, running or swimming?", "comparison"),
+    ("What's the difference between a latte and a cappuccino?", "comparison"),
+    ("How does SQL compare to NoSQL databases?", "comparison"),
+    ("Define gravity", "definition"),
+    ("What does photosynthesis mean?", "definition"),
+    ("What is a sonnet?", "definition"),
+    ("What is inflation?", "definition"),
+    ("Define the word ephemeral", "definition"),
+    ("What is an ecosystem?", "definition"),
+    ("What is a prime number?", "definition"),
+    ("What does GDP stand for?", "definition"),
+    ("What is quantum computing?", "definition"),
+    ("Give me a definition of metaphor", "definition"),
+    ("What is 18 times 24?", "maths"),
+    ("Calculate 7 squared", "maths"),
+    ("What is 250 / 5?", "maths"),
+    ("What is 12.5% of 80?", "maths"),
+    ("If a shirt costs $40 and is 25% off, what is the price?", "maths"),
+    ("Add 348 and 1275", "maths"),
+    ("How many minutes are in 5 hours?", "maths"),
+    ("What is 9 - 14?", "maths"),
+    ("Divide 1000 by 8", "maths"),
+    ("If 4 friends share 3 pizzas equally, how much does each get?", "maths"),
+    ("What is 3 to the power of 4?", "maths"),
+    ("Which movie should I watch this weekend?", "general"),
+    ("Write a short poem about the sea", "general"),
+    ("How can I be more productive at work?", "general"),
+    ("Recommend a holiday destination in Europe", "general"),
+    ("What is the best phone to buy right now?", "general"),
+    ("Can you help me plan a party?", "general"),
+    ("What hobbies could I pick up?", "general"),
+    ("Give me ideas for a science project", "general"),
+    ("Tell me something interesting", "general"),
+    ("What should I name my startup?", "general"),
+]
+
+# Cardinal number words; ordinals such as "first" are left out on purpose
+_NUMBER_WORDS = {
+    "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten", "eleven", "twelve",
+    "twenty", "thirty", "forty", "fifty", "hundred", "thousand", "million", "billion", "dozen",
+    "half", "percent",
+}
+
+_TOKEN = re.compile(r"\$?\d+(?:\.\d+)?%?|[a-z]+|[+\-*/%^=]")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split a question into lexical features.
+
+    Numbers, percentages, currency amounts and arithmetic operators are
+    mapped to placeholder tokens, and word bigrams plus the opening words
+    are added because phrasing ("define", "how does", "difference between")
+    carries most of the signal.
+    """
+    words = []
+    for token in _TOKEN.findall(text.lower()):
+        if token[0].isdigit() or token[0] == "$":
+            words.append("<pct>" if token.endswith("%") else "<num>")
+        elif token in "+-*/%^=":
+            words.append("<op>")
+        else:
+            words.append(token)
+    features = list(words)
+    features.extend(f"{a}_{b}" for a, b in zip(words, words[1:]))
+    if words:
+        features.append(f"^{words[0]}")
+    if len(words) > 1:
+        features.append(f"^{words[0]}_{words[1]}")
+    return features
+
+
+def mentions_numbers(text: str) -> bool:
+    """Whether a question contains a number, a number word or an arithmetic operator."""
+    for token in _TOKEN.findall(text.lower()):
+        if token[0].isdigit() or token[0] == "$" or token in "+-*/%^=" or token in _NUMBER_WORDS:
+            return True
+    return False
+
+
+class LocalQueryClassifier:
+    """Multinomial naive Bayes classifier for question categories.
+
+    A question that mentions numbers is only ever classified as maths: the
+    model is not trusted to route such a question away from the calculator,
+    so anything else is left to the LLM.
+
+    Args:
+        threshold: Minimum posterior probability for a prediction to be trusted
+        alpha: Additive smoothing for feature counts
+    """
+
+    def __init__(self, threshold: float = 0.9, alpha: float = 0.5):
+        self.threshold = threshold
+        self.alpha = alpha
+        self.log_priors: Dict[str, float] = {}
+        self.log_likelihoods: Dict[str, Dict[str, float]] = {}
+        self.log_unseen: Dict[str, float] = {}
+        self.vocabulary: set = set()
+
+    @classmethod
+    def default(cls, threshold: Optional[float] = None) -> "LocalQueryClassifier":
+        """Create a classifier trained on the built-in labeled examples.
+
+        Args:
+            threshold: Confidence threshold, or None to calibrate it on the
+                       held-out examples
+        """
+        classifier = cls().fit(LABELED_EXAMPLES)
+        if threshold is None:
+            classifier.calibrate(HELD_OUT_EXAMPLES)
+        else:
+            classifier.threshold = threshold
+        return classifier
+
+    def fit(self, examples: Iterable[Tuple[str, str]]) -> "LocalQueryClassifier":
+        """Train on (question, category) pairs."""
+        label_counts: Counter = Counter()
+        feature_counts: Dict[str, Counter] = defaultdict(Counter)
+        for question, label in examples:
+            label_counts[label] += 1
+            feature_counts[label].update(tokenize(question))
+
+        vocabulary = {feature for counts in feature_counts.values() for feature in counts}
+        total = sum(label_counts.values())
+        for label, count in label_counts.items():
+            denominator = sum(feature_counts[label].values()) + self.alpha * len(vocabulary)
+            self.log_priors[label] = math.log(count / total)
+            self.log_likelihoods[label] = {
+                feature: math.log((n + self.alpha) / denominator) for feature, n in feature_counts[label].items()
+            }
+            self.log_unseen[label] = math.log(self.alpha / denominator)
+        self.vocabulary = vocabulary
+        return self
+
+    def predict_proba(self, question: str) -> Dict[str, float]:
+        """Return the posterior probability of every category."""
+        features = [feature for feature in tokenize(question) if feature in self.vocabulary]
+        scores = {}
+        for label, prior in self.log_priors.items():
+            likelihoods = self.log_likelihoods[label]
+            unseen = self.log_unseen[label]
+            scores[label] = prior + sum(likelihoods.get(feature, unseen) for feature in features)
+        best = max(scores.values())
+        exp_scores = {label: math.exp(score - best) for label, score in scores.items()}
+        total = sum(exp_scores.values())
+        return {label: score / total for label, score in exp_scores.items()}
+
+    def predict(self, question: str) -> Tuple[str, float]:
+        """Return the most likely category and its probability."""
+        probabilities = self.predict_proba(question)
+        label = max(probabilities, key=probabilities.get)
+        return label, probabilities[label]
+
+    def classify(self, question: str) -> Optional[str]:
+        """Return the category if the model is confident enough, otherwise None."""
+        label, confidence = self.predict(question)
+        if label != "maths" and mentions_numbers(question):
+            return None
+        return label if confidence >= self.threshold else None
+
+    def evaluate(self, examples: Iterable[Tuple[str, str]]) -> Dict[str, float]:
+        """Measure the classifier on labeled examples it was not trained on.
+
+        Returns:
+            Dict: coverage, the share of questions classified locally, and
+                  precision, the share of those classified correctly
+        """
+        examples = list(examples)
+        answered = [(self.classify(question), label) for question, label in examples]
+        answered = [(predicted, label) for predicted, label in answered if predicted is not None]
+        correct = sum(predicted == label for predicted, label in answered)
+        return {
+            "coverage": len(answered) / len(examples) if examples else 0.0,
+            "precision": correct / len(answered) if answered else 1.0,
+        }
+
+    def calibrate(self, examples: Iterable[Tuple[str, str]], min_precision: float = 1.0) -> float:
+        """Set the lowest threshold at which local answers on the examples reach min_precision.
+
+        Every confidence seen on the examples is tried as a candidate threshold,
+        so the result is the one that answers the most questions locally
+        without going below the required precision.
+
+        Returns:
+            float: The new threshold
+        """
+        examples = list(examples)
+        candidates = sorted({self.predict(question)[1] for question, _ in examples})
+        self.threshold = 1.0 + 1e-9  # nothing is confident enough
+        for candidate in candidates:
+            self.threshold = candidate
+            if self.evaluate(examples)["precision"] >= min_precision:
+                return self.threshold
+        self.threshold = 1.0 + 1e-9
+        return self.threshold
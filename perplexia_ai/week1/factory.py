@@ -3,10 +3,8 @@
 from enum import Enum
 from typing import Type
 
+from perplexia_ai.core import registry
 from perplexia_ai.core.chat_interface import ChatInterface
-from perplexia_ai.week1.part1 import QueryUnderstandingChat
-from perplexia_ai.week1.part2 import BasicToolsChat
-from perplexia_ai.week1.part3 import MemoryChat
 
 class Week1Mode(Enum):
     """Modes corresponding to the three parts of Week 1 assignment."""
@@ -26,15 +24,7 @@ def create_chat_implementation(mode: Week1Mode) -> ChatInterface:
     Raises:
         ValueError: If mode is not recognized
     """
-    implementations = {
-        Week1Mode.PART1_QUERY_UNDERSTANDING: QueryUnderstandingChat,
-        Week1Mode.PART2_BASIC_TOOLS: BasicToolsChat,
-        Week1Mode.PART3_MEMORY: MemoryChat
-    }
-    
-    if mode not in implementations:
+    if not isinstance(mode, Week1Mode):
         raise ValueError(f"Unknown mode: {mode}")
     
-    implementation_class = implementations[mode]
-    implementation = implementation_class()
-    return implementation 
\ No newline at end of file
+    return registry.create_chat_implementation(1, mode.value)
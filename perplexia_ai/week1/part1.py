@@ -6,16 +6,22 @@ This implementation focuses on:
 - Present information professionally
 """
 
-from typing import Dict, List, Optional
-from functools import partial
-from langchain.chat_models import init_chat_model
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Union
+from langchain_core.caches import BaseCache
 from langchain_core.prompts import PromptTemplate, ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnableLambda
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import RunnableLambda, RunnablePassthrough
 from langchain_core.tools import tool
-from langchain_core.messages import ToolMessage, BaseMessage, AIMessage, HumanMessage
+from langchain_core.messages import BaseMessage
 from perplexia_ai.core.chat_interface import ChatInterface
-from perplexia_ai.tools.calculator import Calculator
+from perplexia_ai.core.clients import get_clients
+from perplexia_ai.core.history import HistoryManager, message_from_dict
+from perplexia_ai.core.llm_cache import with_cache
+from perplexia_ai.tools.calculator import Calculator, format_result
+from perplexia_ai.tools.dispatch import arun_tool_calls, run_tool_calls
+from perplexia_ai.week1.classifier import LocalQueryClassifier
 
 ROUTING_PROMPT = PromptTemplate.from_template("""
 You are a query classifier. Given a question, you should classify it into one of five categories:
@@ -122,74 +128,154 @@ Question: {question}
 Answer:"""
 
 @tool
-def calculate(expression: str) -> float | str:
+def calculate(expression: str) -> str:
     """This tool will take a mathematical expression and return the resultant value of the expression
 
     In case of an error, it will return the error message instead"""
     print("Tool called!", expression)
-    output = Calculator.evaluate_expression(expression)
+    output = format_result(Calculator.evaluate_expression(expression, exact=True))
     print(output)
     return output
 
 TOOL_MAP = {"calculate": calculate}
 
 def messages_from_dict(messages: list[dict[str, str]]) -> list[BaseMessage]:
-    def convert_msg(message: dict[str, str]) -> BaseMessage:
-        match message:
-            case {"role": "user", "content": content}:
-                return HumanMessage(content=content)
-            case {"role": "assistant", "content": content}:
-                return AIMessage(content=content)
-            case _:
-                return HumanMessage(content="")
-    return [convert_msg(msg) for msg in messages]
+    return [message_from_dict(msg) for msg in messages]
 
 class QueryUnderstandingChat(ChatInterface):
     """Week 1 Part 1 implementation focusing on query understanding."""
 
-    def initialize(self) -> None:
+    def initialize(
+        self,
+        local_routing: bool = True,
+        classifier_threshold: Optional[float] = None,
+        llm: Optional[BaseChatModel] = None,
+        max_tool_iterations: int = 5,
+        tool_concurrency: int = 4,
+        tool_timeout: float = 30.0,
+        history_token_budget: int = 2000,
+        summarize_history: bool = True,
+        llm_cache: Optional[Union[BaseCache, str]] = None,
+    ) -> None:
         """Initialize components for query understanding.
 
+        All chains are built here once and reused by every request.
+
+        Args:
+            local_routing: Classify questions with the local classifier first and
+                           only call the LLM routing chain when it is unsure
+            classifier_threshold: Confidence the local classifier needs before its
+                                  category is used instead of the LLM routing chain,
+                                  or None for the threshold calibrated on its
+                                  held-out examples
+            llm: Chat model to use, defaults to the shared gpt-4o-mini client
+            max_tool_iterations: Maximum number of tool-calling rounds for a maths
+                                 question before the model must answer
+            tool_concurrency: Maximum number of tool calls run at once
+            tool_timeout: Seconds a single tool call may take before an error is
+                          returned to the model in its place
+            history_token_budget: Approximate number of tokens of recent chat
+                                  history put in the prompt
+            summarize_history: Fold turns older than the history budget into a
+                               running summary, refreshed in the background,
+                               instead of dropping them
+            llm_cache: Optional LangChain cache, or the path of a SQLite cache
+                       file, for the LLM routing call, so repeated questions
+                       are routed without an API call
+
         Students should:
         - Initialize the chat model
         - Set up query classification prompts
         - Set up response formatting prompts
         """
-        self.llm = init_chat_model("gpt-4o-mini", model_provider="openai")
-        self.routing_chain = ROUTING_PROMPT | self.llm | StrOutputParser()
+        self.llm = llm or get_clients().chat_model("gpt-4o-mini")
+        self.max_tool_iterations = max_tool_iterations
+        self.tool_timeout = tool_timeout
+        self.tool_executor = ThreadPoolExecutor(max_workers=tool_concurrency, thread_name_prefix="tool")
+        self.history = HistoryManager(self.llm if summarize_history else None, max_tokens=history_token_budget)
+        self.routing_chain = ROUTING_PROMPT | with_cache(self.llm, llm_cache) | StrOutputParser()
+        self.classifier = LocalQueryClassifier.default(classifier_threshold) if local_routing else None
+        self.fast_routing_chain = RunnableLambda(self._route, afunc=self._aroute)
         self.response_prompts = {
             "factual": FACTUAL_PROMPT,
             "analytical": ANALYTICAL_PROMPT,
             "comparison": COMPARISION_PROMPT,
             "definition": DEFINITION_PROMPT,
+            "general": GENERAL_PROMPT,
+        }
+        self.answer_chains = {
+            category: ChatPromptTemplate.from_messages([("placeholder", "{history}"), ("user", prompt)]) | self.llm | StrOutputParser()
+            for category, prompt in self.response_prompts.items()
         }
 
-    def process_message(self, message: str, chat_history: Optional[List[Dict[str, str]]] = None) -> str:
+        # Tool results are appended through the scratchpad placeholder, so the prompt is compiled only once
+        math_prompt = ChatPromptTemplate.from_messages([("placeholder", "{history}"), ("user", MATHS_PROMPT), ("placeholder", "{scratchpad}")])
+        self.math_chain = math_prompt | self.llm.bind_tools([calculate])
+        self.math_final_chain = math_prompt | self.llm.bind_tools([calculate], tool_choice="none")
+        self.answer_chains["maths"] = RunnableLambda(self._calculator_loop, afunc=self._acalculator_loop)
+
+        self.chain = RunnablePassthrough.assign(category=self.fast_routing_chain) | RunnableLambda(self._select_answer_chain)
+
+    def _route(self, info: dict) -> str:
+        """Classify the question locally, falling back to the LLM routing chain when unsure."""
+        category = self.classifier.classify(info["question"]) if self.classifier else None
+        return category or self.routing_chain.invoke(info)
+
+    async def _aroute(self, info: dict) -> str:
+        """Async version of _route."""
+        category = self.classifier.classify(info["question"]) if self.classifier else None
+        return category or await self.routing_chain.ainvoke(info)
+
+    def _select_answer_chain(self, info: dict):
+        """Return the answer chain for the question's category."""
+        return self.answer_chains.get(info["category"].strip().lower(), self.answer_chains["general"])
+
+    def _calculator_loop(self, info: dict) -> str:
+        """Answer a maths question, calling the calculator tool until the model is done."""
+        inputs = {"question": info["question"], "history": info["history"], "scratchpad": []}
+        for _ in range(self.max_tool_iterations):
+            response = self.math_chain.invoke(inputs)
+            inputs["scratchpad"].append(response)
+            if not response.tool_calls:
+                break
+            inputs["scratchpad"].extend(run_tool_calls(response.tool_calls, TOOL_MAP, self.tool_executor, self.tool_timeout))
+        else:
+            # Out of tool-calling rounds, the model has to answer with what it has
+            response = self.math_final_chain.invoke(inputs)
+
+        return StrOutputParser().invoke(response)
+
+    async def _acalculator_loop(self, info: dict) -> str:
+        """Async version of _calculator_loop."""
+        inputs = {"question": info["question"], "history": info["history"], "scratchpad": []}
+        for _ in range(self.max_tool_iterations):
+            response = await self.math_chain.ainvoke(inputs)
+            inputs["scratchpad"].append(response)
+            if not response.tool_calls:
+                break
+            inputs["scratchpad"].extend(await arun_tool_calls(response.tool_calls, TOOL_MAP, self.tool_timeout))
+        else:
+            response = await self.math_final_chain.ainvoke(inputs)
+
+        return StrOutputParser().invoke(response)
+
+    def process_message(self, message: str, chat_history: Optional[List[Dict[str, str]]] = None, session_id: Optional[str] = None) -> str:
         """Evaluates the query intent and routes the query to a specific prompt based on the intent category"""
-
-        def calculator_loop(info, history):
-            question = info["question"]
-            messages: list = [("placeholder", "{history}"), ("user", MATHS_PROMPT)]
-            while True:
-                chain = ChatPromptTemplate.from_messages(messages) | self.llm.bind_tools([calculate])
-                response = chain.invoke({"question": question, "history": history})
-                messages.append(response)
-                if not response.tool_calls:
-                    break
-                for tool_call in response.tool_calls:
-                    tool_result = TOOL_MAP[tool_call["name"]].invoke(tool_call["args"])
-                    messages.append(ToolMessage(content=str(tool_result), tool_call_id=tool_call["id"]))
-
-            return StrOutputParser().invoke(response)
-
-        def route_question(info: dict[str, str], history):
-            match info["category"]:
-                case "maths":
-                    return RunnableLambda(partial(calculator_loop, history=history))
-                case _ as category:
-                    messages: list = [("placeholder", "{history}"), ("user", self.response_prompts.get(category, GENERAL_PROMPT))]
-                    return ChatPromptTemplate.from_messages(messages) | self.llm | StrOutputParser()
-
-        history = messages_from_dict(chat_history) if chat_history else []
-        full_chain = {"category": self.routing_chain, "question": lambda x: x["question"], "history": lambda x: x["history"] } | RunnableLambda(partial(route_question, history=history))
-        return full_chain.invoke({"question": message, "history": history})
+        history = self.history.get(chat_history, session_id)
+        return self.chain.invoke({"question": message, "history": history})
+
+    async def aprocess_message(self, message: str, chat_history: Optional[List[Dict[str, str]]] = None, session_id: Optional[str] = None) -> str:
+        """Async version of process_message, using async LLM calls throughout"""
+        history = self.history.get(chat_history, session_id)
+        return await self.chain.ainvoke({"question": message, "history": history})
+
+    def stream_message(self, message: str, chat_history: Optional[List[Dict[str, str]]] = None, session_id: Optional[str] = None):
+        """Stream the answer tokens of the selected category chain"""
+        history = self.history.get(chat_history, session_id)
+        yield from self.chain.stream({"question": message, "history": history})
+
+    async def astream_message(self, message: str, chat_history: Optional[List[Dict[str, str]]] = None, session_id: Optional[str] = None):
+        """Async version of stream_message"""
+        history = self.history.get(chat_history, session_id)
+        async for chunk in self.chain.astream({"question": message, "history": history}):
+            yield chunk
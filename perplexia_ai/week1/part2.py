@@ -32,7 +32,7 @@ class BasicToolsChat(ChatInterface):
         # TODO: Students implement initialization
         pass
     
-    def process_message(self, message: str, chat_history: Optional[List[Dict[str, str]]] = None) -> str:
+    def process_message(self, message: str, chat_history: Optional[List[Dict[str, str]]] = None, session_id: Optional[str] = None) -> str:
         """Process a message with calculator support.
         
         Students should:
@@ -43,6 +43,7 @@ class BasicToolsChat(ChatInterface):
         Args:
             message: The user's input message
             chat_history: Not used in Part 2
+            session_id: Not used in Part 2
             
         Returns:
             str: The assistant's response
@@ -34,7 +34,7 @@ class MemoryChat(ChatInterface):
         # TODO: Students implement initialization
         pass
     
-    def process_message(self, message: str, chat_history: Optional[List[Dict[str, str]]] = None) -> str:
+    def process_message(self, message: str, chat_history: Optional[List[Dict[str, str]]] = None, session_id: Optional[str] = None) -> str:
         """Process a message with memory and tools.
         
         Students should:
@@ -46,6 +46,7 @@ class MemoryChat(ChatInterface):
         Args:
             message: The user's input message
             chat_history: List of previous chat messages
+            session_id: Optional id of the conversation, e.g. Gradio's session hash
             
         Returns:
             str: The assistant's response
@@ -2,10 +2,8 @@
 
 from enum import Enum
 
+from perplexia_ai.core import registry
 from perplexia_ai.core.chat_interface import ChatInterface
-from perplexia_ai.week2.part1 import WebSearchChat
-from perplexia_ai.week2.part2 import DocumentRAGChat
-from perplexia_ai.week2.part3 import CorrectiveRAGChat
 
 class Week2Mode(Enum):
     """Modes corresponding to the three parts of Week 2 assignment."""
@@ -25,15 +23,7 @@ def create_chat_implementation(mode: Week2Mode) -> ChatInterface:
     Raises:
         ValueError: If mode is not recognized
     """
-    implementations = {
-        Week2Mode.PART1_WEB_SEARCH: WebSearchChat,
-        Week2Mode.PART2_DOCUMENT_RAG: DocumentRAGChat,
-        Week2Mode.PART3_CORRECTIVE_RAG: CorrectiveRAGChat
-    }
-    
-    if mode not in implementations:
+    if not isinstance(mode, Week2Mode):
         raise ValueError(f"Unknown mode: {mode}")
     
-    implementation_class = implementations[mode]
-    implementation = implementation_class()
-    return implementation 
\ No newline at end of file
+    return registry.create_chat_implementation(2, mode.value)
@@ -8,16 +8,22 @@ This implementation focuses on:
 
 from typing import Dict, List, Optional, TypedDict
 
-from langchain_community.tools import TavilySearchResults
-from langchain_openai import ChatOpenAI
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import Runnable, RunnableLambda
 from langgraph.graph import START, END, StateGraph
 from perplexia_ai.core.chat_interface import ChatInterface
+from perplexia_ai.core.clients import get_clients
+from perplexia_ai.core.search_cache import CachedSearchTool, SearchCache
+from perplexia_ai.core.search_results import SearchResultNormalizer
+from perplexia_ai.core.streaming import astream_node_tokens, stream_node_tokens
+from perplexia_ai.core.tracing import Tracer, instrument, trace_request
 
 
 class WebSearchState(TypedDict):
     """State for the web search workflow."""
     query: str  # User's search query
-    search_results: List[Dict]  # Raw search results from Tavily
+    search_results: List[Dict]  # Search results from Tavily, normalized in lean mode
+    answer: str  # LLM answer without the sources section
     formatted_response: str  # Final response with citations
 
 # NOTE: The TODOs are only a direction for you to start with.
@@ -29,31 +35,57 @@ class WebSearchChat(ChatInterface):
         self.llm = None
         self.search_tool = None
         self.graph = None
+        self.tracer = None
     
-    def initialize(self) -> None:
+    def initialize(
+        self,
+        search_cache_dir: Optional[str] = None,
+        llm: Optional[BaseChatModel] = None,
+        search_tool: Optional[Runnable] = None,
+        tracer: Optional[Tracer] = None,
+        lean_search: bool = True,
+        search_payload_bytes: int = 16384,
+    ) -> None:
         """Initialize components for web search.
         
+        Args:
+            search_cache_dir: Optional directory to persist cached search results
+            llm: Chat model to use, defaults to the shared gpt-4o-mini client
+            search_tool: Search tool to use, defaults to the shared Tavily client
+            tracer: Optional tracer recording per-node timings, LLM calls and
+                    search cache hits
+            lean_search: Request search results without raw page content, and keep
+                         only the title, url and trimmed content of each distinct
+                         URL in the graph state and the search cache
+            search_payload_bytes: Budget for the size of the search results of
+                                  one request in lean mode
+        
         Students should:
         - Initialize the LLM
         - Set up Tavily search tool
         - Create a LangGraph for web search workflow
         """
         # Initialize LLM
-        self.llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.1)
-        self.search_tool = TavilySearchResults(
-            max_results=5,
-            include_answer=True,
-            include_raw_content=True,
-            include_images=False,
-            search_depth="advanced"
+        self.llm = llm or get_clients().chat_model("gpt-4o-mini", temperature=0.1)
+        self.search_tool = CachedSearchTool(
+            search_tool or get_clients().search_tool(
+                max_results=5,
+                include_answer=True,
+                include_raw_content=not lean_search,
+                include_images=False,
+                search_depth="advanced"
+            ),
+            SearchCache(cache_dir=search_cache_dir),
+            normalize=SearchResultNormalizer(max_bytes=search_payload_bytes) if lean_search else None,
         )
+        self.tracer = tracer
         
         # Create the graph
         graph = StateGraph(WebSearchState)
         
         # Define nodes
-        graph.add_node("search", self._create_search_node())
-        graph.add_node("process_results", self._create_process_results_node())
+        graph.add_node("search", instrument(tracer, "search", self._create_search_node()))
+        graph.add_node("process_results", instrument(tracer, "process_results", self._create_process_results_node()))
         
         # Define the edges and the graph structure
         graph.add_edge(START, "search")
@@ -69,50 +101,67 @@ class WebSearchChat(ChatInterface):
             query = state["query"]
             search_results = self.search_tool.invoke(query)
             return {"search_results": search_results}
-        return search_node
-    
-    def _create_process_results_node(self):
-        """Create a node that processes and formats search results."""
-        def process_results_node(state: WebSearchState) -> WebSearchState:
+        
+        async def asearch_node(state: WebSearchState) -> WebSearchState:
             query = state["query"]
-            search_results = state["search_results"]
-            
-            # Format search results for LLM
-            context = "Based on the following search results, provide a comprehensive answer:\n\n"
-            sources = []
-            
-            for i, result in enumerate(search_results, 1):
-                title = result.get("title", "")
-                content = result.get("content", "")
-                url = result.get("url", "")
-                
-                context += f"[{i}] {title}\n{content}\n\n"
-                sources.append(f"[{i}] {url}")
+            search_results = await self.search_tool.ainvoke(query)
+            return {"search_results": search_results}
+        
+        return RunnableLambda(search_node, afunc=asearch_node, name="search_node")
+    
+    def _build_prompt(self, state: WebSearchState) -> tuple[str, list[str]]:
+        """Build the LLM prompt and the list of sources from the search results."""
+        query = state["query"]
+        search_results = state["search_results"]
+        
+        # Format search results for LLM
+        context = "Based on the following search results, provide a comprehensive answer:\n\n"
+        sources = []
+        
+        for i, result in enumerate(search_results, 1):
+            title = result.get("title", "")
+            content = result.get("content", "")
+            url = result.get("url", "")
             
-            # Create prompt for LLM
-            prompt = f"""Question: {query}
+            context += f"[{i}] {title}\n{content}\n\n"
+            sources.append(f"[{i}] {url}")
+        
+        # Create prompt for LLM
+        prompt = f"""Question: {query}
 
 {context}
 
 Please provide a clear, accurate answer based on the search results above. Reference the sources using [1], [2], etc. when appropriate."""
-            
-            # Get LLM response
-            llm_response = self.llm.invoke(prompt).content
-            
+        return prompt, sources
+    
+    def _create_process_results_node(self):
+        """Create a node that processes and formats search results."""
+        def format_response(llm_response: str, sources: list[str]) -> str:
             # Format final response with sources
             sources_section = "\n\nSOURCES:\n" + "\n".join(sources)
-            formatted_response = llm_response + sources_section
+            return llm_response + sources_section
+        
+        def process_results_node(state: WebSearchState) -> WebSearchState:
+            prompt, sources = self._build_prompt(state)
             
-            return {"formatted_response": formatted_response}
+            # Get LLM response
+            llm_response = self.llm.invoke(prompt).content
+            return {"answer": llm_response, "formatted_response": format_response(llm_response, sources)}
+        
+        async def aprocess_results_node(state: WebSearchState) -> WebSearchState:
+            prompt, sources = self._build_prompt(state)
+            llm_response = (await self.llm.ainvoke(prompt)).content
+            return {"answer": llm_response, "formatted_response": format_response(llm_response, sources)}
         
-        return process_results_node
+        return RunnableLambda(process_results_node, afunc=aprocess_results_node, name="process_results_node")
     
-    def process_message(self, message: str, chat_history: Optional[List[Dict[str, str]]] = None) -> str:
+    def process_message(self, message: str, chat_history: Optional[List[Dict[str, str]]] = None, session_id: Optional[str] = None) -> str:
         """Process a message using web search.
         
         Args:
             message: The user's input message
             chat_history: Previous conversation history
+            session_id: Not used, this mode keeps no per-session state
             
         Returns:
             str: The assistant's response with search results
@@ -121,11 +170,83 @@ Please provide a clear, accurate answer based on the search results above. Refer
         initial_state = {
             "query": message,
             "search_results": [],
+            "answer": "",
             "formatted_response": ""
         }
         
         # 2. Run the graph
-        final_state = self.graph.invoke(initial_state)
+        with trace_request(self.tracer, "web_search") as config:
+            final_state = self.graph.invoke(initial_state, config)
         
         # 3. Extract the response
-        return final_state["formatted_response"] 
+        return final_state["formatted_response"]
+    
+    async def aprocess_message(self, message: str, chat_history: Optional[List[Dict[str, str]]] = None, session_id: Optional[str] = None) -> str:
+        """Async version of process_message, running the graph with ainvoke.
+        
+        Args:
+            message: The user's input message
+            chat_history: Previous conversation history
+            session_id: Not used, this mode keeps no per-session state
+            
+        Returns:
+            str: The assistant's response with search results
+        """
+        initial_state = {
+            "query": message,
+            "search_results": [],
+            "answer": "",
+            "formatted_response": ""
+        }
+        with trace_request(self.tracer, "web_search") as config:
+            final_state = await self.graph.ainvoke(initial_state, config)
+        return final_state["formatted_response"]
+    
+    def stream_message(self, message: str, chat_history: Optional[List[Dict[str, str]]] = None, session_id: Optional[str] = None):
+        """Stream the answer tokens from process_results, then the sources section.
+        
+        Args:
+            message: The user's input message
+            chat_history: Previous conversation history
+            session_id: Not used, this mode keeps no per-session state
+            
+        Yields:
+            str: Successive chunks of the response
+        """
+        initial_state = {"query": message, "search_results": [], "answer": "", "formatted_response": ""}
+        streamed = False
+        with trace_request(self.tracer, "web_search", streaming=True) as config:
+            for item in stream_node_tokens(self.graph, initial_state, "process_results", config):
+                if isinstance(item, str):
+                    streamed = True
+                    yield item
+                else:
+                    yield self._remaining_response(item, streamed)
+    
+    async def astream_message(self, message: str, chat_history: Optional[List[Dict[str, str]]] = None, session_id: Optional[str] = None):
+        """Async version of stream_message.
+        
+        Args:
+            message: The user's input message
+            chat_history: Previous conversation history
+            session_id: Not used, this mode keeps no per-session state
+            
+        Yields:
+            str: Successive chunks of the response
+        """
+        initial_state = {"query": message, "search_results": [], "answer": "", "formatted_response": ""}
+        streamed = False
+        with trace_request(self.tracer, "web_search", streaming=True) as config:
+            async for item in astream_node_tokens(self.graph, initial_state, "process_results", config):
+                if isinstance(item, str):
+                    streamed = True
+                    yield item
+                else:
+                    yield self._remaining_response(item, streamed)
+    
+    @staticmethod
+    def _remaining_response(state: WebSearchState, streamed: bool) -> str:
+        """Return the part of the final response not yet streamed to the caller."""
+        if streamed:
+            return state["formatted_response"][len(state["answer"]):]
+        return state["formatted_response"]
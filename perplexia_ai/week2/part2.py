@@ -7,26 +7,96 @@ This implementation focuses on:
 - Formatting responses with citations from OPM documents
 """
 
-from typing import Dict, List, Optional, TypedDict
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, TypedDict, Union
 
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from langchain.retrievers import EnsembleRetriever
+from langchain_core.caches import BaseCache
 from langchain_core.documents import Document
-from langchain_core.vectorstores import InMemoryVectorStore
-from langchain_community.document_loaders import PyPDFLoader
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_core.runnables import Runnable, RunnableLambda
 from langgraph.graph import START, END, StateGraph
+from perplexia_ai.core.bm25 import BM25Index, BM25Retriever
 from perplexia_ai.core.chat_interface import ChatInterface
-from langchain_community.tools import TavilySearchResults
+from perplexia_ai.core.clients import get_clients
+from perplexia_ai.core.search_cache import CachedSearchTool, SearchCache
+from perplexia_ai.core.search_results import SearchResultNormalizer
+from perplexia_ai.core.context_packing import pack_context
+from perplexia_ai.core.documents import load_and_split_pdfs
+from perplexia_ai.core.embedding_pipeline import BatchedEmbeddings
+from perplexia_ai.core.embeddings import create_cached_embeddings
+from perplexia_ai.core.index_manifest import IndexManifest, chunk_ids, file_sha256
+from perplexia_ai.core.llm_cache import with_cache
+from perplexia_ai.core.streaming import astream_node_tokens, stream_node_tokens
+from perplexia_ai.core.tracing import Tracer, instrument, instrument_branch, trace_request
+from perplexia_ai.core.vector_store import NumpyVectorStore
+from perplexia_ai.week2.score_gate import ScoreGate
 from pathlib import Path
 
+RETRIEVAL_MODES = ("vector", "bm25", "hybrid")
+
+EVALUATION_PROMPT = PromptTemplate.from_template("""
+Evaluate if the following context is relevant for answering the given question.
+
+    - Output a single word: GOOD or BAD. Do not output anything else
+    - Output GOOD if the context contains information that can be used to answer the question
+    - For anything else, output BAD
+
+Here are some examples
+
+Context:
+
+New Delhi is the capital of India.
+
+India is in Asia
+
+Asia is the biggest continent by land mass and population
+
+Question: Which continent does New Delhi belong to?
+Answer: GOOD
+
+Context:
+
+Populous is a video game release by Bullfrog in 1989
+
+It was released for the Amiga
+
+Question: Which is the most populous city in the World?
+Answer: BAD
+
+Now evaluate the context below
+
+Context:
+{context}
+
+Question: {question}
+Answer: """)
+
+GENERATION_PROMPT = PromptTemplate.from_template("""
+You are a helpful question answering bot. Use the context below to answer the question. Follow these rules:
+
+    - Only use the context and nothing beyond the context
+    - If the question is not answered in the context, say "I don't know the answer"
+
+Context:
+{context}
+
+Question: {question}
+Answer: """)
+
 
 class RagState(TypedDict):
     question: str
     docs: list[Document]
+    scores: list[float]
     context: str
     is_context_good: bool
+    search_results: list
     answer: str
 
 # NOTE: The TODOs are only a direction for you to start with.
@@ -34,11 +104,86 @@ class RagState(TypedDict):
 class DocumentRAGChat(ChatInterface):
     """Week 2 Part 2 implementation for document RAG."""
     
-    def initialize(self, docs_path: str = "docs/") -> None:
+    def initialize(
+        self,
+        docs_path: str = "docs/",
+        cache_dir: Optional[str] = None,
+        index_dir: Optional[str] = None,
+        vector_dtype: str = "float32",
+        ingest_workers: int = 1,
+        watch_interval: Optional[float] = None,
+        embedding_batch_size: int = 256,
+        embedding_concurrency: int = 4,
+        embedding_requests_per_minute: Optional[float] = None,
+        search_cache_dir: Optional[str] = None,
+        retrieval_mode: str = "vector",
+        speculative_search: bool = False,
+        speculative_search_workers: int = 4,
+        llm: Optional[BaseChatModel] = None,
+        embeddings: Optional[Embeddings] = None,
+        search_tool: Optional[Runnable] = None,
+        tracer: Optional[Tracer] = None,
+        context_token_budget: int = 1500,
+        max_passage_tokens: int = 600,
+        read_only_index: bool = False,
+        score_gate: Optional[Union[ScoreGate, str]] = None,
+        llm_cache: Optional[Union[BaseCache, str]] = None,
+        lean_search: bool = True,
+        search_payload_bytes: int = 16384,
+    ) -> None:
         """Initialize components for document RAG.
         
         Args:
             docs_path: Path to directory containing PDF documents
+            cache_dir: Optional directory for a persistent embedding cache, so
+                       unchanged chunks are not embedded again after a restart
+            index_dir: Directory for a persisted, memory-mapped vector index. An
+                       existing index is mapped read-only and only files that
+                       changed since it was written are re-indexed
+            vector_dtype: Storage type for vectors ('float32', 'float16' or 'int8')
+            ingest_workers: Number of processes used to extract and split PDFs,
+                            0 for one per CPU core
+            watch_interval: If set, poll docs_path every this many seconds and
+                            re-index new, changed or deleted PDFs
+            embedding_batch_size: Number of chunks sent per embedding request
+            embedding_concurrency: Maximum embedding requests in flight
+            embedding_requests_per_minute: Rate limit for embedding requests
+            search_cache_dir: Optional directory to persist cached search results
+            retrieval_mode: 'vector' for embedding similarity, 'bm25' for the local
+                            lexical index only, or 'hybrid' to fuse both with
+                            reciprocal rank fusion
+            speculative_search: Start the web search at the same time as the
+                                context evaluation call, so a BAD evaluation does
+                                not pay for the search round trip afterwards.
+                                Results of unneeded searches still fill the
+                                search cache
+            speculative_search_workers: Most speculative searches run at once
+                                        by synchronous requests
+            llm: Chat model to use, defaults to the shared gpt-4o-mini client
+            embeddings: Embedding model to use, defaults to the shared OpenAI embeddings
+            search_tool: Search tool to use, defaults to the shared Tavily client
+            tracer: Optional tracer recording per-node timings, LLM calls,
+                    context size, cache hits and the evaluation branch taken
+            context_token_budget: Approximate number of tokens of retrieved or web
+                                  context sent to the evaluation and generation calls
+            max_passage_tokens: Longest a single chunk or web result may be in
+                                the context before it is trimmed
+            read_only_index: Serve the existing index in index_dir as-is, without
+                             checking docs_path for changes or writing to it, so
+                             several processes can share one memory-mapped index
+            score_gate: Optional ScoreGate, or the path of one saved by
+                        benchmarks/calibrate_score_gate.py. Retrievals whose top
+                        score is clearly high or clearly low go straight to
+                        generation or web search, and only the uncertain ones
+                        get the evaluation call
+            llm_cache: Optional LangChain cache, or the path of a SQLite cache
+                       file, for the context evaluation call, so a repeated
+                       question and context is judged without an API call
+            lean_search: Request search results without raw page content, and keep
+                         only the title, url and trimmed content of each distinct
+                         URL in the graph state and the search cache
+            search_payload_bytes: Budget for the size of the search results of
+                                  one request in lean mode
         
         Students should:
         - Initialize the LLM
@@ -49,118 +194,383 @@ class DocumentRAGChat(ChatInterface):
         """
         
         
-        self.llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.1)
-        self.embeddings = OpenAIEmbeddings()
-        self.search_tool = TavilySearchResults(
-            max_results=5,
-            include_answer=True,
-            include_raw_content=True,
-            include_images=False,
-            search_depth="advanced"
+        self.llm = llm or get_clients().chat_model("gpt-4o-mini", temperature=0.1)
+        self.evaluation_llm = with_cache(self.llm, llm_cache)
+        self.embeddings = BatchedEmbeddings(
+            embeddings or get_clients().embeddings(),
+            batch_size=embedding_batch_size,
+            max_concurrency=embedding_concurrency,
+            requests_per_minute=embedding_requests_per_minute,
+        )
+        if cache_dir:
+            self.embeddings = create_cached_embeddings(self.embeddings, cache_dir)
+        self.search_tool = CachedSearchTool(
+            search_tool or get_clients().search_tool(
+                max_results=5,
+                include_answer=True,
+                include_raw_content=not lean_search,
+                include_images=False,
+                search_depth="advanced"
+            ),
+            SearchCache(cache_dir=search_cache_dir),
+            normalize=SearchResultNormalizer(max_bytes=search_payload_bytes) if lean_search else None,
         )
 
-        data_dir = Path(docs_path)
-        self.document_paths = list(data_dir.glob("*.pdf"))
+        self.docs_path = Path(docs_path)
+        self.index_dir = index_dir
+        self.ingest_workers = ingest_workers
+        self._reindex_lock = threading.Lock()
+        self._watch_stop = None
+        if retrieval_mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode: {retrieval_mode}. Choose from: {list(RETRIEVAL_MODES)}")
+        self.retrieval_mode = retrieval_mode
+        self.score_gate = ScoreGate.load(score_gate) if isinstance(score_gate, str) else score_gate
+        if self.score_gate and self.score_gate.retrieval_mode != retrieval_mode:
+            raise ValueError(
+                f"Score gate was fitted for {self.score_gate.retrieval_mode} retrieval, not {retrieval_mode}"
+            )
+        self.speculative_search = speculative_search
+        self._speculation_executor = ThreadPoolExecutor(
+            max_workers=speculative_search_workers, thread_name_prefix="speculative-search",
+        ) if speculative_search else None
+        self._speculation_tasks = set()
+        self._speculation_lock = threading.Lock()
+        self._speculation_counts = {"launched": 0, "used": 0, "wasted": 0, "failed": 0}
         
-        docs = self._load_and_process_documents(self.document_paths)
-        self.vector_store = InMemoryVectorStore.from_documents(docs, self.embeddings)
+        if index_dir and NumpyVectorStore.exists(index_dir) and IndexManifest.exists(index_dir):
+            # A read-only index must already have the requested dtype, others are converted once
+            vector_store = NumpyVectorStore.load(index_dir, self.embeddings, dtype=vector_dtype if read_only_index else None)
+            if vector_store.dtype != vector_dtype:
+                vector_store.astype(vector_dtype).save(index_dir)
+                vector_store = NumpyVectorStore.load(index_dir, self.embeddings)
+            self.manifest = IndexManifest.load(index_dir)
+        elif read_only_index:
+            raise ValueError(f"No index to serve read-only in: {index_dir}")
+        else:
+            vector_store = NumpyVectorStore(self.embeddings, dtype=vector_dtype)
+            self.manifest = IndexManifest()
+        self._indexes = (vector_store, None)
+        if read_only_index:
+            self.document_paths = sorted(Path(key) for key in self.manifest.entries)
+            self._indexes = (vector_store, self._build_lexical_index(vector_store, load=True, save=False))
+        else:
+            self.reindex()
+        if watch_interval and not read_only_index:
+            self.start_watching(watch_interval)
         
+        self.tracer = tracer
+        self.context_token_budget = context_token_budget
+        self.max_passage_tokens = max_passage_tokens
         graph = StateGraph(RagState)
-        graph.add_node("retrieval", self._create_retrieval_node())
-        graph.add_node("create_context", self._create_context_node())
-        graph.add_node("evaluation", self._create_evaluation_node())
-        graph.add_node("web_search", self._create_web_search_node())
-        graph.add_node("create_search_context", self._create_context_node())
-        graph.add_node("generation", self._create_generation_node())
+        graph.add_node("retrieval", instrument(tracer, "retrieval", self._create_retrieval_node()))
+        graph.add_node("create_context", instrument(tracer, "create_context", self._create_context_node()))
+        graph.add_node("evaluation", instrument(tracer, "evaluation", self._create_evaluation_node()))
+        graph.add_node("web_search", instrument(tracer, "web_search", self._create_web_search_node()))
+        graph.add_node("create_search_context", instrument(tracer, "create_search_context", self._create_context_node()))
+        graph.add_node("generation", instrument(tracer, "generation", self._create_generation_node()))
         graph.add_edge(START, "retrieval")
         graph.add_edge("retrieval", "create_context")
-        graph.add_edge("create_context", "evaluation")
-        graph.add_conditional_edges("evaluation", self._create_check_node(), {"generation": "generation", "web_search": "web_search"})
+        if self.score_gate:
+            graph.add_conditional_edges(
+                "create_context",
+                instrument_branch(tracer, "score_gate", self._create_gate_node()),
+                {"generation": "generation", "web_search": "web_search", "evaluation": "evaluation"},
+            )
+        else:
+            graph.add_edge("create_context", "evaluation")
+        graph.add_conditional_edges("evaluation", instrument_branch(tracer, "evaluation", self._create_check_node()), {"generation": "generation", "web_search": "web_search"})
         graph.add_edge("web_search", "create_search_context")
         graph.add_edge("create_search_context", "generation")
         graph.add_edge("generation", END)
         self.graph = graph.compile()
     
-    def _load_and_process_documents(self, document_paths: list) -> list:
-        """Load and process documents from given paths."""
-        # 1. Load the documents from provided paths
-        documents = []
-        for doc_path in document_paths:
-            loader = PyPDFLoader(str(doc_path))
-            docs = loader.load()
-            documents.extend(docs)
-        
-        # 2. Split into chunks suitable for text-embedding-3-small (8191 token limit)
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,  # Conservative chunk size for embeddings
-            chunk_overlap=200,  # Overlap to maintain context
-            length_function=len,
-            is_separator_regex=False,
-        )
-        chunks = text_splitter.split_documents(documents)
+    def _load_and_process_documents(self, document_paths: list, workers: int = 1) -> list:
+        """Load and process documents from given paths.
+        
+        Args:
+            document_paths: Paths to the PDF documents
+            workers: Number of processes used to extract and split the PDFs
+        """
+        return load_and_split_pdfs(document_paths, workers=workers)
+    
+    @property
+    def vector_store(self) -> NumpyVectorStore:
+        """The vector index currently served."""
+        return self._indexes[0]
+    
+    @property
+    def bm25_index(self) -> Optional[BM25Index]:
+        """The BM25 index over the same chunks as vector_store, None in vector mode."""
+        return self._indexes[1]
+    
+    def reindex(self) -> dict:
+        """Bring the vector store in line with the PDFs in the docs directory.
+        
+        Only new or changed files are extracted, chunked and embedded, and the
+        chunks of changed or deleted files are dropped. The updated vector
+        store, its BM25 index and the manifest are built on copies and swapped
+        in together, so concurrent requests keep reading a consistent pair of
+        indexes, and a failed re-index leaves the served state untouched.
         
-        # 3. Return processed document chunks
-        return chunks
+        Returns:
+            dict: Paths that were added, changed and removed
+        """
+        with self._reindex_lock:
+            document_paths = sorted(self.docs_path.glob("*.pdf"))
+            diff = self.manifest.diff(document_paths)
+            manifest = self.manifest.copy()
+            for key, (size, mtime) in diff.touched.items():
+                manifest.entries[key].size = size
+                manifest.entries[key].mtime = mtime
+            summary = {
+                "added": [str(path) for path in diff.added],
+                "changed": [str(path) for path in diff.changed],
+                "removed": diff.removed,
+            }
+            if diff.is_empty:
+                if diff.touched and self.index_dir:
+                    manifest.save(self.index_dir)
+                self.manifest, self.document_paths = manifest, document_paths
+                if self.bm25_index is None:
+                    self._indexes = (self.vector_store, self._build_lexical_index(self.vector_store, load=True))
+                return summary
+            
+            vector_store = self.vector_store.copy()
+            stale = diff.removed + [str(path) for path in diff.changed]
+            vector_store.delete([chunk_id for key in stale for chunk_id in manifest.entries[key].chunk_ids])
+            for key in diff.removed:
+                del manifest.entries[key]
+            
+            to_index = diff.added + diff.changed
+            chunks = self._load_and_process_documents(to_index, workers=self.ingest_workers)
+            chunks_by_source = {}
+            for chunk in chunks:
+                chunks_by_source.setdefault(chunk.metadata["source"], []).append(chunk)
+            for path in to_index:
+                sha256 = file_sha256(path)
+                file_chunks = chunks_by_source.get(str(path), [])
+                ids = chunk_ids(path, sha256, len(file_chunks))
+                vector_store.add_documents(file_chunks, ids=ids)
+                manifest.record(path, ids, sha256=sha256)
+            
+            if self.index_dir:
+                vector_store.save(self.index_dir)
+                manifest.save(self.index_dir)
+                vector_store = NumpyVectorStore.load(self.index_dir, self.embeddings)
+            self._indexes = (vector_store, self._build_lexical_index(vector_store))
+            self.manifest, self.document_paths = manifest, document_paths
+            return summary
+    
+    def _build_lexical_index(self, vector_store: NumpyVectorStore, load: bool = False, save: bool = True) -> Optional[BM25Index]:
+        """Build the BM25 index over the chunks of a vector store and persist it next to them.
+        
+        Args:
+            vector_store: The store whose chunks should be indexed
+            load: Try to load a matching saved index before building one
+            save: Persist a newly built index to the index directory
+        
+        Returns:
+            Optional[BM25Index]: The index, or None in vector mode
+        """
+        if self.retrieval_mode == "vector":
+            return None
+        bm25_index = BM25Index.load(self.index_dir, vector_store.documents) if load and self.index_dir else None
+        if bm25_index is None:
+            bm25_index = BM25Index.from_documents(vector_store.documents)
+            if self.index_dir and save:
+                bm25_index.save(self.index_dir)
+        return bm25_index
+    
+    def start_watching(self, interval: float = 30.0) -> None:
+        """Re-index the docs directory in a background thread every interval seconds."""
+        if self._watch_stop is not None:
+            return
+        self._watch_stop = threading.Event()
+        
+        def watch(stop: threading.Event):
+            while not stop.wait(interval):
+                try:
+                    summary = self.reindex()
+                    if any(summary.values()):
+                        print("Re-indexed documents:", summary)
+                except Exception as e:
+                    print(f"Re-index failed: {e}")
+        
+        threading.Thread(target=watch, args=(self._watch_stop,), daemon=True, name="docs-watcher").start()
+    
+    def stop_watching(self) -> None:
+        """Stop the background re-index thread."""
+        if self._watch_stop is not None:
+            self._watch_stop.set()
+            self._watch_stop = None
+    
+    def close(self) -> None:
+        """Stop the background re-index thread and the speculative search threads."""
+        self.stop_watching()
+        if self._speculation_executor is not None:
+            self._speculation_executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _fuse(self, vector_store: NumpyVectorStore, bm25_index: BM25Index, vector_docs: List[Document], lexical_docs: List[Document]) -> List[Document]:
+        """Weighted reciprocal rank fusion of the vector and BM25 rankings."""
+        ensemble = EnsembleRetriever(retrievers=[vector_store.as_retriever(), BM25Retriever(index=bm25_index)], weights=[0.5, 0.5])
+        return ensemble.weighted_reciprocal_rank([vector_docs, lexical_docs])
+    
+    def retrieve(self, question: str, k: int = 5) -> Tuple[List[Document], List[float]]:
+        """Retrieve the best chunks for a question with the configured retrieval mode.
+        
+        Args:
+            question: The user's question
+            k: Number of chunks to return
+        
+        Returns:
+            Tuple[List[Document], List[float]]: The chunks, best first, and the
+                retrieval scores: cosine similarities for vector and hybrid
+                retrieval (of the vector candidates), BM25 scores for bm25
+        """
+        # One snapshot of both indexes, so a concurrent reindex cannot mix them
+        vector_store, bm25_index = self._indexes
+        if self.retrieval_mode == "bm25":
+            hits = bm25_index.search(question, k)
+            return [doc for doc, _ in hits], [score for _, score in hits]
+        hits = vector_store.similarity_search_with_score(question, k)
+        return self._combine(vector_store, bm25_index, question, hits, k)
+    
+    async def aretrieve(self, question: str, k: int = 5) -> Tuple[List[Document], List[float]]:
+        """Async version of retrieve, embedding the question without blocking the event loop."""
+        if self.retrieval_mode == "bm25":
+            return self.retrieve(question, k)
+        vector_store, bm25_index = self._indexes
+        hits = await vector_store.asimilarity_search_with_score(question, k)
+        return self._combine(vector_store, bm25_index, question, hits, k)
+    
+    def _combine(self, vector_store: NumpyVectorStore, bm25_index: Optional[BM25Index], question: str,
+                 hits: List[Tuple[Document, float]], k: int) -> Tuple[List[Document], List[float]]:
+        docs, scores = [doc for doc, _ in hits], [score for _, score in hits]
+        if self.retrieval_mode == "hybrid":
+            docs = self._fuse(vector_store, bm25_index, docs, [doc for doc, _ in bm25_index.search(question, k)])[:k]
+        return docs, scores
     
     def _create_retrieval_node(self):
-        """Create a node that retrieves relevant document sections."""
+        """Create a node that retrieves relevant document sections with their scores."""
         def retrieval_node(state: RagState) -> dict:
-            question = state["question"]
-            retriever = self.vector_store.as_retriever(search_type="similarity", search_kwargs={"k": 5})
-            docs = retriever.invoke(question)
-            return {"docs": docs}
-        return retrieval_node
+            docs, scores = self.retrieve(state["question"])
+            return {"docs": docs, "scores": scores}
+        
+        async def aretrieval_node(state: RagState) -> dict:
+            docs, scores = await self.aretrieve(state["question"])
+            return {"docs": docs, "scores": scores}
+        
+        return RunnableLambda(retrieval_node, afunc=aretrieval_node, name="retrieval_node")
 
     def _create_context_node(self):
+        """Create a node that packs the ranked docs into a cited context within the token budget.
+        
+        Overlapping chunks of the same page are merged and near-duplicates dropped,
+        and docs are replaced by the packed passages so the SOURCES list numbering
+        matches the [n] labels in the context.
+        """
         def context_node(state: RagState) -> dict:
-            docs = state["docs"]
-            context = "\n".join(f'{doc.metadata}:\n{doc.page_content}\n' for doc in docs)
-            return {"context": context}
+            packed = pack_context(state["docs"], self.context_token_budget, self.max_passage_tokens)
+            return {"context": packed.text, "docs": packed.docs}
         return context_node
 
+    @property
+    def speculation_stats(self) -> dict:
+        """How many speculative searches were launched, and how each finished.
+        
+        Every launched search ends up either used (a BAD evaluation took its
+        results), wasted (the context was GOOD, or the evaluation failed) or
+        failed (a BAD evaluation needed it but the search raised).
+        """
+        with self._speculation_lock:
+            stats = dict(self._speculation_counts)
+        stats["hit_rate"] = stats["used"] / stats["launched"] if stats["launched"] else 0.0
+        return stats
+    
+    def _count_speculation(self, outcome: str) -> None:
+        with self._speculation_lock:
+            self._speculation_counts[outcome] += 1
+    
     def _create_evaluation_node(self):
+        chain = EVALUATION_PROMPT | self.evaluation_llm | StrOutputParser()
+        
         def evaluation_node(state: RagState) -> dict:
-            prompt_template = """
-Evaluate if the following context is relevant for answering the given question.
-
-    - Output a single word: GOOD or BAD. Do not output anything else
-    - Output GOOD if the context contains information that can be used to answer the question
-    - For anything else, output BAD
-
-Here are some examples
-
-Context:
-
-New Delhi is the capital of India.
-
-India is in Asia
-
-Asia is the biggest continent by land mass and population
-
-Question: Which continent does New Delhi belong to?
-Answer: GOOD
-
-Context:
-
-Populous is a video game release by Bullfrog in 1989
-
-It was released for the Amiga
-
-Question: Which is the most populous city in the World?
-Answer: BAD
-
-Now evaluate the context below
-
-Context:
-{context}
+            inputs = {"context": state["context"], "question": state["question"]}
+            if not self.speculative_search:
+                return {"is_context_good": "GOOD" in chain.invoke(inputs)}
+            
+            self._count_speculation("launched")
+            search = self._speculation_executor.submit(self.search_tool.invoke, state["question"])
+            try:
+                is_context_good = "GOOD" in chain.invoke(inputs)
+            except Exception:
+                search.cancel()
+                self._count_speculation("wasted")
+                raise
+            if is_context_good:
+                # Left running, the search still lands in the search cache
+                self._count_speculation("wasted")
+                return {"is_context_good": True}
+            try:
+                search_results = search.result()
+            except Exception:
+                # The web search node retries the search on its own
+                self._count_speculation("failed")
+                return {"is_context_good": False}
+            self._count_speculation("used")
+            return {"is_context_good": False, "search_results": search_results}
+        
+        async def aevaluation_node(state: RagState) -> dict:
+            inputs = {"context": state["context"], "question": state["question"]}
+            if not self.speculative_search:
+                return {"is_context_good": "GOOD" in await chain.ainvoke(inputs)}
+            
+            self._count_speculation("launched")
+            search = asyncio.ensure_future(self.search_tool.ainvoke(state["question"]))
+            try:
+                is_context_good = "GOOD" in await chain.ainvoke(inputs)
+            except BaseException:
+                search.cancel()
+                self._abandon_speculation(search)
+                self._count_speculation("wasted")
+                raise
+            if is_context_good:
+                self._abandon_speculation(search)
+                self._count_speculation("wasted")
+                return {"is_context_good": True}
+            try:
+                search_results = await search
+            except Exception:
+                self._count_speculation("failed")
+                return {"is_context_good": False}
+            self._count_speculation("used")
+            return {"is_context_good": False, "search_results": search_results}
+        
+        return RunnableLambda(evaluation_node, afunc=aevaluation_node, name="evaluation_node")
+    
+    def _abandon_speculation(self, task: asyncio.Future) -> None:
+        """Let a speculative search whose results are not needed finish on its own.
+        
+        A reference is kept so the task is not garbage collected before it
+        finishes, and its exception is retrieved so it is not reported.
+        """
+        self._speculation_tasks.add(task)
+        task.add_done_callback(self._discard_speculation)
+    
+    def _discard_speculation(self, task: asyncio.Future) -> None:
+        """Drop a finished speculative search whose results were not needed."""
+        self._speculation_tasks.discard(task)
+        if not task.cancelled():
+            task.exception()
 
-Question: {question}
-Answer: """
-            prompt = PromptTemplate.from_template(prompt_template)
-            chain = prompt | self.llm | StrOutputParser()
-            response = chain.invoke({"context": state["context"], "question": state["question"]})
-            return {"is_context_good": "GOOD" in response}
-        return evaluation_node
+    def _create_gate_node(self):
+        """Route clearly good or bad retrievals past the evaluation call."""
+        def gate_node(state: RagState) -> str:
+            decision = self.score_gate.decide(state["scores"])
+            if decision is None:
+                return "evaluation"
+            return "generation" if decision else "web_search"
+        return gate_node
 
     def _create_check_node(self):
         def check_node(state: RagState) -> str:
@@ -168,35 +578,38 @@ Answer: """
         return check_node
 
     def _create_web_search_node(self):
+        def to_documents(search_results: list) -> list[Document]:
+            return [Document(page_content=result['content'], metadata={'source': result['url']}) for result in search_results]
+        
         def web_search(state: RagState) -> dict:
-            query = state["question"]
-            search_results = self.search_tool.invoke(query)
-            documents = [Document(page_content=result['content'], metadata={'source': result['url']}) for result in search_results]
-            return {"docs": documents}
-        return web_search
+            search_results = state.get("search_results")
+            if search_results is None:
+                search_results = self.search_tool.invoke(state["question"])
+            return {"docs": to_documents(search_results)}
+        
+        async def aweb_search(state: RagState) -> dict:
+            search_results = state.get("search_results")
+            if search_results is None:
+                search_results = await self.search_tool.ainvoke(state["question"])
+            return {"docs": to_documents(search_results)}
+        
+        return RunnableLambda(web_search, afunc=aweb_search, name="web_search")
 
     def _create_generation_node(self):
         """Create a node that generates responses using retrieved context."""
+        chain = GENERATION_PROMPT | self.llm | StrOutputParser()
+        
         def generation_node(state: RagState) -> dict:
-            prompt_template = """
-You are a helpful question answering bot. Use the context below to answer the question. Follow these rules:
-
-    - Only use the context and nothing beyond the context
-    - If the question is not answered in the context, say "I don't know the answer"
-
-Context:
-{context}
-
-Question: {question}
-Answer: """
-            prompt = PromptTemplate.from_template(prompt_template)
-            context = state["context"]
-            chain = prompt | self.llm | StrOutputParser()
-            response = chain.invoke({"context": context, "question": state["question"]})
+            response = chain.invoke({"context": state["context"], "question": state["question"]})
+            return {"answer": response}
+        
+        async def ageneration_node(state: RagState) -> dict:
+            response = await chain.ainvoke({"context": state["context"], "question": state["question"]})
             return {"answer": response}
-        return generation_node
+        
+        return RunnableLambda(generation_node, afunc=ageneration_node, name="generation_node")
     
-    def process_message(self, message: str, chat_history: Optional[List[Dict[str, str]]] = None) -> str:
+    def process_message(self, message: str, chat_history: Optional[List[Dict[str, str]]] = None, session_id: Optional[str] = None) -> str:
         """Process a message using document RAG.
         
         Should reject queries that are not answerable from the OPM documents.
@@ -204,12 +617,78 @@ Answer: """
         Args:
             message: The user's input message
             chat_history: Previous conversation history
+            session_id: Not used, this mode keeps no per-session state
             
         Returns:
             str: The assistant's response based on document knowledge
         """
 
-        state = self.graph.invoke({"question": message})
+        with trace_request(self.tracer, "document_rag") as config:
+            state = self.graph.invoke({"question": message}, config)
+        return self._format_answer(state)
+    
+    async def aprocess_message(self, message: str, chat_history: Optional[List[Dict[str, str]]] = None, session_id: Optional[str] = None) -> str:
+        """Async version of process_message, running the graph with ainvoke.
+        
+        Args:
+            message: The user's input message
+            chat_history: Previous conversation history
+            session_id: Not used, this mode keeps no per-session state
+            
+        Returns:
+            str: The assistant's response based on document knowledge
+        """
+        with trace_request(self.tracer, "document_rag") as config:
+            state = await self.graph.ainvoke({"question": message}, config)
+        return self._format_answer(state)
+    
+    def stream_message(self, message: str, chat_history: Optional[List[Dict[str, str]]] = None, session_id: Optional[str] = None):
+        """Stream the answer tokens from the generation node, then the sources.
+        
+        Args:
+            message: The user's input message
+            chat_history: Previous conversation history
+            session_id: Not used, this mode keeps no per-session state
+            
+        Yields:
+            str: Successive chunks of the response
+        """
+        streamed = False
+        with trace_request(self.tracer, "document_rag", streaming=True) as config:
+            for item in stream_node_tokens(self.graph, {"question": message}, "generation", config):
+                if isinstance(item, str):
+                    streamed = True
+                    yield item
+                else:
+                    yield self._remaining_answer(item, streamed)
+    
+    async def astream_message(self, message: str, chat_history: Optional[List[Dict[str, str]]] = None, session_id: Optional[str] = None):
+        """Async version of stream_message.
+        
+        Args:
+            message: The user's input message
+            chat_history: Previous conversation history
+            session_id: Not used, this mode keeps no per-session state
+            
+        Yields:
+            str: Successive chunks of the response
+        """
+        streamed = False
+        with trace_request(self.tracer, "document_rag", streaming=True) as config:
+            async for item in astream_node_tokens(self.graph, {"question": message}, "generation", config):
+                if isinstance(item, str):
+                    streamed = True
+                    yield item
+                else:
+                    yield self._remaining_answer(item, streamed)
+    
+    def _remaining_answer(self, state: RagState, streamed: bool) -> str:
+        """Return the part of the full answer not yet streamed to the caller."""
+        full_answer = self._format_answer(state)
+        return full_answer[len(state["answer"]):] if streamed else full_answer
+    
+    def _format_answer(self, state: RagState) -> str:
+        """Append the numbered list of sources to the generated answer."""
         sources = "\n".join(f"{i}. {doc.metadata['source']}" for i, doc in enumerate(state["docs"], start=1))
         full_answer = f"{state['answer']}\n\nSOURCES:\n\n{sources}"
         return full_answer
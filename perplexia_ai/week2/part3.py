@@ -88,7 +88,7 @@ class CorrectiveRAGChat(ChatInterface):
         # TODO: Implement logic to decide when to use web search
         return False
     
-    def process_message(self, message: str, chat_history: Optional[List[Dict[str, str]]] = None) -> str:
+    def process_message(self, message: str, chat_history: Optional[List[Dict[str, str]]] = None, session_id: Optional[str] = None) -> str:
         """Process a message using Corrective RAG.
         
         Intelligently combines document knowledge with web search:
@@ -99,6 +99,7 @@ class CorrectiveRAGChat(ChatInterface):
         Args:
             message: The user's input message
             chat_history: Previous conversation history
+            session_id: Optional id of the conversation, e.g. Gradio's session hash
             
         Returns:
             str: The assistant's response combining document and web knowledge
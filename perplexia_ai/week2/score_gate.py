@@ -0,0 +1,119 @@
+"""Retrieval score gate in front of the context evaluation call.
+
+DocumentRAGChat asks the LLM whether the retrieved context can answer the
+question before generating. When the best retrieval score is very high the
+answer is almost always GOOD, and when it is very low it is almost always
+BAD, so the round trip buys nothing. ``ScoreGate`` decides those cases from
+the top score alone and only leaves the uncertain band between its two
+thresholds to the LLM.
+
+The thresholds depend on the embedding model, the retrieval mode and the
+documents, so they are fitted from labeled questions with ``ScoreGate.fit``
+(see benchmarks/calibrate_score_gate.py) and saved as JSON.
+"""
+
+import json
+import math
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+@dataclass(frozen=True)
+class ScoreGate:
+    """Route on the top retrieval score, deferring to the LLM in between.
+
+    Args:
+        low: Top scores below this are judged BAD without the LLM
+        high: Top scores at or above this are judged GOOD without the LLM
+        retrieval_mode: Retrieval mode the thresholds were fitted for
+    """
+
+    low: float = -math.inf
+    high: float = math.inf
+    retrieval_mode: str = "vector"
+
+    def __post_init__(self):
+        if self.low > self.high:
+            raise ValueError(f"Low threshold {self.low} is above high threshold {self.high}")
+
+    def decide(self, scores: Sequence[float]) -> Optional[bool]:
+        """Judge the retrieved context from its scores.
+
+        Args:
+            scores: Retrieval scores of the retrieved chunks
+
+        Returns:
+            Optional[bool]: True for GOOD, False for BAD, None to ask the LLM
+        """
+        if not scores:
+            # Nothing retrieved, there is no context to evaluate
+            return False
+        top = max(scores)
+        if top >= self.high:
+            return True
+        if top < self.low:
+            return False
+        return None
+
+    @classmethod
+    def fit(
+        cls,
+        samples: Sequence[Tuple[float, bool]],
+        max_error: float = 0.02,
+        retrieval_mode: str = "vector",
+    ) -> "ScoreGate":
+        """Fit the widest thresholds whose decisions stay within an error rate.
+
+        Args:
+            samples: (top score, context is good) pairs from labeled questions
+            max_error: Largest share of gated decisions on each side that may
+                       disagree with the labels
+            retrieval_mode: Retrieval mode the scores came from
+
+        Returns:
+            ScoreGate: The fitted gate, never gating a side no threshold is safe for
+        """
+        ordered = sorted(samples)
+        scores = [score for score, _ in ordered]
+
+        # Candidate thresholds are the observed scores
+        # Highest low threshold: everything below it is judged BAD
+        low, good_below = -math.inf, 0
+        for i, (score, good) in enumerate(ordered):
+            if i and score != scores[i - 1] and good_below <= max_error * i:
+                low = score
+            good_below += good
+
+        # Lowest high threshold at or above low: everything from it up is judged GOOD
+        high, bad_above = math.inf, 0
+        for i in range(len(ordered) - 1, -1, -1):
+            score, good = ordered[i]
+            bad_above += not good
+            above = len(ordered) - i
+            if (i == 0 or scores[i - 1] != score) and score >= low and bad_above <= max_error * above:
+                high = score
+        return cls(low=low, high=high, retrieval_mode=retrieval_mode)
+
+    def evaluate(self, samples: Sequence[Tuple[float, bool]]) -> Dict[str, float]:
+        """Count the LLM calls the gate saves on labeled samples and the mistakes it makes."""
+        decisions = [(self.decide([score]), good) for score, good in samples]
+        gated = [(decision, good) for decision, good in decisions if decision is not None]
+        errors = sum(decision != good for decision, good in gated)
+        return {
+            "samples": len(samples),
+            "llm_calls_saved": len(gated),
+            "saved_share": len(gated) / len(samples) if samples else 0.0,
+            "judged_good": sum(decision for decision, _ in gated),
+            "judged_bad": sum(not decision for decision, _ in gated),
+            "errors": errors,
+            "error_rate": errors / len(gated) if gated else 0.0,
+        }
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(asdict(self), f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "ScoreGate":
+        with open(path) as f:
+            return cls(**json.load(f))
@@ -12,11 +12,26 @@ parser.add_argument('--week', type=int, choices=[1, 2, 3], default=1,
                     help='Which week to run (1, 2, or 3)')
 parser.add_argument('--mode', type=str, choices=['part1', 'part2', 'part3'], 
                     default='part1', help='Which part of the selected week to run')
+parser.add_argument('--workers', type=int, default=1,
+                    help='Number of worker processes sharing one read-only index (0 for one per CPU core)')
+parser.add_argument('--port', type=int, default=None,
+                    help='Port to serve on (default: Gradio\'s); with several workers, the port of the entry point '
+                         'in front of them, and worker i listens on port + 1 + i')
+parser.add_argument('--index-dir', type=str, default='.cache/index',
+                    help='Directory of the shared document index when running several workers')
+parser.add_argument('--ready-file', type=str, default=None,
+                    help='File created once every worker is ready to serve')
 args = parser.parse_args()
 
-# Import and run the app
-from perplexia_ai.app import create_demo
-
 if __name__ == "__main__":
-    demo = create_demo(week=args.week, mode_str=args.mode)
-    demo.launch()
\ No newline at end of file
+    if args.workers == 1:
+        # Import and run the app
+        from perplexia_ai.app import create_demo
+
+        demo = create_demo(week=args.week, mode_str=args.mode)
+        demo.launch(server_port=args.port)
+    else:
+        from perplexia_ai.serving import serve
+
+        serve(args.week, args.mode, workers=args.workers, port=args.port or 7860,
+              index_dir=args.index_dir, ready_file=args.ready_file)
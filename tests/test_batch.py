@@ -0,0 +1,94 @@
+"""Tests for batch question answering."""
+
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from perplexia_ai.batch import arun_batch, completed_ids, run_batch, split_sources
+from perplexia_ai.core.chat_interface import ChatInterface
+
+
+class EchoChat(ChatInterface):
+    """Answers with the question and one source, failing on questions containing 'fail'."""
+
+    def __init__(self):
+        self.calls = []
+
+    def initialize(self) -> None:
+        pass
+
+    def process_message(self, message, chat_history=None, session_id=None):
+        self.calls.append(message)
+        if "fail" in message:
+            raise RuntimeError("boom")
+        return f"Echo: {message}\n\nSOURCES:\n\n1. https://example.com/{len(message)}"
+
+
+def write_questions(path, questions):
+    path.write_text("".join(json.dumps(q) + "\n" for q in questions))
+
+
+def read_results(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_split_sources():
+    assert split_sources("Answer\n\nSOURCES:\n\n1. a.pdf\n2. b.pdf") == ("Answer", ["a.pdf", "b.pdf"])
+    assert split_sources("Answer\n\nSOURCES:\nhttps://x\nhttps://y") == ("Answer", ["https://x", "https://y"])
+    assert split_sources("No sources") == ("No sources", [])
+
+
+def test_run_batch_writes_results_and_resumes(tmp_path):
+    questions, output = tmp_path / "questions.jsonl", tmp_path / "answers.jsonl"
+    write_questions(questions, [{"question": f"q{i}"} for i in range(20)] + [{"id": "x", "question": "please fail"}])
+
+    chat = EchoChat()
+    report = run_batch(chat, str(questions), str(output), concurrency=4, progress_every=0)
+    assert (report.total, report.answered, report.failed, report.skipped) == (21, 20, 1, 0)
+    results = {row["id"]: row for row in read_results(output)}
+    assert results[1]["answer"] == "Echo: q0" and results[1]["sources"] == ["https://example.com/2"]
+    assert results["x"]["error"] == "RuntimeError: boom"
+
+    # A second run only retries the failure, or nothing at all
+    chat = EchoChat()
+    report = run_batch(chat, str(questions), str(output), concurrency=4, progress_every=0)
+    assert chat.calls == ["please fail"] and report.skipped == 20
+    assert completed_ids(str(output), retry_errors=False) == {str(i) for i in range(1, 21)} | {"x"}
+    chat = EchoChat()
+    run_batch(chat, str(questions), str(output), retry_errors=False, progress_every=0)
+    assert chat.calls == []
+
+
+def test_duplicate_ids_are_rejected(tmp_path):
+    questions, output = tmp_path / "questions.jsonl", tmp_path / "answers.jsonl"
+    # The second line has no id, so it gets its line number, 2, like the first one
+    write_questions(questions, [{"id": 2, "question": "a"}, {"question": "b"}])
+    chat = EchoChat()
+    with pytest.raises(ValueError, match="duplicate id 2, first used on line 1"):
+        run_batch(chat, str(questions), str(output), progress_every=0)
+    assert chat.calls == [] and not output.exists()
+
+
+def test_arun_batch_leaves_the_callers_executor_alone(tmp_path):
+    questions, output = tmp_path / "questions.jsonl", tmp_path / "answers.jsonl"
+    write_questions(questions, [{"question": f"q{i}"} for i in range(4)])
+
+    class ThreadRecordingChat(EchoChat):
+        def process_message(self, message, chat_history=None, session_id=None):
+            self.calls.append(threading.current_thread().name)
+            return "answer"
+
+    async def main(chat):
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="caller")
+        asyncio.get_running_loop().set_default_executor(executor)
+        return await arun_batch(chat, str(questions), str(output), concurrency=2, progress_every=0)
+
+    chat = ThreadRecordingChat()
+    assert asyncio.run(main(chat)).answered == 4
+    assert all(name.startswith("caller") for name in chat.calls)
+    # run_batch shuts its own executor down when it is done
+    run_batch(EchoChat(), str(questions), str(tmp_path / "again.jsonl"), concurrency=3, progress_every=0)
+    assert not [thread for thread in threading.enumerate() if thread.name.startswith("batch")]
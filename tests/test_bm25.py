@@ -0,0 +1,40 @@
+"""Tests for the BM25 inverted index."""
+
+from langchain_core.documents import Document
+
+from perplexia_ai.core.bm25 import BM25Index, BM25Retriever, tokenize
+
+DOCS = [
+    Document(id="a", page_content="OPM improved retirement services in FY 2022 with a new online portal."),
+    Document(id="b", page_content="Federal hiring reform continued through FY 2019 and FY 2020."),
+    Document(id="c", page_content="Performance measure 1.2a tracks customer satisfaction for retirement services."),
+    Document(id="d", page_content="The headquarters is the Theodore Roosevelt Federal Office Building."),
+]
+
+
+def test_tokenize_keeps_ids_and_drops_stopwords():
+    assert tokenize("The measure 1.2a in FY2022") == ["measure", "1.2a", "fy2022"]
+
+
+def test_exact_terms_rank_first():
+    index = BM25Index.from_documents(DOCS)
+    assert index.search("measure 1.2a", k=1)[0][0].id == "c"
+    assert index.search("FY 2019 hiring", k=1)[0][0].id == "b"
+    assert [doc.id for doc, _ in index.search("retirement services", k=5)] in (["a", "c"], ["c", "a"])
+
+
+def test_unknown_terms_return_nothing():
+    assert BM25Index.from_documents(DOCS).search("quantum entanglement") == []
+
+
+def test_save_and_load(tmp_path):
+    index = BM25Index.from_documents(DOCS)
+    index.save(str(tmp_path))
+    loaded = BM25Index.load(str(tmp_path), DOCS)
+    assert loaded.search("Roosevelt", k=1)[0][0].id == "d"
+    assert BM25Index.load(str(tmp_path), DOCS[:2]) is None
+
+
+def test_retriever():
+    retriever = BM25Retriever(index=BM25Index.from_documents(DOCS), k=2)
+    assert retriever.invoke("Theodore Roosevelt building")[0].id == "d"
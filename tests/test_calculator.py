@@ -0,0 +1,77 @@
+"""Tests for the Calculator tool."""
+
+import time
+from decimal import Decimal
+from fractions import Fraction
+
+import pytest
+
+from perplexia_ai.tools.calculator import Calculator, compile_expression, format_result
+
+
+@pytest.mark.parametrize("expression,result", [
+    ("5 + 3", 8.0),
+    ("10 * (2 + 3)", 50.0),
+    ("15 / 3", 5.0),
+    ("-2 ** 2", -4.0),
+    ("7 // 2", 3.0),
+])
+def test_float_mode(expression, result):
+    assert Calculator.evaluate_expression(expression) == result
+
+
+def test_exact_mode():
+    assert Calculator.evaluate_expression("145323.122 * 1234389.12", exact=True) == Decimal("179385280681.23264")
+    assert Calculator.evaluate_expression("0.1 + 0.2", exact=True) == Decimal("0.3")
+    assert Calculator.evaluate_expression("200 * 1.2 / 4", exact=True) == 60
+    assert Calculator.evaluate_expression("1 / 3", exact=True) == Fraction(1, 3)
+
+
+@pytest.mark.parametrize("expression,result", [
+    ("2 ** 200", str(2 ** 200)),
+    ("12345678901234567890123456789012345678901234567890123 * 10", "123456789012345678901234567890123456789012345678901230"),
+    ("1 / 2 ** 100", "0." + "0" * 30 + str(5 ** 100)),
+    ("-7 / 8", "-0.875"),
+    ("2 / 6", "1/3"),
+    ("2 ** 0.5", "1.4142135623730951 (approximate)"),
+])
+def test_exact_results_keep_every_digit(expression, result):
+    assert format_result(Calculator.evaluate_expression(expression, exact=True)) == result
+
+
+@pytest.mark.parametrize("expression,error", [
+    ("1 / 0", "Error: Division by zero"),
+    ("__import__('os')", "Error: Invalid characters in expression"),
+    ("2 +", "Error: Invalid expression"),
+    ("()", "Error: Invalid expression"),
+    ("9 ** 9 ** 9", "Error: Exponent too large"),
+    ("+".join(["1"] * 300), "Error: Expression too complex"),
+])
+def test_errors(expression, error):
+    assert Calculator.evaluate_expression(expression) == error
+
+
+@pytest.mark.parametrize("expression", [
+    "(10 ** 1000) ** 1000",
+    "((10 ** 1000) ** 1000) ** 10",
+    "(2 ** 1000) ** 1000",
+    "(0.1 ** 1000) ** 100",
+    "((10 ** 100) ** 100) ** 100",
+    " * ".join(["10 ** 1000"] * 5),
+])
+def test_nested_powers_fail_fast_in_exact_mode(expression):
+    start = time.perf_counter()
+    assert Calculator.evaluate_expression(expression, exact=True) == "Error: Result too large"
+    assert time.perf_counter() - start < 1.0
+
+
+def test_large_powers_within_the_limit():
+    assert Calculator.evaluate_expression("(2 ** 100) ** 10", exact=True) == (2 ** 100) ** 10
+
+
+def test_expressions_are_compiled_once():
+    compile_expression.cache_clear()
+    Calculator.evaluate_expression("12345 * 678", exact=True)
+    Calculator.evaluate_expression("12345 * 678")
+    Calculator.evaluate_expression("12345 * 678")
+    assert compile_expression.cache_info().misses == 2
@@ -0,0 +1,76 @@
+"""Tests for the shared, pooled client registry."""
+
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from perplexia_ai.core.clients import ClientConfig, ClientRegistry
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/"
+    server.shutdown()
+
+
+def test_connections_are_reused_and_counted(server_url):
+    registry = ClientRegistry(ClientConfig(max_connections=4))
+    client = registry.http_client("local")
+    for _ in range(5):
+        client.get(server_url)
+
+    async def burst():
+        await asyncio.gather(*(registry.async_http_client("local").get(server_url) for _ in range(8)))
+        return registry.stats()["local"]
+
+    stats = asyncio.run(burst())
+    assert stats["sync"]["open_connections"] == 1 and stats["sync"]["peak_in_flight"] == 1
+    assert stats["async"]["open_connections"] == 4 and stats["async"]["peak_utilization"] == 1.0
+    # The connections of a finished event loop are no longer counted
+    assert registry.stats()["local"]["async"]["open_connections"] == 0
+    metrics = registry.metrics.render()
+    assert 'perplexia_http_requests_total{client="local"} 13' in metrics
+    assert 'perplexia_http_connections_opened_total{client="local"} 5' in metrics
+    registry.close()
+
+
+def test_async_client_works_across_event_loops(server_url):
+    registry = ClientRegistry()
+    client = registry.async_http_client("local")
+
+    async def fetch():
+        return [(await client.get(server_url)).text for _ in range(2)]
+
+    # Each asyncio.run has its own loop, whose connections cannot serve the next one
+    for _ in range(3):
+        assert asyncio.run(fetch()) == ["ok", "ok"]
+    registry.close()
+
+
+def test_clients_are_shared(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("TAVILY_API_KEY", "test")
+    registry = ClientRegistry()
+    assert registry.chat_model("gpt-4o-mini", temperature=0.1) is registry.chat_model("gpt-4o-mini", temperature=0.1)
+    assert registry.chat_model("gpt-4o-mini") is not registry.chat_model("gpt-4o-mini", temperature=0.1)
+    # Chat and embedding requests go through the same OpenAI connection pool
+    assert registry.embeddings().client._client._client is registry.chat_model("gpt-4o-mini").root_client._client
+    assert registry.search_tool(max_results=5) is registry.search_tool(max_results=5)
+    assert registry.search_tool(max_results=5).api_wrapper._client is registry.http_client("tavily")
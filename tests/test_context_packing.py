@@ -0,0 +1,40 @@
+"""Tests for token-budgeted context packing."""
+
+from langchain_core.documents import Document
+
+from perplexia_ai.core.context_packing import pack_context, to_passages
+
+TEXT = " ".join(f"word{i}" for i in range(400))
+
+
+def chunk(start: int, end: int, page: int = 0, source: str = "docs/report.pdf") -> Document:
+    return Document(page_content=TEXT[start:end], metadata={"source": source, "page": page, "producer": "x" * 500})
+
+
+def test_overlapping_neighbours_are_merged():
+    passages = to_passages([chunk(0, 1000), chunk(800, 1800)])
+    assert len(passages) == 1
+    assert passages[0].text == TEXT[:1800]
+    # Merging also works when the later chunk ranks first
+    assert to_passages([chunk(800, 1800), chunk(0, 1000)])[0].text == TEXT[:1800]
+
+
+def test_different_pages_are_not_merged():
+    assert len(to_passages([chunk(0, 1000), chunk(800, 1800, page=1)])) == 2
+
+
+def test_near_duplicates_are_dropped():
+    docs = [chunk(0, 1000), chunk(0, 990, source="docs/copy.pdf"), chunk(2000, 2500)]
+    packed = pack_context(docs)
+    assert [doc.metadata["source"] for doc in packed.docs] == ["docs/report.pdf", "docs/report.pdf"]
+
+
+def test_compact_labels_and_budget():
+    docs = [chunk(0, 1000), chunk(1500, 2500, page=3), Document(page_content="web " * 2000, metadata={"source": "https://example.com/a/"})]
+    packed = pack_context(docs, token_budget=600, max_passage_tokens=300)
+    assert packed.text.startswith("[1] report.pdf p. 1\n")
+    assert "[2] report.pdf p. 4\n" in packed.text
+    assert "producer" not in packed.text
+    assert packed.tokens <= 600
+    assert len(packed.docs) == 3
+    assert packed.text.split("[3] example.com/a\n")[1].endswith(" ...")
@@ -1,7 +1,10 @@
 """Tests for DocumentRAGChat class."""
 
+import asyncio
+
 import pytest
 from pathlib import Path
+from benchmarks.fakes import FakeChatModel, FakeEmbeddings, FakeSearchTool
 from perplexia_ai.week2.part2 import DocumentRAGChat
 
 
@@ -27,6 +30,18 @@ def test_document_loading_and_chunking():
     print(f"Successfully processed {len(document_paths)} documents into {len(chunks)} chunks")
 
 
+def test_parallel_ingest_matches_serial():
+    """Test that the process-pool ingest produces the same chunks in the same order."""
+    chat = DocumentRAGChat()
+    document_paths = sorted(Path("test_docs/").glob("*.pdf"))
+    
+    serial = chat._load_and_process_documents(document_paths)
+    parallel = chat._load_and_process_documents(document_paths, workers=2)
+    
+    assert [c.page_content for c in parallel] == [c.page_content for c in serial]
+    assert [c.metadata for c in parallel] == [c.metadata for c in serial]
+
+
 @pytest.fixture
 def chat():
     """Create and initialize DocumentRAGChat instance for testing."""
@@ -76,3 +91,68 @@ def test_corrective_rag_pycon_workshop(chat):
     
     # Should still have sources section
     assert "SOURCES" in response, "Response should include sources section"
+
+
+def test_speculative_search_pycon_workshop():
+    """Test that speculative web search answers the fallback question and records its outcome."""
+    chat = DocumentRAGChat()
+    chat.initialize("test_docs/", speculative_search=True)
+    
+    response = chat.process_message("Who is doing the workshop on 'Programming is playtime' at Pycon India 2025?")
+    
+    assert "Siddharta" in response, f"Response should mention Siddharta, got: {response}"
+    stats = chat.speculation_stats
+    assert stats["launched"] == 1
+    assert stats["used"] + stats["wasted"] + stats["failed"] == 1
+
+
+class FailingSearchTool(FakeSearchTool):
+    def invoke(self, input, config=None, **kwargs):
+        raise RuntimeError("search failed")
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        raise RuntimeError("search failed")
+
+
+class FailingChatModel(FakeChatModel):
+    def _respond(self, messages, **kwargs):
+        raise RuntimeError("evaluation failed")
+
+
+@pytest.fixture
+def speculative_chat(tmp_path):
+    """A chat with speculative search over an empty docs directory, for calling its evaluation node."""
+    chat = DocumentRAGChat()
+    chat.initialize(str(tmp_path), speculative_search=True, llm=FakeChatModel(),
+                    embeddings=FakeEmbeddings(), search_tool=FakeSearchTool())
+    yield chat
+    chat.close()
+
+
+def evaluate(chat, use_async: bool, evaluation_llm=None) -> dict:
+    chat.evaluation_llm = evaluation_llm or chat.evaluation_llm
+    node = chat._create_evaluation_node()
+    state = {"context": "Some context", "question": "Who gives the workshop?"}
+    return asyncio.run(node.ainvoke(state)) if use_async else node.invoke(state)
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_speculative_search_outcomes(speculative_chat, use_async):
+    assert evaluate(speculative_chat, use_async, FakeChatModel(bad_rate=0.0)) == {"is_context_good": True}
+    bad = evaluate(speculative_chat, use_async, FakeChatModel(bad_rate=1.0))
+    assert bad["is_context_good"] is False and len(bad["search_results"]) == 5
+
+    speculative_chat.search_tool = FailingSearchTool()
+    # The web search node searches again when the speculative search failed
+    assert evaluate(speculative_chat, use_async) == {"is_context_good": False}
+    stats = speculative_chat.speculation_stats
+    assert stats == {"launched": 3, "used": 1, "wasted": 1, "failed": 1, "hit_rate": 1 / 3}
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_failed_evaluation_abandons_the_speculative_search(speculative_chat, use_async):
+    with pytest.raises(RuntimeError, match="evaluation failed"):
+        evaluate(speculative_chat, use_async, FailingChatModel())
+    stats = speculative_chat.speculation_stats
+    assert (stats["launched"], stats["wasted"]) == (1, 1)
+    assert not speculative_chat._speculation_tasks
@@ -0,0 +1,143 @@
+"""Tests for BatchedEmbeddings against a local fake OpenAI embedding server."""
+
+import base64
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import openai
+import pytest
+from langchain_openai import OpenAIEmbeddings
+
+from perplexia_ai.core.embedding_pipeline import BatchedEmbeddings, TokenBucket
+
+DIMENSION = 8
+
+
+def fake_vector(text: str) -> list:
+    rng = np.random.default_rng(abs(hash(text)) % (2 ** 32))
+    return rng.random(DIMENSION).astype(np.float32).tolist()
+
+
+class FakeEmbeddingServer(ThreadingHTTPServer):
+    """OpenAI-compatible /v1/embeddings endpoint that fails the first requests with a given status."""
+
+    def __init__(self, fail_first: int = 0, fail_status: int = 429):
+        super().__init__(("127.0.0.1", 0), FakeEmbeddingHandler)
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.requests = []
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+
+class FakeEmbeddingHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.server.lock:
+            self.server.requests.append(body["input"])
+            rate_limited = len(self.server.requests) <= self.server.fail_first
+        if rate_limited:
+            self._send(self.server.fail_status, {"error": {"message": "Request failed", "type": "requests"}})
+            return
+        data = []
+        for i, text in enumerate(body["input"]):
+            vector = fake_vector(text)
+            if body.get("encoding_format") == "base64":
+                vector = base64.b64encode(np.array(vector, dtype=np.float32).tobytes()).decode()
+            data.append({"object": "embedding", "index": i, "embedding": vector})
+        self._send(200, {"object": "list", "data": data, "model": body["model"],
+                         "usage": {"prompt_tokens": 0, "total_tokens": 0}})
+
+    def _send(self, status, payload):
+        encoded = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+
+@pytest.fixture
+def server(request):
+    fail_first, fail_status = getattr(request, "param", (0, 429))
+    server = FakeEmbeddingServer(fail_first=fail_first, fail_status=fail_status)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+
+
+def make_embeddings(server):
+    return OpenAIEmbeddings(base_url=server.base_url, api_key="test", max_retries=0, check_embedding_ctx_length=False)
+
+
+def test_batches_preserve_order(server):
+    progress = []
+    embeddings = BatchedEmbeddings(make_embeddings(server), batch_size=3, max_concurrency=3, progress=progress.append)
+    texts = [f"chunk {i}" for i in range(10)]
+
+    vectors = embeddings.embed_documents(texts)
+
+    assert np.allclose(vectors, [fake_vector(t) for t in texts])
+    assert sorted(len(batch) for batch in server.requests) == [1, 3, 3, 3]
+    assert progress[-1].texts_done == 10 and progress[-1].batches_done == 4
+
+
+@pytest.mark.parametrize("server", [(2, 429)], indirect=True)
+def test_retries_rate_limited_batches(server):
+    progress = []
+    embeddings = BatchedEmbeddings(make_embeddings(server), batch_size=5, max_concurrency=1,
+                                   initial_backoff=0.01, progress=progress.append)
+    vectors = embeddings.embed_documents([f"chunk {i}" for i in range(5)])
+    assert len(vectors) == 5
+    assert progress[-1].retries == 2
+
+
+@pytest.mark.parametrize("server", [(10, 429)], indirect=True)
+def test_gives_up_after_max_retries(server):
+    embeddings = BatchedEmbeddings(make_embeddings(server), max_retries=1, initial_backoff=0.01)
+    with pytest.raises(Exception):
+        embeddings.embed_documents(["chunk"])
+    assert len(server.requests) == 2
+
+
+@pytest.mark.parametrize("server", [(10, 401)], indirect=True)
+def test_does_not_retry_permanent_errors(server):
+    embeddings = BatchedEmbeddings(make_embeddings(server), initial_backoff=0.01)
+    with pytest.raises(openai.AuthenticationError):
+        embeddings.embed_documents(["chunk"])
+    assert len(server.requests) == 1
+
+
+@pytest.mark.parametrize("server", [(1, 429)], indirect=True)
+def test_query_embeddings_are_not_retried(server):
+    embeddings = BatchedEmbeddings(make_embeddings(server), initial_backoff=0.01)
+    with pytest.raises(openai.RateLimitError):
+        embeddings.embed_query("question")
+    assert len(server.requests) == 1
+
+
+@pytest.mark.parametrize("server", [(2, 429)], indirect=True)
+def test_retries_are_counted_per_call(server):
+    first, second = [], []
+    embeddings = BatchedEmbeddings(make_embeddings(server), batch_size=1, max_concurrency=1,
+                                   initial_backoff=0.01, progress=first.append)
+    embeddings.embed_documents(["chunk 0"])
+    embeddings.progress = second.append
+    embeddings.embed_documents(["chunk 1"])
+    assert first[-1].retries == 2
+    assert second[-1].retries == 0
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=100, capacity=1)
+    waited = sum(bucket.acquire() for _ in range(6))
+    assert waited >= 0.04
@@ -0,0 +1,34 @@
+"""Tests for the embedding cache."""
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from perplexia_ai.core.embeddings import create_cached_embeddings
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    """Fake embeddings that record every text sent for embedding."""
+    calls: list = []
+
+    def embed_documents(self, texts):
+        self.calls.extend(texts)
+        return super().embed_documents(texts)
+
+
+def test_cache_only_embeds_unseen_text(tmp_path):
+    underlying = CountingEmbeddings(size=8, calls=[])
+    cached = create_cached_embeddings(underlying, str(tmp_path), namespace="fake")
+    first = cached.embed_documents(["alpha", "beta"])
+
+    # A fresh wrapper over the same directory behaves like a process restart
+    restarted = create_cached_embeddings(underlying, str(tmp_path), namespace="fake")
+    second = restarted.embed_documents(["alpha", "beta", "gamma"])
+
+    assert second[:2] == first
+    assert underlying.calls == ["alpha", "beta", "gamma"]
+
+
+def test_cache_is_keyed_by_namespace(tmp_path):
+    underlying = CountingEmbeddings(size=8, calls=[])
+    create_cached_embeddings(underlying, str(tmp_path), namespace="model-a").embed_documents(["alpha"])
+    create_cached_embeddings(underlying, str(tmp_path), namespace="model-b").embed_documents(["alpha"])
+    assert underlying.calls == ["alpha", "alpha"]
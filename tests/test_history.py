@@ -0,0 +1,136 @@
+"""Tests for the bounded chat history manager."""
+
+import logging
+import time
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda
+
+from benchmarks.fakes import FakeChatModel
+from perplexia_ai.core.history import HistoryManager
+from perplexia_ai.week1.part1 import QueryUnderstandingChat
+
+
+def conversation(turns: int, words: int = 40) -> list:
+    history = []
+    for i in range(turns):
+        history.append({"role": "user", "content": f"question {i} " + "word " * words})
+        history.append({"role": "assistant", "content": f"answer {i} " + "word " * words})
+    return history
+
+
+def test_converts_only_new_turns():
+    manager = HistoryManager(max_tokens=10_000)
+    history = conversation(3)
+    first = manager.get(history)
+    assert [type(m) for m in first] == [HumanMessage, AIMessage] * 3
+
+    second = manager.get(history + conversation(1))
+    # The messages converted on the first turn are reused as-is
+    assert all(a is b for a, b in zip(first, second))
+    assert len(second) == 8
+
+
+def test_window_is_bounded_in_tokens():
+    manager = HistoryManager(max_tokens=200)
+    messages = manager.get(conversation(20))
+    assert 0 < len(messages) < 40
+    assert sum(len(m.content) // 4 for m in messages) <= 200
+    assert messages[-1].content.startswith("answer 19")
+
+
+def test_edited_history_is_reconverted():
+    manager = HistoryManager(max_tokens=10_000)
+    history = conversation(2)
+    manager.get(history)
+    edited = history[:2] + [{"role": "user", "content": "something else"}]
+    assert manager.get(edited)[-1].content == "something else"
+
+
+def test_edits_anywhere_in_the_history_are_detected():
+    manager = HistoryManager(max_tokens=10_000)
+    history = conversation(3)
+    manager.get(history)
+    edited = [dict(message) for message in history]
+    edited[2]["content"] = "a different second question"
+    assert manager.get(edited)[2].content == "a different second question"
+
+
+def test_sessions_with_the_same_opening_message_are_kept_apart():
+    manager = HistoryManager(max_tokens=10_000)
+    alice = conversation(2)
+    bob = alice[:1] + [{"role": "assistant", "content": "another answer"}]
+    first_alice = manager.get(alice, session_id="alice")
+    first_bob = manager.get(bob, session_id="bob")
+    # Each session keeps its converted messages instead of evicting the other's
+    assert all(a is b for a, b in zip(first_alice, manager.get(alice, session_id="alice")))
+    assert all(a is b for a, b in zip(first_bob, manager.get(bob, session_id="bob")))
+    assert manager.get(bob, session_id="bob")[1].content == "another answer"
+
+
+def test_chat_keys_history_by_session_id():
+    chat = QueryUnderstandingChat()
+    chat.initialize(llm=FakeChatModel())
+    history = conversation(1)
+    chat.process_message("Tell me a joke", history, session_id="first")
+    chat.process_message("Tell me a joke", history, session_id="second")
+    assert set(chat.history._sessions) == {"first", "second"}
+
+
+def test_turns_stay_in_the_prompt_until_their_summary_is_ready():
+    manager = HistoryManager(FakeListChatModel(responses=["Summary."], sleep=0.2), max_tokens=200)
+    history = conversation(20)
+    # The summary is still being written, so nothing is dropped yet
+    assert len(manager.get(history)) == 40
+    assert len(manager.get(history)) == 40
+
+
+def wait_for_summary(manager, history):
+    for _ in range(100):
+        messages = manager.get(history)
+        if isinstance(messages[0], SystemMessage):
+            return messages
+        time.sleep(0.01)
+    return messages
+
+
+def test_older_turns_are_summarized_in_the_background():
+    manager = HistoryManager(FakeListChatModel(responses=["The user asked 18 questions."]), max_tokens=200)
+    history = conversation(20)
+    assert not isinstance(manager.get(history)[0], SystemMessage)
+
+    messages = wait_for_summary(manager, history)
+    assert messages[0].content == "Summary of the earlier conversation: The user asked 18 questions."
+    assert sum(len(m.content) // 4 for m in messages) <= 200
+
+
+def test_summary_counts_against_the_budget():
+    long_summary = "The user asked about many things. " * 12
+    manager = HistoryManager(FakeListChatModel(responses=[long_summary]), max_tokens=200)
+    history = conversation(20)
+    # Turns left out to make room for the summary are summarized too, and then the history fits
+    for _ in range(100):
+        messages = manager.get(history)
+        if sum(len(m.content) // 4 for m in messages) <= 200:
+            break
+        time.sleep(0.01)
+    assert len(messages[0].content) // 4 > 100
+    assert sum(len(m.content) // 4 for m in messages) <= 200
+
+
+def test_failed_summary_is_logged(caplog):
+    def fail(prompt):
+        raise RuntimeError("summary model down")
+
+    manager = HistoryManager(RunnableLambda(fail), max_tokens=200)
+    history = conversation(20)
+    with caplog.at_level(logging.WARNING, logger="perplexia_ai.core.history"):
+        assert len(manager.get(history)) == 40
+        for _ in range(100):
+            if caplog.records:
+                break
+            time.sleep(0.01)
+    assert "History summary failed" in caplog.records[0].getMessage()
+    # The turns stay in the prompt until a summary succeeds
+    assert len(manager.get(history)) == 40
@@ -0,0 +1,92 @@
+"""Tests for IndexManifest."""
+
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from benchmarks.fakes import FakeChatModel, FakeEmbeddings, FakeSearchTool
+from perplexia_ai.core.index_manifest import IndexManifest
+from perplexia_ai.week2.part2 import DocumentRAGChat
+
+
+def test_diff_detects_added_changed_removed_and_touched(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    a, b, c = docs / "a.pdf", docs / "b.pdf", docs / "c.pdf"
+    for path in (a, b, c):
+        path.write_bytes(path.name.encode())
+
+    manifest = IndexManifest()
+    for path in (a, b, c):
+        manifest.record(path, [f"{path.stem}-0"])
+    manifest.save(str(tmp_path / "index"))
+    manifest = IndexManifest.load(str(tmp_path / "index"))
+
+    b.write_bytes(b"new content for b")
+    c.unlink()
+    d = docs / "d.pdf"
+    d.write_bytes(b"d")
+    os.utime(a, (1, 1))
+
+    diff = manifest.diff([a, b, d])
+    assert diff.added == [d]
+    assert diff.changed == [b]
+    assert diff.removed == [str(c)]
+    assert list(diff.touched) == [str(a)]
+    assert manifest.entries[str(c)].chunk_ids == ["c-0"]
+
+
+def test_unchanged_directory_has_empty_diff(tmp_path):
+    path = tmp_path / "a.pdf"
+    path.write_bytes(b"a")
+    manifest = IndexManifest()
+    manifest.record(path, ["a-0"])
+    assert manifest.diff([path]).is_empty
+
+
+def test_identical_files_at_different_paths_keep_their_chunks(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    source = sorted(Path("test_docs/").glob("*.pdf"))[0]
+    shutil.copy(source, docs / "a.pdf")
+    shutil.copy(source, docs / "b.pdf")
+    chat = DocumentRAGChat()
+    chat.initialize(str(docs), llm=FakeChatModel(), embeddings=FakeEmbeddings(), search_tool=FakeSearchTool())
+    ids_a = chat.manifest.entries[str(docs / "a.pdf")].chunk_ids
+    ids_b = chat.manifest.entries[str(docs / "b.pdf")].chunk_ids
+    assert ids_a and not set(ids_a) & set(ids_b)
+
+    (docs / "a.pdf").unlink()
+    chat.reindex()
+    sources = {doc.metadata["source"] for doc in chat.vector_store.documents}
+    assert sources == {str(docs / "b.pdf")}
+
+
+def test_failed_reindex_keeps_the_served_state(tmp_path, monkeypatch):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    sources = sorted(Path("test_docs/").glob("*.pdf"))[:2]
+    for source in sources:
+        shutil.copy(source, docs / source.name)
+    chat = DocumentRAGChat()
+    chat.initialize(str(docs), llm=FakeChatModel(), embeddings=FakeEmbeddings(), search_tool=FakeSearchTool())
+    removed = str(docs / sources[0].name)
+    (docs / sources[0].name).unlink()
+    shutil.copy(sources[1], docs / "new.pdf")
+
+    def corrupt(document_paths, workers=1):
+        raise ValueError("corrupt PDF")
+
+    monkeypatch.setattr(chat, "_load_and_process_documents", corrupt)
+    with pytest.raises(ValueError):
+        chat.reindex()
+    assert removed in chat.manifest.entries
+    assert removed in {doc.metadata["source"] for doc in chat.vector_store.documents}
+
+    # The next successful re-index still knows the removed file's chunks and drops them
+    monkeypatch.undo()
+    chat.reindex()
+    assert removed not in {doc.metadata["source"] for doc in chat.vector_store.documents}
+    assert set(chat.manifest.entries) == {str(docs / sources[1].name), str(docs / "new.pdf")}
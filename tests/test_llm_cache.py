@@ -0,0 +1,61 @@
+"""Tests for the persistent SQLite LLM cache."""
+
+import asyncio
+import threading
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from perplexia_ai.core.llm_cache import SQLiteLLMCache, with_cache
+
+
+def test_repeated_prompts_are_answered_from_the_cache(tmp_path):
+    cache = SQLiteLLMCache(str(tmp_path / "cache.sqlite"))
+    llm = FakeListChatModel(responses=["first", "second", "third"])
+    cached = with_cache(llm, cache)
+
+    assert cached.invoke("hello").content == "first"
+    assert cached.invoke("hello").content == "first"
+    assert asyncio.run(cached.ainvoke("hello")).content == "first"
+    assert cached.invoke("other").content == "second"
+    assert cache.stats == {"hits": 2, "misses": 2, "entries": 2}
+    # Only the chain built from the cached copy uses the cache
+    llm.invoke("hello")
+    assert cache.stats["hits"] == 2
+
+    assert with_cache(llm, None) is llm
+
+
+def test_shared_between_instances_and_threads(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    llm = FakeListChatModel(responses=["stored", "fresh"])
+    with_cache(llm, SQLiteLLMCache(path)).invoke("hello")
+
+    # A second cache on the same file, as another worker process would open it
+    other_cache = SQLiteLLMCache(path)
+    other = with_cache(llm, other_cache)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(other.invoke("hello").content)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["stored"] * 8
+    assert other_cache.stats == {"hits": 8, "misses": 0, "entries": 1}
+
+
+def test_ttl_and_max_entries(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("perplexia_ai.core.llm_cache.time.time", lambda: clock[0])
+    cache = SQLiteLLMCache(str(tmp_path / "cache.sqlite"), ttl=60, max_entries=3)
+    llm = with_cache(FakeListChatModel(responses=[str(i) for i in range(10)]), cache)
+
+    for i in range(4):
+        clock[0] += 1
+        llm.invoke(f"prompt {i}")
+    # The least recently used entry was evicted
+    assert cache.stats["entries"] == 3
+    assert llm.invoke("prompt 0").content == "4"
+
+    clock[0] += 120
+    assert llm.invoke("prompt 3").content == "5"
+    assert cache.expire() == 2
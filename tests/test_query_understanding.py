@@ -2,8 +2,21 @@
 
 import re
 import pytest
+from perplexia_ai.week1.classifier import HELD_OUT_EXAMPLES, LocalQueryClassifier
 from perplexia_ai.week1.part1 import QueryUnderstandingChat
 
+ROUTING_CASES = [
+    ("How many hydrogen atoms are in a molucule of water?", "factual"),
+    ("How does a car engine work?", "analytical"),
+    ("What's the difference between Java and Python?", "comparison"),
+    ("Define artificial intelligence", "definition"),
+    ("What is 2 + 2?", "maths"),
+    ("What is the best library for AI?", "general")
+]
+
+# Borderline between factual and definition
+TRICKY_ROUTING_CASES = [("What is photosynthesis?", "definition")]
+
 
 @pytest.fixture
 def chat():
@@ -11,14 +24,7 @@ def chat():
     chat.initialize()
     return chat
 
-@pytest.mark.parametrize("question,category", [
-    ("How many hydrogen atoms are in a molucule of water?", "factual"),
-    ("How does a car engine work?", "analytical"),
-    ("What's the difference between Java and Python?", "comparison"),
-    ("Define artificial intelligence", "definition"),
-    ("What is 2 + 2?", "maths"),
-    ("What is the best library for AI?", "general")
-])
+@pytest.mark.parametrize("question,category", ROUTING_CASES)
 def test_routing(chat, question, category):
     assert chat.routing_chain.invoke({"question": question}) == category
 
@@ -26,6 +32,27 @@ def test_routing_tricky(chat):
     """Ask a question that is borderline between factual and definition"""
     assert chat.routing_chain.invoke({"question": "What is photosynthesis?"}) == "definition"
 
+@pytest.mark.parametrize("question,category", ROUTING_CASES + TRICKY_ROUTING_CASES)
+def test_local_classifier_is_right_when_confident(question, category):
+    """The local classifier may defer to the LLM, but must not be confidently wrong"""
+    assert LocalQueryClassifier.default().classify(question) in (category, None)
+
+def test_local_classifier_handles_most_cases():
+    classifier = LocalQueryClassifier.default()
+    confident = [q for q, _ in ROUTING_CASES if classifier.classify(q) is not None]
+    assert len(confident) >= len(ROUTING_CASES) - 1
+
+def test_local_classifier_is_calibrated_on_held_out_examples():
+    classifier = LocalQueryClassifier.default()
+    result = classifier.evaluate(HELD_OUT_EXAMPLES)
+    assert result["precision"] == 1.0
+    assert result["coverage"] >= 0.3
+
+@pytest.mark.parametrize("question", ["How many days are in 3 years?", "How many minutes are in five hours?"])
+def test_local_classifier_never_routes_numbers_away_from_maths(question):
+    classifier = LocalQueryClassifier.default(threshold=0.0)
+    assert classifier.classify(question) in ("maths", None)
+
 @pytest.mark.parametrize("question,answer", [
     ("What is 2 + 2?", "4"),
     ("What is 15% of 85?", "12.75"),
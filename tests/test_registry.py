@@ -0,0 +1,32 @@
+"""Tests for the lazy mode registry."""
+
+import subprocess
+import sys
+
+import pytest
+
+from perplexia_ai.core.registry import MODES, get_mode, load_implementation
+
+
+def test_unknown_week_and_mode():
+    with pytest.raises(ValueError, match="Unknown week"):
+        get_mode(7, "part1")
+    with pytest.raises(ValueError, match="Unknown mode"):
+        get_mode(1, "part9")
+
+
+@pytest.mark.parametrize("week,mode", list(MODES))
+def test_targets_resolve(week, mode):
+    assert load_implementation(week, mode).__name__ == MODES[(week, mode)].target.split(":")[1]
+
+
+def test_week1_does_not_import_week2_dependencies():
+    code = (
+        "import sys\n"
+        "from perplexia_ai.core.registry import create_chat_implementation\n"
+        "create_chat_implementation(1, 'part1')\n"
+        "print(sorted(m for m in ('langgraph', 'langchain_community', 'langchain_openai', 'openai',\n"
+        "                         'perplexia_ai.week2.part2') if m in sys.modules))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
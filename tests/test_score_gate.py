@@ -0,0 +1,47 @@
+"""Tests for the retrieval score gate."""
+
+import math
+
+import pytest
+
+from perplexia_ai.week2.score_gate import ScoreGate
+
+
+def samples():
+    bad = [(0.10 + i * 0.02, False) for i in range(10)]
+    good = [(0.70 + i * 0.02, True) for i in range(10)]
+    uncertain = [(0.40, True), (0.42, False), (0.45, True), (0.48, False)]
+    return bad + good + uncertain
+
+
+def test_decide():
+    gate = ScoreGate(low=0.3, high=0.7)
+    assert gate.decide([0.2, 0.8]) is True
+    assert gate.decide([0.1, 0.2]) is False
+    assert gate.decide([0.5]) is None
+    assert gate.decide([]) is False
+    assert ScoreGate().decide([0.99]) is None
+    with pytest.raises(ValueError):
+        ScoreGate(low=0.8, high=0.2)
+
+
+def test_fit_separates_clear_cases():
+    gate = ScoreGate.fit(samples(), max_error=0.0)
+    assert 0.28 < gate.low <= 0.40
+    assert 0.48 < gate.high <= 0.70
+    report = gate.evaluate(samples())
+    assert report["llm_calls_saved"] == 20
+    assert report["errors"] == 0
+
+
+def test_fit_without_separation_never_gates():
+    mixed = [(0.5, i % 2 == 0) for i in range(10)]
+    gate = ScoreGate.fit(mixed, max_error=0.0)
+    assert gate.low == -math.inf and gate.high == math.inf
+    assert gate.evaluate(mixed)["llm_calls_saved"] == 0
+
+
+def test_save_and_load(tmp_path):
+    gate = ScoreGate(low=0.25, high=0.75, retrieval_mode="hybrid")
+    gate.save(tmp_path / "gate.json")
+    assert ScoreGate.load(tmp_path / "gate.json") == gate
@@ -0,0 +1,76 @@
+"""Tests for the search result cache."""
+
+import asyncio
+import os
+
+from langchain_core.runnables import RunnableLambda
+
+from perplexia_ai.core.search_cache import CachedSearchTool, SearchCache, normalize_query
+
+
+def make_tool(calls):
+    def search(query):
+        calls.append(query)
+        return [{"title": query, "content": "content", "url": "https://example.com"}]
+    return RunnableLambda(search)
+
+
+def test_normalize_query():
+    assert normalize_query("  What is the Capital of France?") == normalize_query("what is the capital of france")
+    assert normalize_query("C++ vs C#?") == "c++ vs c#"
+    assert normalize_query("C++ vs C#") != normalize_query("C vs C")
+    assert normalize_query("Is node.js (or deno) faster?") == "is node.js or deno faster"
+
+
+def test_repeated_and_reworded_queries_hit_cache():
+    calls = []
+    tool = CachedSearchTool(make_tool(calls), SearchCache())
+    tool.invoke("What is the capital of France?")
+    tool.invoke("what is the capital of france")
+    asyncio.run(tool.ainvoke({"query": "What is the capital of FRANCE"}))
+    assert calls == ["What is the capital of France?"]
+    assert tool.cache.stats["hits"] == 2
+    assert tool.cache.stats["misses"] == 1
+
+
+def test_ttl_expiry():
+    cache = SearchCache(ttl=-1)
+    cache.set("key", [1])
+    assert cache.get("key") is None
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = SearchCache(max_entries=2)
+    cache.set("a", [1])
+    cache.set("b", [2])
+    cache.get("a")
+    cache.set("c", [3])
+    assert cache.get("b") is None
+    assert cache.get("a") == [1]
+
+    cache = SearchCache(max_bytes=20)
+    cache.set("a", ["x" * 8])
+    cache.set("b", ["y" * 8])
+    assert cache.get("a") is None
+    assert cache.stats["evictions"] == 1
+
+
+def test_disk_backend_survives_restart(tmp_path):
+    SearchCache(cache_dir=str(tmp_path)).set("key", [{"url": "https://example.com"}])
+    assert SearchCache(cache_dir=str(tmp_path)).get("key") == [{"url": "https://example.com"}]
+
+
+def test_disk_sweep_drops_expired_and_oldest_files(tmp_path):
+    cache = SearchCache(ttl=3600, cache_dir=str(tmp_path), max_disk_bytes=10_000)
+    for i in range(5):
+        cache.set(f"key{i}", ["x" * 3000])
+    # Sweeps run at most once per interval, so none ran after the first write
+    assert len(list(tmp_path.iterdir())) == 5
+
+    expired = cache._disk_path("key0")
+    os.utime(expired, (1, 1))
+    oldest = cache._disk_path("key1")
+    os.utime(oldest, (oldest.stat().st_mtime - 60,) * 2)
+    assert cache.sweep_disk() == 2
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(cache._disk_path(f"key{i}").name for i in (2, 3, 4))
+    assert SearchCache(cache_dir=str(tmp_path)).get("key1") is None
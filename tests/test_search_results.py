@@ -0,0 +1,46 @@
+"""Tests for lean search result normalization."""
+
+from langchain_core.runnables import RunnableLambda
+
+from perplexia_ai.core.search_cache import CachedSearchTool, SearchCache
+from perplexia_ai.core.search_results import SearchResultNormalizer, canonical_url, payload_bytes
+
+
+def result(url, words=50, raw_words=0):
+    item = {"title": f"Title of {url}", "url": url, "content": "word " * words, "score": 0.9}
+    if raw_words:
+        item["raw_content"] = "page " * raw_words
+    return item
+
+
+def test_deduplicates_and_keeps_lean_fields():
+    normalize = SearchResultNormalizer()
+    results = [result("https://Example.com/a", raw_words=5000), result("https://example.com/a/#top"), result("https://example.com/b")]
+    lean = normalize(results)
+    assert [item["url"] for item in lean] == ["https://Example.com/a", "https://example.com/b"]
+    assert all(set(item) == {"title", "url", "content"} for item in lean)
+    assert canonical_url("HTTPS://Example.com/a/?q=1#x") == "https://example.com/a?q=1"
+
+
+def test_byte_budgets():
+    normalize = SearchResultNormalizer(max_bytes=3000, max_content_bytes=1000)
+    lean = normalize([result(f"https://example.com/{i}", words=1000) for i in range(5)])
+    assert payload_bytes(lean) <= 3000
+    assert all(len(item["content"].encode()) <= 1000 for item in lean)
+    assert lean[-1]["content"].endswith(" ...")
+    # Tool errors are passed through untouched
+    assert normalize("HTTPError('boom')") == "HTTPError('boom')"
+
+
+def test_cached_search_tool_normalizes_before_caching():
+    calls = []
+
+    def search(query):
+        calls.append(query)
+        return [result("https://example.com/a", raw_words=1000), result("https://example.com/a")]
+
+    tool = CachedSearchTool(RunnableLambda(search), SearchCache(), normalize=SearchResultNormalizer())
+    first = tool.invoke("query")
+    assert tool.invoke("query") == first and len(calls) == 1
+    assert len(first) == 1 and "raw_content" not in first[0]
+    assert tool.cache.stats["bytes"] == payload_bytes(first)
@@ -0,0 +1,109 @@
+"""Tests for the multi-process serving helpers."""
+
+import asyncio
+import os
+import sys
+
+import httpx
+import pytest
+
+from perplexia_ai.serving import StickyProxy, format_memory, process_memory, uses_index
+
+
+def test_uses_index():
+    assert uses_index(2, "part2")
+    assert not uses_index(1, "part1")
+    assert not uses_index(2, "part1")
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="reads /proc")
+def test_process_memory():
+    memory = process_memory(os.getpid())
+    assert memory["rss"] > 0 and 0 < memory["pss"] <= memory["rss"]
+    assert format_memory(memory).startswith("rss ")
+    assert format_memory({}) == "memory unavailable"
+
+
+class EchoWorkers(httpx.AsyncBaseTransport):
+    """Workers that answer with their own address, as a streamed body like a real server's."""
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = f"{request.url.host}:{request.url.port}".encode()
+        return httpx.Response(200, stream=httpx.ByteStream(body))
+
+
+def echo_proxy(workers: int = 4) -> StickyProxy:
+    """A StickyProxy in front of EchoWorkers on ports 7861 onwards."""
+    upstream = httpx.AsyncClient(transport=EchoWorkers())
+    return StickyProxy([f"http://127.0.0.1:{7861 + i}" for i in range(workers)], client=upstream)
+
+
+def proxy_client(proxy: StickyProxy) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=proxy), base_url="http://proxy")
+
+
+def test_proxy_keeps_a_session_on_one_worker():
+    async def session_workers(session: str) -> set:
+        async with proxy_client(echo_proxy()) as client:
+            responses = [
+                await client.post("/gradio_api/queue/join", json={"data": [], "session_hash": session}),
+                await client.get("/gradio_api/queue/data", params={"session_hash": session}),
+                await client.get(f"/gradio_api/heartbeat/{session}"),
+                await client.post("/gradio_api/cancel", json={"event_id": "1", "session_hash": session}),
+            ]
+        return {response.text for response in responses}
+
+    workers = [asyncio.run(session_workers(f"session-{i}")) for i in range(20)]
+    assert all(len(used) == 1 for used in workers)
+    # Sessions are spread over the workers
+    assert len(set.union(*workers)) > 1
+
+
+def test_proxy_reports_unreachable_workers():
+    def down(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("connection refused", request=request)
+
+    async def fetch() -> httpx.Response:
+        proxy = StickyProxy(["http://127.0.0.1:7861"], client=httpx.AsyncClient(transport=httpx.MockTransport(down)))
+        async with proxy_client(proxy) as client:
+            return await client.get("/")
+
+    assert asyncio.run(fetch()).status_code == 502
+
+
+def test_proxy_routes_around_unavailable_workers():
+    async def workers_of(client, sessions) -> list:
+        return [(await client.get("/gradio_api/queue/data", params={"session_hash": s})).text for s in sessions]
+
+    async def run():
+        proxy = echo_proxy(workers=3)
+        async with proxy_client(proxy) as client:
+            sessions = [f"session-{i}" for i in range(30)]
+            before = await workers_of(client, sessions)
+            proxy.set_available(proxy.upstreams[0], False)
+            during = await workers_of(client, sessions)
+            proxy.set_available(proxy.upstreams[0], True)
+            return before, during, await workers_of(client, sessions)
+
+    before, during, after = asyncio.run(run())
+    assert "127.0.0.1:7861" in before and "127.0.0.1:7861" not in during
+    # Sessions of the available workers stay where they were, and all return once it is back
+    assert all(b == d for b, d in zip(before, during) if b != "127.0.0.1:7861")
+    assert after == before
+
+
+def test_proxy_retries_refused_connections_on_another_worker():
+    class OneWorkerDown(EchoWorkers):
+        async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+            if request.url.port == 7861:
+                raise httpx.ConnectError("connection refused", request=request)
+            return await super().handle_async_request(request)
+
+    async def fetch() -> list:
+        upstream = httpx.AsyncClient(transport=OneWorkerDown())
+        proxy = StickyProxy(["http://127.0.0.1:7861", "http://127.0.0.1:7862"], client=upstream)
+        async with proxy_client(proxy) as client:
+            return [(await client.get(f"/gradio_api/heartbeat/session-{i}")) for i in range(10)]
+
+    responses = asyncio.run(fetch())
+    assert {(response.status_code, response.text) for response in responses} == {(200, "127.0.0.1:7862")}
@@ -0,0 +1,42 @@
+"""Tests for streaming tokens out of LangGraph nodes."""
+
+import asyncio
+from typing import TypedDict
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langgraph.graph import START, END, StateGraph
+
+from perplexia_ai.core.streaming import astream_node_tokens, stream_node_tokens
+
+
+class State(TypedDict):
+    question: str
+    verdict: str
+    answer: str
+
+
+def build_graph():
+    llm = FakeListChatModel(responses=["GOOD", "Paris"])
+    graph = StateGraph(State)
+    graph.add_node("evaluation", lambda state: {"verdict": llm.invoke(state["question"]).content})
+    graph.add_node("generation", lambda state: {"answer": llm.invoke(state["question"]).content})
+    graph.add_edge(START, "evaluation")
+    graph.add_edge("evaluation", "generation")
+    graph.add_edge("generation", END)
+    return graph.compile()
+
+
+def test_streams_only_the_selected_node():
+    items = list(stream_node_tokens(build_graph(), {"question": "capital?"}, "generation"))
+    assert "".join(items[:-1]) == "Paris"
+    assert items[-1]["verdict"] == "GOOD"
+    assert items[-1]["answer"] == "Paris"
+
+
+def test_async_streams_only_the_selected_node():
+    async def collect():
+        return [item async for item in astream_node_tokens(build_graph(), {"question": "capital?"}, "generation")]
+
+    items = asyncio.run(collect())
+    assert "".join(items[:-1]) == "Paris"
+    assert items[-1]["answer"] == "Paris"
@@ -0,0 +1,64 @@
+"""Tests for concurrent tool call dispatch."""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.tools import tool
+
+from perplexia_ai.tools.dispatch import arun_tool_calls, run_tool_calls
+
+
+@tool
+def slow(seconds: float) -> str:
+    """Sleep for the given number of seconds."""
+    time.sleep(seconds)
+    return f"slept {seconds}"
+
+
+@tool
+def fail(message: str) -> str:
+    """Always raise an error."""
+    raise ValueError(message)
+
+
+TOOLS = {"slow": slow, "fail": fail}
+
+
+def calls(*specs):
+    return [{"name": name, "args": args, "id": f"call_{i}", "type": "tool_call"} for i, (name, args) in enumerate(specs)]
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        yield executor
+
+
+def test_calls_run_concurrently_in_order(executor):
+    start = time.perf_counter()
+    messages = run_tool_calls(calls(("slow", {"seconds": 0.2}), ("slow", {"seconds": 0.1}), ("slow", {"seconds": 0.2})), TOOLS, executor)
+    assert time.perf_counter() - start < 0.35
+    assert [m.tool_call_id for m in messages] == ["call_0", "call_1", "call_2"]
+    assert messages[1].content == "slept 0.1"
+
+
+def test_errors_and_timeouts_become_tool_messages(executor):
+    messages = run_tool_calls(calls(("slow", {"seconds": 1}), ("fail", {"message": "boom"}), ("missing", {}), ("slow", {"seconds": 0})),
+                              TOOLS, executor, timeout=0.1)
+    assert [m.status for m in messages] == ["error", "error", "error", "success"]
+    assert "timed out" in messages[0].content
+    assert "boom" in messages[1].content
+    assert "Unknown tool" in messages[2].content
+
+
+def test_async_dispatch():
+    async def run():
+        start = time.perf_counter()
+        messages = await arun_tool_calls(calls(("slow", {"seconds": 0.2}), ("slow", {"seconds": 0.2}), ("slow", {"seconds": 1})), TOOLS, timeout=0.5)
+        return messages, time.perf_counter() - start
+
+    messages, elapsed = asyncio.run(run())
+    assert elapsed < 0.9
+    assert [m.status for m in messages] == ["success", "success", "error"]
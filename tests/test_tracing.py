@@ -0,0 +1,89 @@
+"""Tests for graph tracing and metrics."""
+
+import asyncio
+import json
+from typing import TypedDict
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import END, START, StateGraph
+
+from perplexia_ai.core.tracing import Metrics, Tracer, instrument, instrument_branch, record, trace_request
+
+
+class State(TypedDict):
+    question: str
+    context: str
+    answer: str
+
+
+def build_graph(tracer):
+    llm = FakeListChatModel(responses=["an answer"])
+
+    def context_node(state: State) -> dict:
+        record(search_cache_hits=1)
+        return {"context": "x" * 300}
+
+    def answer_node(state: State) -> dict:
+        return {"answer": llm.invoke(state["question"]).content}
+
+    async def aanswer_node(state: State) -> dict:
+        return {"answer": (await llm.ainvoke(state["question"])).content}
+
+    graph = StateGraph(State)
+    graph.add_node("build_context", instrument(tracer, "build_context", context_node))
+    graph.add_node("generate", instrument(tracer, "generate", RunnableLambda(answer_node, afunc=aanswer_node)))
+    graph.add_edge(START, "build_context")
+    graph.add_conditional_edges("build_context", instrument_branch(tracer, "build_context", lambda state: "generate"), {"generate": "generate"})
+    graph.add_edge("generate", END)
+    return graph.compile()
+
+
+def test_trace_records_spans_and_branches(tmp_path):
+    tracer = Tracer(str(tmp_path / "trace.jsonl"))
+    graph = build_graph(tracer)
+
+    with trace_request(tracer, "test", question_chars=3) as config:
+        assert graph.invoke({"question": "why"}, config)["answer"] == "an answer"
+
+    async def arun():
+        with trace_request(tracer, "test") as config:
+            return await graph.ainvoke({"question": "why"}, config)
+
+    assert asyncio.run(arun())["answer"] == "an answer"
+
+    traces = [json.loads(line) for line in open(tmp_path / "trace.jsonl")]
+    assert len(traces) == 2
+    for trace in traces:
+        assert trace["branches"] == {"build_context": "generate"}
+        spans = {span["node"]: span for span in trace["spans"]}
+        assert spans["build_context"]["context_bytes"] == 300
+        assert spans["build_context"]["search_cache_hits"] == 1
+        assert spans["generate"]["llm_calls"] == 1
+        assert all(span["status"] == "ok" for span in trace["spans"])
+    assert traces[0]["attributes"] == {"question_chars": 3}
+
+    text = tracer.metrics.render()
+    assert 'perplexia_requests_total{status="ok",workflow="test"} 2' in text
+    assert 'perplexia_branch_total{branch="generate",edge="build_context"} 2' in text
+    assert 'perplexia_node_duration_seconds_count{node="generate"} 2' in text
+    assert 'perplexia_context_bytes_bucket{node="build_context",le="256"} 0' in text
+
+
+def test_disabled_tracing_leaves_graph_untouched():
+    node = RunnableLambda(lambda state: state)
+    assert instrument(None, "node", node) is node
+    with trace_request(None, "test") as config:
+        assert config == {}
+    record(search_cache_hits=1)  # no active span, nothing happens
+
+
+def test_histogram_buckets_are_cumulative():
+    metrics = Metrics()
+    for value in (0.001, 0.2, 100):
+        metrics.observe("latency_seconds", value, buckets=(0.01, 1.0), help="Latency")
+    text = metrics.render()
+    assert 'perplexia_latency_seconds_bucket{le="0.01"} 1' in text
+    assert 'perplexia_latency_seconds_bucket{le="1.0"} 2' in text
+    assert 'perplexia_latency_seconds_bucket{le="+Inf"} 3' in text
+    assert "perplexia_latency_seconds_count 3" in text
@@ -0,0 +1,82 @@
+"""Tests for NumpyVectorStore."""
+
+import json
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from perplexia_ai.core.vector_store import NumpyVectorStore
+
+TEXTS = ["apples and pears", "federal hiring reform", "retirement services backlog", "quantum computing"]
+
+
+@pytest.fixture
+def embedding():
+    return DeterministicFakeEmbedding(size=32)
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16", "int8"])
+def test_exact_match_ranks_first(embedding, dtype):
+    store = NumpyVectorStore.from_texts(TEXTS, embedding, metadatas=[{"source": t} for t in TEXTS], dtype=dtype)
+    results = store.similarity_search_with_score("federal hiring reform", k=2)
+    assert results[0][0].page_content == "federal hiring reform"
+    assert results[0][1] == pytest.approx(1.0, abs=0.02)
+    assert len(results) == 2
+
+
+def test_retriever_interface(embedding):
+    store = NumpyVectorStore.from_documents([Document(page_content=t, metadata={"source": t}) for t in TEXTS], embedding)
+    retriever = store.as_retriever(search_type="similarity", search_kwargs={"k": 3})
+    docs = retriever.invoke("quantum computing")
+    assert len(docs) == 3
+    assert docs[0].metadata["source"] == "quantum computing"
+
+
+def test_save_and_load_memory_mapped(embedding, tmp_path):
+    store = NumpyVectorStore.from_texts(TEXTS, embedding, dtype="int8")
+    store.save(str(tmp_path))
+
+    loaded = NumpyVectorStore.load(str(tmp_path), embedding)
+    assert isinstance(loaded._vectors, np.memmap)
+    assert loaded.similarity_search("retirement services backlog", k=1)[0].page_content == "retirement services backlog"
+
+
+def test_delete(embedding):
+    store = NumpyVectorStore.from_texts(TEXTS, embedding, ids=["a", "b", "c", "d"])
+    assert store.delete(["b"])
+    assert len(store) == 3
+    assert all(doc.id != "b" for doc in store.similarity_search("federal hiring reform", k=4))
+
+
+def test_save_swaps_in_a_complete_version(embedding, tmp_path):
+    store = NumpyVectorStore.from_texts(TEXTS, embedding, dtype="int8")
+    store.save(str(tmp_path))
+    first = NumpyVectorStore.load(str(tmp_path), embedding)
+
+    # A float32 save leaves no int8 scales behind in the version it points to
+    store.astype("float32").save(str(tmp_path))
+    current = tmp_path / "versions" / (tmp_path / "CURRENT").read_text()
+    assert sorted(path.name for path in current.iterdir()) == ["docstore.json", "vectors.npy"]
+    assert json.loads((current / "docstore.json").read_text())["dtype"] == "float32"
+
+    # The earlier mapping stays valid, and only the previous version is kept besides the current one
+    assert first.similarity_search("quantum computing", k=1)[0].page_content == "quantum computing"
+    store.save(str(tmp_path))
+    assert len(list((tmp_path / "versions").iterdir())) == 2
+    assert NumpyVectorStore.load(str(tmp_path), embedding).dtype == "int8"
+
+
+def test_load_rejects_another_dtype(embedding, tmp_path):
+    NumpyVectorStore.from_texts(TEXTS, embedding, dtype="int8").save(str(tmp_path))
+    with pytest.raises(ValueError, match="stores int8 vectors, not float32"):
+        NumpyVectorStore.load(str(tmp_path), embedding, dtype="float32")
+    assert NumpyVectorStore.load(str(tmp_path), embedding, dtype="int8").dtype == "int8"
+
+
+def test_astype_keeps_the_ranking(embedding):
+    store = NumpyVectorStore.from_texts(TEXTS, embedding, dtype="int8")
+    converted = store.astype("float16")
+    assert converted.dtype == "float16" and converted._scales is None
+    assert converted.similarity_search("federal hiring reform", k=1)[0].page_content == "federal hiring reform"
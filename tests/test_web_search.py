@@ -1,5 +1,6 @@
 """Tests for WebSearchChat class."""
 
+import asyncio
 import pytest
 from perplexia_ai.week2.part1 import WebSearchChat
 
@@ -16,4 +17,10 @@ def test_web_search_capital_of_france(web_search_chat):
     """Test that WebSearchChat can answer what is the capital of France."""
     response = web_search_chat.process_message("What is the capital of France?")
     assert "Paris" in response
-    assert "SOURCES" in response
\ No newline at end of file
+    assert "SOURCES" in response
+
+def test_web_search_async(web_search_chat):
+    """Test that the async path gives the same kind of answer."""
+    response = asyncio.run(web_search_chat.aprocess_message("What is the capital of France?"))
+    assert "Paris" in response
+    assert "SOURCES" in response